@@ -1,11 +1,44 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from state.state_manager import TicketState
+from cache.store import cache_key, get_cache
+from observability.instrumentation import record_llm_call
+from observability.metrics import AGENT_ERRORS
+from observability.tracing import set_attributes
+from agents.preprocessing import agent_query
+from agents.routing import FAST, STRONG, choose_tier, create_tiered_llms, record_tier_call, with_tier
 import json
+import time
+from typing import Optional
+
+VALID_CATEGORIES = ["Billing", "Technical", "Feature", "Bug"]
+VALID_SENTIMENTS = ["Positive", "Neutral", "Negative"]
+VALID_URGENCIES = ["Low", "Medium", "High", "Critical"]
+
+
+def normalize_classification(data: dict) -> dict:
+    """Coerce a model's category/sentiment/urgency onto the allowed values."""
+    category = data.get("category", "Technical")
+    if category not in VALID_CATEGORIES:
+        category = "Technical"
+
+    sentiment = data.get("sentiment", "Neutral")
+    if sentiment not in VALID_SENTIMENTS:
+        sentiment = "Neutral"
+
+    urgency = data.get("urgency", "Medium")
+    if urgency not in VALID_URGENCIES:
+        urgency = "Medium"
+
+    return {
+        "category": category,
+        "sentiment": sentiment,
+        "urgency": urgency
+    }
+
 
 class QueryClassifier:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4-turbo", temperature=0)
+        self.llms = create_tiered_llms(temperature=0)
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a senior support routing agent with emotional intelligence.
             Analyze the incoming query and provide:
@@ -32,44 +65,50 @@ class QueryClassifier:
             - Low: General questions, minor issues"""),
             ("human", "{query}")
         ])
-        self.chain = self.prompt | self.llm
+        self.chains = {tier: self.prompt | llm for tier, llm in self.llms.items()}
+        self.cache = get_cache("classification")
 
     async def run(self, state: TicketState) -> TicketState:
         """Categorize the ticket with sentiment and urgency analysis."""
 
-        query = state.get("customer_query", "")
-        response = await self.chain.ainvoke({"query": query})
+        query = agent_query(state, "classifier")
+        key = cache_key(query.strip())
+        cached = self.cache.get(key)
+        if cached is not None:
+            set_attributes(cache_hit=True, **cached)
+            return cached
+
+        tier, reason = choose_tier("classifier", state)
+        data = await self._classify(query, tier, reason)
+        if data is None and tier == FAST:
+            # An unparseable answer from the fast tier is retried on the strong one
+            tier = STRONG
+            data = await self._classify(query, tier, "parse_failure")
+        parsed = data is not None
+        if not parsed:
+            # Fallback to old behavior if JSON parsing fails
+            data = {}
+
+        result = normalize_classification(data)
+        print(f"📊 Classification: {result['category']} | Sentiment: {result['sentiment']} | Urgency: {result['urgency']}")
+        set_attributes(**result)
+
+        # Don't cache the fallback from an unparseable response
+        if parsed:
+            self.cache.set(key, result)
+        return {**result, **with_tier(state, "classifier", tier)}
+
+    async def _classify(self, query: str, tier: str, reason: Optional[str] = None) -> Optional[dict]:
+        """Ask one tier for the classification; None if the response isn't JSON."""
+        started = time.perf_counter()
+        response = await self.chains[tier].ainvoke({"query": query})
+        elapsed = time.perf_counter() - started
+        record_tier_call("classifier", tier, record_llm_call("classifier", response, elapsed), elapsed, reason)
 
         try:
             # Parse JSON response
-            data = json.loads(response.content.strip())
-            category = data.get("category", "Technical")
-            sentiment = data.get("sentiment", "Neutral")
-            urgency = data.get("urgency", "Medium")
+            return json.loads(response.content.strip())
         except json.JSONDecodeError:
-            # Fallback to old behavior if JSON parsing fails
-            print("Warning: Could not parse classifier response as JSON")
-            category = "Technical"
-            sentiment = "Neutral"
-            urgency = "Medium"
-
-        # Validation
-        valid_categories = ["Billing", "Technical", "Feature", "Bug"]
-        if category not in valid_categories:
-            category = "Technical"
-
-        valid_sentiments = ["Positive", "Neutral", "Negative"]
-        if sentiment not in valid_sentiments:
-            sentiment = "Neutral"
-
-        valid_urgencies = ["Low", "Medium", "High", "Critical"]
-        if urgency not in valid_urgencies:
-            urgency = "Medium"
-
-        print(f"📊 Classification: {category} | Sentiment: {sentiment} | Urgency: {urgency}")
-
-        return {
-            "category": category,
-            "sentiment": sentiment,
-            "urgency": urgency
-        }
+            print(f"Warning: Could not parse classifier response as JSON ({tier} tier)")
+            AGENT_ERRORS.inc(agent="classifier", reason="json_parse")
+            return None
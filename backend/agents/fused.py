@@ -0,0 +1,90 @@
+from langchain_core.prompts import ChatPromptTemplate
+from state.state_manager import TicketState
+from store.chunk_store import context_text
+from agents.classifier import normalize_classification
+from agents.generator import ResponseGenerator
+from observability.instrumentation import record_llm_call
+from observability.metrics import AGENT_ERRORS
+from observability.tracing import set_attributes
+from agents.preprocessing import agent_query
+from agents.routing import FAST, choose_tier, create_tiered_llms, record_tier_call, with_tier
+import json
+import time
+
+class ClassifyAndDraft:
+    """Classify the ticket and draft the reply in one LLM call (fused pipeline mode)."""
+
+    def __init__(self, generator: ResponseGenerator):
+        # Used only when the fused response can't be parsed
+        self.generator = generator
+        self.llms = create_tiered_llms(temperature=0.7)
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are a helpful and professional Customer Support Agent who also routes tickets.
+            For the user's inquiry:
+            1. Category - exactly one of: Billing, Technical, Feature, Bug
+            2. Sentiment - exactly one of: Positive, Neutral, Negative
+            3. Urgency - exactly one of: Low, Medium, High, Critical
+            4. Draft - a response based *strictly* on the provided context
+
+            Format your response as JSON:
+            {{
+                "category": "category_name",
+                "sentiment": "sentiment_name",
+                "urgency": "urgency_level",
+                "draft": "response text"
+            }}
+
+            Urgency Guidelines:
+            - Critical: Service down, security issue, business blocking
+            - High: Important feature broken, duplicate charges
+            - Medium: Standard bugs, feature requests
+            - Low: General questions, minor issues
+
+            Draft Guidelines:
+            - Tone: Friendly, empathetic, and professional.
+            - Format: Clear, concise paragraphs. Use bullet points if listing steps.
+            - If the context doesn't contain the answer, politely state that you will escalate the ticket.
+            - Include links to relevant documentation if available in the context.
+
+            Context:
+            {context}
+            """),
+            ("human", "User Query: {query}")
+        ])
+        self.chains = {tier: self.prompt | llm.bind(response_format={"type": "json_object"})
+                       for tier, llm in self.llms.items()}
+
+    async def run(self, state: TicketState) -> TicketState:
+        """Return category, sentiment, urgency and the draft response together."""
+        query = agent_query(state, "fused")
+        context = "\n".join(await context_text(state))
+
+        tier, reason = choose_tier("fused", state)
+        started = time.perf_counter()
+        response = await self.chains[tier].ainvoke({
+            "query": query,
+            "context": context
+        })
+        elapsed = time.perf_counter() - started
+        record_tier_call("fused", tier, record_llm_call("fused", response, elapsed), elapsed, reason)
+
+        try:
+            data = json.loads(response.content.strip())
+            draft = data.get("draft")
+        except (json.JSONDecodeError, AttributeError):
+            data, draft = {}, None
+
+        result = {**normalize_classification(data), **with_tier(state, "fused", tier)}
+        if not draft:
+            print("Warning: Could not parse fused response, drafting separately")
+            AGENT_ERRORS.inc(agent="fused", reason="json_parse")
+            # The separate draft goes to the strong tier when the fast one produced the bad response
+            escalation = {"model_escalation": "parse_failure"} if tier == FAST else {}
+            result.update(await self.generator.run({**state, **result, **escalation}))
+        else:
+            result["draft_response"] = draft
+
+        print(f"📊 Classification: {result['category']} | Sentiment: {result['sentiment']} | Urgency: {result['urgency']}")
+        set_attributes(category=result["category"], sentiment=result["sentiment"], urgency=result["urgency"],
+                       draft_chars=len(result["draft_response"]))
+        return result
@@ -1,10 +1,15 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from state.state_manager import TicketState
+from store.chunk_store import context_text
+from observability.instrumentation import record_llm_call
+from observability.tracing import set_attributes
+from agents.preprocessing import agent_query
+from agents.routing import choose_tier, create_tiered_llms, record_tier_call, with_tier
+import time
 
 class ResponseGenerator:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4-turbo", temperature=0.7)
+        self.llms = create_tiered_llms(temperature=0.7)
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a helpful and professional Customer Support Agent.
             Your goal is to draft a response to the user's inquiry based *strictly* on the provided context.
@@ -20,16 +25,21 @@ class ResponseGenerator:
             """),
             ("human", "User Query: {query}")
         ])
-        self.chain = self.prompt | self.llm
+        self.chains = {tier: self.prompt | llm for tier, llm in self.llms.items()}
 
     async def run(self, state: TicketState) -> TicketState:
         """Draft a response."""
-        query = state.get("customer_query", "")
-        context = "\n".join(state.get("retrieved_context", []))
+        query = agent_query(state, "generator")
+        context = "\n".join(await context_text(state))
         
-        response = await self.chain.ainvoke({
+        tier, reason = choose_tier("generator", state)
+        started = time.perf_counter()
+        response = await self.chains[tier].ainvoke({
             "query": query,
             "context": context
         })
+        elapsed = time.perf_counter() - started
+        record_tier_call("generator", tier, record_llm_call("generator", response, elapsed), elapsed, reason)
+        set_attributes(context_chunks=len(state.get("context_ids") or []), draft_chars=len(response.content))
         
-        return {"draft_response": response.content}
+        return {"draft_response": response.content, **with_tier(state, "generator", tier)}
@@ -0,0 +1,341 @@
+"""
+Long-ticket preprocessing and per-agent prompt budgets.
+
+Real tickets arrive with quoted email threads, signatures, pasted stack
+traces and HTTP logs. The graph's preprocess node runs prepare() on
+customer_query once and stores the result as prepared_query:
+
+    quoted replies   "> " lines, and everything below an "On ... wrote:" /
+                     "Am ... schrieb ...:" header naming a date or an address,
+                     an "-----Original Message-----" marker or an Outlook
+                     "From:" / "Sent:" header
+    signatures       everything below a "-- " delimiter, "Sent from my ..." lines,
+                     and a closing ("Best regards,", "Thanks,", "Viele Grüße", ...)
+                     followed only by a name block of 1-3 lines
+    stack frames     a run of more than 2 * PREPROCESS_KEEP_FRAMES frames keeps
+                     its first and last PREPROCESS_KEEP_FRAMES frames
+    repeated lines   lines are compared with timestamps, ids and numbers masked;
+                     each shape is kept PREPROCESS_REPEAT_KEEP times, unless the
+                     line carries an error code that hasn't been kept yet
+    long lines       cut to PREPROCESS_MAX_LINE_CHARS; error codes in the cut
+                     part are listed after the cut
+
+Quote, thread and signature removal only applies to tickets of at least
+PREPROCESS_MIN_TOKENS, and is skipped when it would leave nothing; on short
+tickets a false match would cost more than the few tokens it saves.
+customer_query stays the raw text for display and checkpoints; agents read
+agent_query(state, agent), the prepared text cut to the agent's token budget
+(PREPROCESS_TOKEN_BUDGETS, head and tail kept). Tokens are counted with
+store.chunking.get_tokenizer(), the same tokenizer (tiktoken or its regex
+fallback) the chunker sizes chunks with.
+"""
+
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Set, Tuple
+
+from observability.metrics import counter, histogram
+from store.chunking import get_tokenizer
+
+PREPROCESS_ENABLED = os.getenv("PREPROCESS_ENABLED", "true").lower() in ("1", "true", "yes")
+PREPROCESS_KEEP_FRAMES = int(os.getenv("PREPROCESS_KEEP_FRAMES", "3"))
+PREPROCESS_REPEAT_KEEP = int(os.getenv("PREPROCESS_REPEAT_KEEP", "2"))
+PREPROCESS_MAX_LINE_CHARS = int(os.getenv("PREPROCESS_MAX_LINE_CHARS", "400"))
+PREPROCESS_MIN_TOKENS = int(os.getenv("PREPROCESS_MIN_TOKENS", "300"))
+
+# Share of a budget that goes to the start of the text; the rest keeps its end
+BUDGET_HEAD_SHARE = 0.7
+# Shorter lines ("}", "Thanks") are structure, not log noise
+MIN_SHAPE_CHARS = 16
+# A closing is only a signature when a name block of at most this many short lines follows it
+MAX_NAME_LINES = 3
+MAX_NAME_LINE_CHARS = 60
+MAX_NAME_LINE_WORDS = 6
+
+DEFAULT_BUDGETS = {"classifier": 500, "retriever": 200, "generator": 1500, "fused": 1500, "validator": 1200}
+
+
+def _parse_budgets(spec: str) -> Dict[str, int]:
+    budgets = dict(DEFAULT_BUDGETS)
+    for item in spec.split(","):
+        agent, _, value = item.strip().partition("=")
+        if not agent:
+            continue
+        if not value.isdigit():
+            raise ValueError(f"Invalid token budget '{value}' for {agent} (expected a number of tokens)")
+        budgets[agent] = int(value)
+    return budgets
+
+
+PREPROCESS_TOKEN_BUDGETS = _parse_budgets(os.getenv("PREPROCESS_TOKEN_BUDGETS", ""))
+
+QUERY_TOKENS = histogram("support_query_tokens", "Ticket size in tokens before and after preprocessing.",
+                         ["stage"], buckets=(50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000))
+PREPROCESS_REMOVED = counter("support_preprocess_removed_total", "Lines removed or shortened by ticket preprocessing.",
+                             ["kind"])
+BUDGET_TRUNCATIONS = counter("support_query_budget_truncations_total", "Queries cut to an agent's token budget.",
+                             ["agent"])
+
+_QUOTE_RE = re.compile(r"^\s*>")
+_ORIGINAL_MESSAGE_RE = re.compile(r"^\s*-{3,}\s*(Original Message|Ursprüngliche Nachricht)\s*-{3,}\s*$",
+                                  re.IGNORECASE)
+_REPLY_HEADER_RE = re.compile(r"^\s*(On|Am)\s.{0,250}(wrote|schrieb)[^:]{0,80}:\s*$", re.IGNORECASE)
+_REPLY_START_RE = re.compile(r"^\s*(On|Am)\s", re.IGNORECASE)
+_REPLY_END_RE = re.compile(r"(wrote|schrieb)[^:]{0,80}:\s*$", re.IGNORECASE)
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(\.[\w-]+)+")
+_MONTHS = r"(Jan|Feb|M[aä]r|Apr|Ma[iy]|Jun|Jul|Aug|Sep|O[ck]t|Nov|De[cz])[a-z]*\.?"
+# "On iOS 17 ..." is not a reply header; "On Mon, Oct 19, 2026 at 9:02 AM ..." is
+_HEADER_DATE_RE = re.compile(rf"\b({_MONTHS}\s+\d{{1,2}}\b|\d{{1,2}}\.?\s+{_MONTHS}|\d{{1,2}}[./]\d{{1,2}}[./]\d{{2,4}}\b|"
+                             r"\d{4}-\d{2}-\d{2}\b|\b\d{1,2}:\d{2}\b)", re.IGNORECASE)
+_OUTLOOK_FROM_RE = re.compile(r"^\s*(From|Von):\s*\S")
+_OUTLOOK_FIELD_RE = re.compile(r"^\s*(Sent|Date|To|Subject|Gesendet|Datum|An|Betreff):", re.IGNORECASE)
+_SIG_DELIMITER_RE = re.compile(r"^--\s*$")
+_SENT_FROM_RE = re.compile(r"^\s*(Sent from my |Get Outlook for |Von meinem .* gesendet)", re.IGNORECASE)
+_CLOSING_RE = re.compile(r"^\s*((best|kind|warm|many)?\s*regards|thanks( a lot| again)?|thank you|cheers|sincerely|"
+                         r"best|mit freundlichen grüßen|viele grüße|beste grüße|liebe grüße|gruß|mfg)\s*[,.!]?\s*$",
+                         re.IGNORECASE)
+_CONTACT_RE = re.compile(r"[\w.+-]+@[\w-]+\.|https?://|www\.|^\s*(tel|phone|mobile|fax)?[:.]?\s*\+?[\d ()/-]{6,}$",
+                         re.IGNORECASE)
+_SENTENCE_END_RE = re.compile(r"[.!?…](\s|$)")
+
+_FRAME_RE = re.compile(r"^\s*(File \".+\", line \d+|at \S+\(.*\)\s*$|at .+:\d+(:\d+)?\)?\s*$|#\d+\s+0x[0-9a-fA-F]+)")
+_PYTHON_FRAME_RE = re.compile(r"^\s*File \".+\", line \d+")
+
+_ERROR_CODE_RE = re.compile(
+    r"\b[\w.$]*(?:Error|Exception)\b"            # ValueError, java.io.IOException
+    r"|\bE[A-Z]{4,}\b"                          # ECONNRESET, ETIMEDOUT
+    r"|\b[A-Z][A-Z0-9]*(?:_[A-Z0-9]+)+\b"       # ERR_CONNECTION_REFUSED
+    r"|\b[A-Z]{2,5}-\d{3,}\b"                   # ORA-00942
+    r"|HTTP/\d(?:\.\d)?\"?\s+[45]\d\d\b"        # access log status
+    r"|\b(?:status|code|errno)[=:\s]+\"?-?\d+")
+_MASKS = (
+    re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"),
+    re.compile(r"\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b"),
+    re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]{12,}\b"),
+    re.compile(r"\d+"),
+)
+
+
+def count_tokens(text: str) -> int:
+    return get_tokenizer().count(text)
+
+
+def _error_codes(line: str) -> List[str]:
+    return [match.group(0) for match in _ERROR_CODE_RE.finditer(line)]
+
+
+def _shape(line: str) -> str:
+    for mask in _MASKS:
+        line = mask.sub("#", line)
+    return " ".join(line.split())
+
+
+def _is_reply_header(text: str) -> bool:
+    """An "On <date>, <name> <address> wrote:" line; prose ending in "wrote:" names neither."""
+    return bool(_REPLY_HEADER_RE.match(text)) and bool(_EMAIL_RE.search(text) or _HEADER_DATE_RE.search(text))
+
+
+def _cut_thread(lines: List[str]) -> Tuple[List[str], int]:
+    """Drop a quoted email thread: everything below the first reply header."""
+    for i, line in enumerate(lines):
+        header = bool(_ORIGINAL_MESSAGE_RE.match(line)) or _is_reply_header(line)
+        # Mail clients wrap long "On <date>, <name> <address> wrote:" lines
+        if (not header and _REPLY_START_RE.match(line) and not _REPLY_END_RE.search(line)
+                and i + 1 < len(lines) and _REPLY_END_RE.search(lines[i + 1])):
+            header = _is_reply_header(f"{line.rstrip()} {lines[i + 1].strip()}")
+        if not header and _OUTLOOK_FROM_RE.match(line):
+            header = any(_OUTLOOK_FIELD_RE.match(following) for following in lines[i + 1:i + 4])
+        if header:
+            if not any(l.strip() for l in lines[:i]):
+                return lines, 0
+            return lines[:i], len(lines) - i
+    return lines, 0
+
+
+def _cut_signature(lines: List[str]) -> Tuple[List[str], int]:
+    """Drop a "-- " signature block, "Sent from my ..." lines and a trailing closing with its name block."""
+    total = len(lines)
+    for i, line in enumerate(lines):
+        if _SIG_DELIMITER_RE.match(line) and any(l.strip() for l in lines[:i]):
+            lines = lines[:i]
+            break
+    kept = [line for line in lines if not _SENT_FROM_RE.match(line)]
+    removed = total - len(kept)
+
+    content = [i for i, line in enumerate(kept) if line.strip()]
+    for position in range(len(content) - 2, max(-1, len(content) - 2 - MAX_NAME_LINES), -1):
+        i = content[position]
+        if _CLOSING_RE.match(kept[i]):
+            tail = [line for line in kept[i + 1:] if line.strip()]
+            if all(_is_name_line(line) for line in tail) and any(line.strip() for line in kept[:i]):
+                removed += len(kept) - i
+                kept = kept[:i]
+            break
+    return kept, removed
+
+
+def _is_name_line(line: str) -> bool:
+    """A line of a name block: a name, a title or contact details rather than a sentence."""
+    line = line.strip()
+    if len(line) > MAX_NAME_LINE_CHARS or _SENTENCE_END_RE.search(line):
+        return False
+    if _CONTACT_RE.search(line):
+        return True
+    words = re.findall(r"[^\W\d_]+", line)
+    if not words or len(words) > MAX_NAME_LINE_WORDS:
+        return False
+    # "Jane Doe", "Head of Operations, Example GmbH"; not "Also my card was charged twice"
+    return sum(word[0].isupper() for word in words) * 2 > len(words)
+
+
+def _collapse_frames(lines: List[str]) -> Tuple[List[str], int]:
+    """Keep the outermost and innermost frames of long stack traces."""
+    units: List[Tuple[bool, List[str]]] = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if _FRAME_RE.match(line):
+            unit = [line]
+            # A Python frame is followed by its (indented) source line
+            if (_PYTHON_FRAME_RE.match(line) and i + 1 < len(lines) and lines[i + 1].startswith((" ", "\t"))
+                    and not _FRAME_RE.match(lines[i + 1])):
+                unit.append(lines[i + 1])
+                i += 1
+            units.append((True, unit))
+        else:
+            units.append((False, [line]))
+        i += 1
+
+    result: List[str] = []
+    removed = 0
+    run: List[List[str]] = []
+
+    def flush():
+        nonlocal removed
+        if len(run) > 2 * PREPROCESS_KEEP_FRAMES:
+            omitted = run[PREPROCESS_KEEP_FRAMES:-PREPROCESS_KEEP_FRAMES]
+            indent = re.match(r"\s*", run[0][0]).group(0)
+            for unit in run[:PREPROCESS_KEEP_FRAMES]:
+                result.extend(unit)
+            result.append(f"{indent}... {len(omitted)} frames omitted ...")
+            for unit in run[-PREPROCESS_KEEP_FRAMES:]:
+                result.extend(unit)
+            removed += len(omitted)
+        else:
+            for unit in run:
+                result.extend(unit)
+        run.clear()
+
+    for is_frame, unit in units:
+        if is_frame:
+            run.append(unit)
+            continue
+        flush()
+        result.extend(unit)
+    flush()
+    return result, removed
+
+
+def _collapse_repeats(lines: List[str]) -> Tuple[List[str], int]:
+    """Drop lines whose shape was already kept PREPROCESS_REPEAT_KEEP times and add nothing new."""
+    seen: Counter = Counter()
+    codes: Set[str] = set()
+    result: List[str] = []
+    omitted = removed = 0
+    in_frame = False
+    for line in lines:
+        # Stack frames share a shape; _collapse_frames already decided which of them stay
+        frame = bool(_FRAME_RE.match(line)) or (in_frame and line.startswith((" ", "\t")))
+        in_frame = bool(_PYTHON_FRAME_RE.match(line))
+        if not line.strip():
+            # Blank runs collapse to one
+            if result and not result[-1].strip():
+                continue
+        elif not frame and len(line.strip()) >= MIN_SHAPE_CHARS:
+            shape = _shape(line)
+            new_codes = set(_error_codes(line)) - codes
+            if seen[shape] >= PREPROCESS_REPEAT_KEEP and not new_codes:
+                omitted += 1
+                continue
+            seen[shape] += 1
+            codes |= new_codes
+        if omitted:
+            result.append(f"[... {omitted} similar lines omitted ...]")
+            removed += omitted
+            omitted = 0
+        result.append(line)
+    if omitted:
+        result.append(f"[... {omitted} similar lines omitted ...]")
+        removed += omitted
+    return result, removed
+
+
+def _cut_long_lines(lines: List[str]) -> Tuple[List[str], int]:
+    result, cut = [], 0
+    for line in lines:
+        if len(line) <= PREPROCESS_MAX_LINE_CHARS:
+            result.append(line)
+            continue
+        head, rest = line[:PREPROCESS_MAX_LINE_CHARS], line[PREPROCESS_MAX_LINE_CHARS:]
+        codes = sorted(set(_error_codes(rest)) - set(_error_codes(head)))
+        note = f"; {', '.join(codes[:10])}" if codes else ""
+        result.append(f"{head} ... [{len(rest)} chars cut{note}]")
+        cut += 1
+    return result, cut
+
+
+def prepare(text: str) -> Tuple[str, Dict[str, Any]]:
+    """The ticket without quoted replies, signatures and log noise, plus what was removed."""
+    raw_tokens = count_tokens(text)
+    if not PREPROCESS_ENABLED or not text:
+        return text, {"raw_tokens": raw_tokens, "prepared_tokens": raw_tokens, "removed": {}}
+
+    lines = text.replace("\r\n", "\n").split("\n")
+    removed: Dict[str, int] = {}
+    if raw_tokens >= PREPROCESS_MIN_TOKENS:
+        unquoted = [line for line in lines if not _QUOTE_RE.match(line)]
+        if any(line.strip() and not _is_reply_header(line) for line in unquoted):
+            removed["quoted"] = len(lines) - len(unquoted)
+            lines = unquoted
+        lines, removed["thread"] = _cut_thread(lines)
+        lines, removed["signature"] = _cut_signature(lines)
+    lines, removed["stack_frames"] = _collapse_frames(lines)
+    lines, removed["repeated_lines"] = _collapse_repeats(lines)
+    lines, removed["long_lines"] = _cut_long_lines(lines)
+
+    prepared = "\n".join(lines).strip()
+    removed = {kind: count for kind, count in removed.items() if count}
+    for kind, count in removed.items():
+        PREPROCESS_REMOVED.inc(count, kind=kind)
+    prepared_tokens = count_tokens(prepared)
+    QUERY_TOKENS.observe(raw_tokens, stage="raw")
+    QUERY_TOKENS.observe(prepared_tokens, stage="prepared")
+    return prepared, {"raw_tokens": raw_tokens, "prepared_tokens": prepared_tokens, "removed": removed}
+
+
+def fit_budget(text: str, max_tokens: int) -> str:
+    """text cut to about max_tokens, keeping its start and end on line boundaries."""
+    tokenizer = get_tokenizer()
+    starts = tokenizer.offsets(text)
+    if len(starts) <= max_tokens:
+        return text
+    head_tokens = int(max_tokens * BUDGET_HEAD_SHARE)
+    head = text[:starts[head_tokens]]
+    tail = tokenizer.tail(text, max_tokens - head_tokens)
+    if "\n" in head:
+        head = head.rsplit("\n", 1)[0]
+    if "\n" in tail:
+        tail = tail.split("\n", 1)[1]
+    omitted = len(starts) - tokenizer.count(head) - tokenizer.count(tail)
+    return f"{head}\n[... ~{omitted} tokens omitted ...]\n{tail}"
+
+
+def agent_query(state: Dict[str, Any], agent: str) -> str:
+    """The query as an agent should see it: prepared text within the agent's token budget."""
+    query = state.get("prepared_query") or state.get("customer_query", "")
+    budget = PREPROCESS_TOKEN_BUDGETS.get(agent)
+    if budget is None or count_tokens(query) <= budget:
+        return query
+    BUDGET_TRUNCATIONS.inc(agent=agent)
+    return fit_budget(query, budget)
@@ -1,54 +1,34 @@
-from typing import List
+from typing import List, Optional
 import os
-import weaviate
-from weaviate.classes.init import Auth
 from weaviate.classes.query import MetadataQuery, Filter
 from weaviate.exceptions import WeaviateConnectionError
-from langchain_openai import OpenAIEmbeddings
 from state.state_manager import TicketState
+from cache.store import cache_key, get_cache
+from store import chunk_store
+from agents.preprocessing import agent_query
+from store.embeddings import query_vector
+from store.weaviate_client import connect_weaviate
+from store.index_versions import resolve_collection
+from store.retrieval_handles import load_candidates
+from observability.degradation import DEGRADED_RETRIEVAL_K, REDUCED_RETRIEVAL, controller as degradation
+from observability.metrics import RETRIEVAL_FALLBACKS
+from observability.tracing import set_attributes, span
 
 
 class RAGRetriever:
     """RAG Retriever using Weaviate v4 API for vector search."""
 
     def __init__(self):
-        self.weaviate_url = os.getenv("WEAVIATE_URL", "http://localhost:8080")
-        self.weaviate_key = os.getenv("WEAVIATE_API_KEY")
-        self.openai_key = os.getenv("OPENAI_API_KEY")
         self.client = None
         self.connected = False
-        self.embeddings = None
+        self.cache = get_cache("retrieval", ttl=float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "600")))
 
         self._connect()
 
     def _connect(self):
         """Attempt to connect to Weaviate with v4 API."""
-        # Parse URL for host and port
-        url_parts = self.weaviate_url.replace("http://", "").replace("https://", "")
-        if ":" in url_parts:
-            host, port_str = url_parts.split(":")
-            port = int(port_str)
-        else:
-            host = url_parts
-            port = 8080
-
         try:
-            # For local Docker deployment
-            if "localhost" in self.weaviate_url or "127.0.0.1" in self.weaviate_url:
-                self.client = weaviate.connect_to_local(
-                    host=host,
-                    port=port,
-                    headers={"X-OpenAI-Api-Key": self.openai_key} if self.openai_key else {}
-                )
-            else:
-                # For Weaviate Cloud
-                self.client = weaviate.connect_to_weaviate_cloud(
-                    cluster_url=self.weaviate_url,
-                    auth_credentials=Auth.api_key(self.weaviate_key) if self.weaviate_key else None,
-                    headers={"X-OpenAI-Api-Key": self.openai_key} if self.openai_key else {}
-                )
-
-            self.embeddings = OpenAIEmbeddings()
+            self.client = connect_weaviate()
             self.connected = self.client.is_ready()
             print(f"Weaviate connection: {'SUCCESS' if self.connected else 'FAILED'}")
 
@@ -81,39 +61,98 @@ class RAGRetriever:
         }
         return mock_kb.get(category, mock_kb["Technical"])
 
+    def _from_handle(self, handle: str, query: str, selected_sources: Optional[List[str]]) -> Optional[dict]:
+        """Reuse candidates found by /api/suggest-sources, filtered by the selected sources."""
+        candidates = load_candidates(handle, query)
+        if candidates is None:
+            return None
+        if selected_sources:
+            # A selected document the suggestion search never saw needs a fresh, filtered search
+            if not set(selected_sources) <= {c["document"] for c in candidates}:
+                return None
+            candidates = [c for c in candidates if c["document"] in selected_sources]
+        candidates = candidates[:5 if selected_sources else 3]
+        if not candidates:
+            return None
+
+        print(f"♻️  Reusing {len(candidates)} candidates from retrieval handle")
+        set_attributes(retrieval_handle=handle, chunk_count=len(candidates),
+                       relevance_scores=[c["relevance"] for c in candidates])
+        # Handles saved before chunk ids existed still carry the text
+        chunk_ids = [c.get("chunk_id") or chunk_store.put_text(c["content"]) for c in candidates]
+        return {
+            "context_ids": chunk_ids,
+            "rag_sources": [
+                {
+                    "chunk_id": chunk_id,
+                    "document": c["document"],
+                    "section": c["section"],
+                    "category": c["category"],
+                    "relevance": c["relevance"]
+                }
+                for chunk_id, c in zip(chunk_ids, candidates)
+            ],
+            "retrieval_fallback": None
+        }
+
     async def run(self, state: TicketState) -> TicketState:
         """Retrieve relevant context for the query with source metadata."""
-        query = state.get("customer_query", "")
-        category = state.get("category", "Technical")
+        query = agent_query(state, "retriever")
+        # None when retrieval runs before classification (fused pipeline mode)
+        category = state.get("category")
         selected_sources = state.get("selected_sources")
 
+        handle = state.get("retrieval_handle")
+        if handle:
+            # Handles are issued for the text as typed, not the preprocessed one
+            reused = self._from_handle(handle, state.get("customer_query", ""), selected_sources)
+            if reused is not None:
+                return reused
+
         if not self.connected or self.client is None:
             # Fallback to mock data
             print("Using mock data (Weaviate not connected)")
-            mock_docs = self._get_mock_data(category, query)
+            RETRIEVAL_FALLBACKS.inc(reason="not_connected")
+            set_attributes(fallback="not_connected")
+            mock_docs = self._get_mock_data(category or "Technical", query)
             return {
-                "retrieved_context": mock_docs,
+                "context_ids": [chunk_store.put_text(doc) for doc in mock_docs],
                 "rag_sources": [
                     {
                         "document": "Mock Knowledge Base",
                         "section": "General",
-                        "category": category,
+                        "category": category or "General",
                         "relevance": 0.85
                     }
-                ]
+                ],
+                "retrieval_fallback": "not_connected"
             }
 
+        limit = 5 if selected_sources else 3  # Get more results if filtering
+        if (state.get("degradation_level") or 0) >= REDUCED_RETRIEVAL:
+            # Under load: fewer chunks to fetch, and a shorter prompt for every later agent
+            limit = min(limit, DEGRADED_RETRIEVAL_K + (2 if selected_sources else 0))
+
+        # Keyed by index version too, so a re-index swap doesn't keep serving old chunks
+        collection_name = resolve_collection(self.client)
+        key = cache_key(collection_name, query, category, sorted(selected_sources or []), limit)
+        cached = self.cache.get(key)
+        if cached is not None:
+            set_attributes(cache_hit=True, chunk_count=len(cached["context_ids"]))
+            return cached
+
         try:
             # Perform actual vector search with Weaviate v4 API
-            support_docs = self.client.collections.get("SupportDocs")
+            support_docs = self.client.collections.get(collection_name)
+            set_attributes(collection=collection_name)
 
             # Enhanced query with category
-            search_query = f"{category}: {query}"
+            search_query = f"{category}: {query}" if category else query
 
             # Build query with optional filter for selected sources
             query_params = {
                 "query": search_query,
-                "limit": 5 if selected_sources else 3,  # Get more results if filtering
+                "limit": limit,
                 "return_metadata": MetadataQuery(distance=True, certainty=True)
             }
 
@@ -128,33 +167,47 @@ class RAGRetriever:
                     filters = [Filter.by_property("document").equal(source) for source in selected_sources]
                     query_params["filters"] = Filter.any_of(filters)
 
-            response = support_docs.query.near_text(**query_params)
+            with span("weaviate:near_text", query=search_query, limit=query_params["limit"],
+                      source_filter=selected_sources or []):
+                # Indexes built by a local provider are searched with our own query vector
+                vector = query_vector(self.client, support_docs, search_query)
+                if vector is None:
+                    response = support_docs.query.near_text(**query_params)
+                else:
+                    set_attributes(search="near_vector")
+                    query_params["near_vector"] = vector
+                    del query_params["query"]
+                    response = support_docs.query.near_vector(**query_params)
 
             if not response.objects:
                 # No results found, use mock data
                 print("No documents found in Weaviate, using mock data")
-                mock_docs = self._get_mock_data(category, query)
+                RETRIEVAL_FALLBACKS.inc(reason="no_results")
+                set_attributes(fallback="no_results")
+                mock_docs = self._get_mock_data(category or "Technical", query)
                 return {
-                    "retrieved_context": mock_docs,
+                    "context_ids": [chunk_store.put_text(doc) for doc in mock_docs],
                     "rag_sources": [
                         {
                             "document": "Mock Knowledge Base",
                             "section": "General",
-                            "category": category,
+                            "category": category or "General",
                             "relevance": 0.85
                         }
-                    ]
+                    ],
+                    "retrieval_fallback": "no_results"
                 }
 
-            # Extract content and metadata
-            docs = []
+            # The text goes to the shared chunk store; the state only keeps references
+            chunk_ids = []
             sources = []
 
             for obj in response.objects:
                 props = obj.properties
                 meta = obj.metadata
 
-                docs.append(props.get("content", ""))
+                chunk_id = chunk_store.put(chunk_store.object_chunk_id(collection_name, obj.uuid), props.get("content", ""))
+                chunk_ids.append(chunk_id)
 
                 # Calculate relevance score (1 - distance, or use certainty if available)
                 relevance = 0.0
@@ -167,32 +220,40 @@ class RAGRetriever:
                     relevance = 0.75  # Default fallback
 
                 sources.append({
+                    "chunk_id": chunk_id,
                     "document": props.get("document", "Unknown"),
                     "section": props.get("section", "Unknown"),
-                    "category": props.get("category", category),
-                    "relevance": round(float(relevance), 3),
-                    "content_preview": props.get("content", "")[:150] + "..."
+                    "category": props.get("category", category or "General"),
+                    "relevance": round(float(relevance), 3)
                 })
 
-            print(f"✅ Retrieved {len(docs)} documents from Weaviate with sources")
-            return {
-                "retrieved_context": docs,
-                "rag_sources": sources
+            print(f"✅ Retrieved {len(chunk_ids)} documents from Weaviate with sources")
+            set_attributes(chunk_count=len(chunk_ids), relevance_scores=[source["relevance"] for source in sources])
+            result = {
+                "context_ids": chunk_ids,
+                "rag_sources": sources,
+                "retrieval_fallback": None
             }
+            self.cache.set(key, result)
+            return result
 
         except Exception as e:
             print(f"Weaviate query error: {e}")
-            mock_docs = self._get_mock_data(category, query)
+            RETRIEVAL_FALLBACKS.inc(reason="error")
+            degradation.observe_agent_error()
+            set_attributes(fallback="error", error=str(e))
+            mock_docs = self._get_mock_data(category or "Technical", query)
             return {
-                "retrieved_context": mock_docs,
+                "context_ids": [chunk_store.put_text(doc) for doc in mock_docs],
                 "rag_sources": [
                     {
                         "document": "Mock Knowledge Base (Error Fallback)",
                         "section": "General",
-                        "category": category,
+                        "category": category or "General",
                         "relevance": 0.80
                     }
-                ]
+                ],
+                "retrieval_fallback": "error"
             }
 
     def __del__(self):
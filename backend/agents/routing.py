@@ -0,0 +1,143 @@
+"""
+Model cascade routing between a fast and a strong LLM tier.
+
+Each agent asks which tier to call. Under the "cascade" policy an agent
+starts on the fast tier and moves to the strong one when a signal fires:
+high urgency or a long (preprocessed) query before the call, an unparseable classifier
+response, or a low validator score after the draft. The tiers are configured
+through the environment:
+
+    LLM_FAST_MODEL / LLM_STRONG_MODEL          model names
+    LLM_FAST_BASE_URL / LLM_STRONG_BASE_URL    optional endpoints (e.g. local fakes)
+    LLM_FAST_API_KEY / LLM_STRONG_API_KEY      optional keys (default OPENAI_API_KEY)
+    LLM_FAST_COST_PER_1K / LLM_STRONG_COST_PER_1K   USD per 1k tokens, for cost metrics
+    LLM_ROUTING_POLICY   per-agent policy, e.g. "classifier=cascade,validator=strong"
+
+Routing is off until LLM_FAST_MODEL is set, so every agent keeps using the
+strong model by default.
+
+Under heavy load (observability.degradation level cheap_generator and up)
+the drafting agents always use the fast tier and are never redrafted.
+"""
+
+import os
+from typing import Dict, Optional, Tuple
+
+from langchain_openai import ChatOpenAI
+
+from observability.degradation import CHEAP_GENERATOR
+from observability.metrics import counter, histogram
+from observability.tracing import set_attributes
+
+FAST, STRONG = "fast", "strong"
+POLICIES = ("cascade", FAST, STRONG)
+
+STRONG_MODEL = os.getenv("LLM_STRONG_MODEL", "gpt-4-turbo")
+FAST_MODEL = os.getenv("LLM_FAST_MODEL") or STRONG_MODEL
+
+# Signals that send a cascading agent straight to the strong tier
+ESCALATE_URGENCIES = ("High", "Critical")
+LONG_INPUT_CHARS = int(os.getenv("LLM_LONG_INPUT_CHARS", "2000"))
+# Validator scores below this send a fast-tier draft back for a strong-tier rewrite
+MIN_FAST_DRAFT_SCORE = float(os.getenv("LLM_MIN_FAST_DRAFT_SCORE", "0.7"))
+
+DRAFTING_AGENTS = ("generator", "fused")
+
+DEFAULT_POLICY = {"classifier": "cascade", "generator": "cascade", "fused": "cascade", "validator": "cascade"}
+
+TIER_CALLS = counter("support_llm_tier_calls_total", "LLM calls per agent and model tier.", ["agent", "tier"])
+TIER_LATENCY = histogram("support_llm_tier_latency_seconds", "Latency of LLM calls per agent and model tier.", ["agent", "tier"])
+TIER_COST = counter("support_llm_tier_cost_usd_total", "Estimated LLM spend per agent and model tier.", ["agent", "tier"])
+MODEL_ESCALATIONS = counter("support_llm_escalations_total", "Moves from the fast to the strong tier.", ["agent", "reason"])
+
+
+def _parse_policy(spec: str) -> Dict[str, str]:
+    policy = dict(DEFAULT_POLICY)
+    for item in spec.split(","):
+        agent, _, value = item.strip().partition("=")
+        if not agent:
+            continue
+        if value not in POLICIES:
+            raise ValueError(f"Unknown routing policy '{value}' for {agent} (expected one of {POLICIES})")
+        policy[agent] = value
+    return policy
+
+
+ROUTING_POLICY = _parse_policy(os.getenv("LLM_ROUTING_POLICY", ""))
+
+
+def routing_enabled() -> bool:
+    """Whether the fast tier differs from the strong one."""
+    return FAST_MODEL != STRONG_MODEL or os.getenv("LLM_FAST_BASE_URL") not in (None, os.getenv("LLM_STRONG_BASE_URL"))
+
+
+def _tier_setting(tier: str, name: str) -> Optional[str]:
+    return os.getenv(f"LLM_{tier.upper()}_{name}")
+
+
+def create_tiered_llms(**kwargs) -> Dict[str, ChatOpenAI]:
+    """One chat model per tier; kwargs (temperature etc.) apply to both."""
+    llms = {}
+    for tier, model in ((FAST, FAST_MODEL), (STRONG, STRONG_MODEL)):
+        options = {"model": model, "include_response_headers": True, **kwargs}
+        if _tier_setting(tier, "BASE_URL"):
+            options["base_url"] = _tier_setting(tier, "BASE_URL")
+        if _tier_setting(tier, "API_KEY"):
+            options["api_key"] = _tier_setting(tier, "API_KEY")
+        llms[tier] = ChatOpenAI(**options)
+    if not routing_enabled():
+        llms[FAST] = llms[STRONG]
+    return llms
+
+
+def choose_tier(agent: str, state: dict) -> Tuple[str, Optional[str]]:
+    """Pick the tier for an agent's call; returns (tier, escalation reason or None)."""
+    if not routing_enabled():
+        return STRONG, None
+    if agent in DRAFTING_AGENTS and (state.get("degradation_level") or 0) >= CHEAP_GENERATOR:
+        # Under heavy load drafts go to the fast tier, whatever the policy or escalation signals
+        return FAST, None
+    policy = ROUTING_POLICY.get(agent, "cascade")
+    if policy != "cascade":
+        return policy, None
+    if state.get("model_escalation"):
+        return STRONG, state["model_escalation"]
+    if state.get("urgency") in ESCALATE_URGENCIES:
+        return STRONG, "urgency"
+    if len(state.get("prepared_query") or state.get("customer_query") or "") > LONG_INPUT_CHARS:
+        return STRONG, "long_input"
+    return FAST, None
+
+
+def record_tier_call(agent: str, tier: str, usage: Dict[str, int], elapsed: float, reason: Optional[str] = None):
+    """Count one call against its tier, with its estimated cost and any escalation reason."""
+    TIER_CALLS.inc(agent=agent, tier=tier)
+    TIER_LATENCY.observe(elapsed, agent=agent, tier=tier)
+    cost_per_1k = float(_tier_setting(tier, "COST_PER_1K") or 0.0)
+    if cost_per_1k:
+        TIER_COST.inc((usage["prompt_tokens"] + usage["completion_tokens"]) / 1000 * cost_per_1k, agent=agent, tier=tier)
+    set_attributes(model_tier=tier)
+    if reason:
+        MODEL_ESCALATIONS.inc(agent=agent, reason=reason)
+        set_attributes(model_escalation=reason)
+
+
+def with_tier(state: dict, agent: str, tier: str) -> Dict[str, Dict[str, str]]:
+    """State update recording which tier an agent used."""
+    return {"model_tiers": {**(state.get("model_tiers") or {}), agent: tier}}
+
+
+def needs_strong_redraft(state: dict) -> bool:
+    """A fast-tier draft scored too low and should be rewritten on the strong tier.
+
+    A failed validation scores 0.0 without judging the draft, so it never triggers a redraft.
+    """
+    if not routing_enabled() or state.get("model_escalation") or state.get("validation_failed"):
+        return False
+    if (state.get("degradation_level") or 0) >= CHEAP_GENERATOR:
+        return False
+    tiers = state.get("model_tiers") or {}
+    drafted_by = "fused" if "fused" in tiers else "generator"
+    if tiers.get(drafted_by) != FAST or ROUTING_POLICY.get(drafted_by, "cascade") != "cascade":
+        return False
+    return state.get("confidence_score", 0.0) < MIN_FAST_DRAFT_SCORE
@@ -1,8 +1,15 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 from state.state_manager import TicketState
+from store.chunk_store import context_text
+from observability.instrumentation import record_llm_call
+from observability.degradation import controller as degradation
+from observability.metrics import AGENT_ERRORS
+from observability.tracing import set_attributes
+from agents.preprocessing import agent_query
+from agents.routing import choose_tier, create_tiered_llms, record_tier_call, with_tier
+import time
 
 class ValidationOutput(BaseModel):
     confidence_score: float = Field(description="A score between 0.0 and 1.0 indicating confidence in the answer's accuracy.")
@@ -11,7 +18,7 @@ class ValidationOutput(BaseModel):
 
 class QualityValidator:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4-turbo", temperature=0)
+        self.llms = create_tiered_llms(temperature=0)
         self.parser = JsonOutputParser(pydantic_object=ValidationOutput)
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a Quality Assurance Specialist for Customer Support.
@@ -31,30 +38,42 @@ class QualityValidator:
             {format_instructions}""")
         ]).partial(format_instructions=self.parser.get_format_instructions())
         
-        self.chain = self.prompt | self.llm | self.parser
+        # The parser runs separately so the raw LLM message (and its token usage) is observable
+        self.chains = {tier: self.prompt | llm for tier, llm in self.llms.items()}
 
     async def run(self, state: TicketState) -> TicketState:
         """Validate the draft response."""
-        query = state.get("customer_query", "")
-        context = "\n".join(state.get("retrieved_context", []))
+        query = agent_query(state, "validator")
+        context = "\n".join(await context_text(state))
         draft = state.get("draft_response", "")
         
+        tier, reason = choose_tier("validator", state)
         try:
-            result = await self.chain.ainvoke({
+            started = time.perf_counter()
+            response = await self.chains[tier].ainvoke({
                 "query": query,
                 "context": context,
                 "draft": draft
             })
+            elapsed = time.perf_counter() - started
+            record_tier_call("validator", tier, record_llm_call("validator", response, elapsed), elapsed, reason)
+            result = self.parser.parse(response.content)
+            set_attributes(confidence_score=result["confidence_score"], needs_human_review=result["needs_human_review"])
             return {
                 "confidence_score": result["confidence_score"],
                 "needs_human_review": result["needs_human_review"],
-                "critique": result["critique"]
+                "critique": result["critique"],
+                "validation_failed": False,
+                **with_tier(state, "validator", tier)
             }
         except Exception as e:
             # Fallback on error -> Human Loop
             print(f"Validation Error: {e}")
+            AGENT_ERRORS.inc(agent="validator", reason=type(e).__name__)
+            degradation.observe_agent_error()
             return {
                 "confidence_score": 0.0,
                 "needs_human_review": True,
-                "critique": "Validation failed, requiring manual review."
+                "critique": "Validation failed, requiring manual review.",
+                "validation_failed": True
             }
@@ -0,0 +1,285 @@
+"""
+Asynchronous ticket jobs for clients that can't hold a connection open.
+
+POST /api/tickets stores the request as a queued job and returns its id right
+away. A fixed pool of worker tasks runs the graph for queued jobs, so the
+pipeline's concurrency is set by JOB_WORKERS rather than by how many clients
+are connected or retrying. GET /api/tickets/{id} returns the job's status and
+result, either immediately or after waiting until it finishes (long-poll or
+SSE).
+
+Jobs live in a SQLite file (JOBS_DB_PATH) so results survive restarts and can
+be read by any worker process on the host. Rows expire after JOB_TTL_SECONDS
+and are cleaned up by the pool. A client-supplied idempotency key maps a
+retried submission to the job it already created.
+
+A job interrupted by a shutdown goes back to the queue and runs again on the
+next start. Jobs still running after JOB_TIMEOUT_SECONDS, whose worker process
+must have died, are failed by the cleanup loop of any live pool.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from observability.degradation import controller as degradation
+from observability.metrics import counter, gauge, histogram
+
+QUEUED, RUNNING, COMPLETED, FAILED = "queued", "running", "completed", "failed"
+TERMINAL = (COMPLETED, FAILED)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "1000"))
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "86400"))
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "120"))
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "jobs.sqlite")
+CLEANUP_INTERVAL_SECONDS = 60.0
+
+JOBS = counter("support_jobs_total", "Ticket jobs by final status.", ["status"])
+JOB_QUEUE_DEPTH = gauge("support_job_queue_depth", "Ticket jobs waiting for a worker.")
+JOBS_RUNNING = gauge("support_jobs_running", "Ticket jobs currently being processed.")
+JOB_WAIT = histogram("support_job_wait_seconds", "Time ticket jobs spend queued before a worker picks them up.")
+JOB_DURATION = histogram("support_job_duration_seconds", "Time workers spend running ticket jobs.", ["status"])
+
+JobRunner = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class QueueFull(Exception):
+    """Raised when a job can't be accepted because the queue is at JOB_QUEUE_MAX."""
+
+
+class JobStore:
+    """Ticket jobs in a WAL-mode SQLite file shared by every worker process."""
+
+    def __init__(self, path: str = JOBS_DB_PATH, ttl: float = JOB_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " idempotency_key TEXT UNIQUE,"
+            " status TEXT NOT NULL,"
+            " request TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL,"
+            " expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_expires ON jobs (expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def create(self, request: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Insert a queued job, or return the live job already created under idempotency_key."""
+        now = time.time()
+        if idempotency_key:
+            existing = self._conn().execute(
+                "SELECT * FROM jobs WHERE idempotency_key = ? AND expires_at >= ?", (idempotency_key, now)
+            ).fetchone()
+            if existing is not None:
+                return {**self._to_dict(existing), "duplicate": True}
+            # An expired row would still hold the unique key
+            self._conn().execute("DELETE FROM jobs WHERE idempotency_key = ?", (idempotency_key,))
+        job_id = uuid.uuid4().hex
+        self._conn().execute(
+            "INSERT INTO jobs (id, idempotency_key, status, request, created_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, idempotency_key, QUEUED, json.dumps(request), now, now + self.ttl),
+        )
+        return self.get(job_id)
+
+    def claim(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically move a queued job to running and return it with its request;
+        None if another worker got it first."""
+        cursor = self._conn().execute(
+            "UPDATE jobs SET status = ?, started_at = ? WHERE id = ? AND status = ?",
+            (RUNNING, time.time(), job_id, QUEUED),
+        )
+        if not cursor.rowcount:
+            return None
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return {**self._to_dict(row), "request": json.loads(row["request"])}
+
+    def finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        now = time.time()
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, expires_at = ? WHERE id = ?",
+            (FAILED if error else COMPLETED, json.dumps(result) if result is not None else None, error,
+             now, now + self.ttl, job_id),
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT * FROM jobs WHERE id = ? AND expires_at >= ?", (job_id, time.time())
+        ).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def queued_ids(self) -> List[str]:
+        rows = self._conn().execute("SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)).fetchall()
+        return [row["id"] for row in rows]
+
+    def requeue(self, job_id: str) -> bool:
+        """Put a running job back in the queue (its run was interrupted, not failed)."""
+        cursor = self._conn().execute(
+            "UPDATE jobs SET status = ?, started_at = NULL WHERE id = ? AND status = ?", (QUEUED, job_id, RUNNING),
+        )
+        return bool(cursor.rowcount)
+
+    def fail_stale(self, older_than: float) -> int:
+        """Fail running jobs whose worker must have died (started before older_than)."""
+        cursor = self._conn().execute(
+            "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ? AND started_at < ?",
+            (FAILED, "Interrupted before completion", time.time(), RUNNING, older_than),
+        )
+        return cursor.rowcount
+
+    def cleanup(self) -> int:
+        """Delete expired jobs; returns how many were removed."""
+        return self._conn().execute("DELETE FROM jobs WHERE expires_at < ?", (time.time(),)).rowcount
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = {
+            "id": row["id"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "expires_at": row["expires_at"],
+        }
+        if row["result"] is not None:
+            job["result"] = json.loads(row["result"])
+        if row["error"] is not None:
+            job["error"] = row["error"]
+        return job
+
+
+class JobPool:
+    """Bounded asyncio worker pool that runs queued jobs through a runner."""
+
+    def __init__(self, workers: int = JOB_WORKERS, max_queue: int = JOB_QUEUE_MAX):
+        self.store: Optional[JobStore] = None
+        self.workers = workers
+        self.max_queue = max_queue
+        self.runner: Optional[JobRunner] = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._done: Dict[str, asyncio.Event] = {}
+
+    def start(self, runner: JobRunner, store: Optional[JobStore] = None):
+        """Open the store and start the workers; jobs left queued by a previous process are picked up again."""
+        self.runner = runner
+        self.store = store or JobStore()
+        self._queue = asyncio.Queue()
+        failed = self.store.fail_stale(time.time() - JOB_TIMEOUT_SECONDS)
+        if failed:
+            print(f"Warning: Marked {failed} interrupted ticket jobs as failed")
+        for job_id in self.store.queued_ids():
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._cleanup()))
+        JOB_QUEUE_DEPTH.set(self._queue.qsize())
+        degradation.set_queue_depth(self._queue.qsize())
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, request: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Queue a job (or return the existing one for a repeated idempotency key)."""
+        if self._queue.qsize() >= self.max_queue:
+            raise QueueFull(f"{self._queue.qsize()} ticket jobs already queued")
+        job = self.store.create(request, idempotency_key)
+        if not job.pop("duplicate", False):
+            self._queue.put_nowait(job["id"])
+            JOB_QUEUE_DEPTH.set(self._queue.qsize())
+            degradation.set_queue_depth(self._queue.qsize())
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Return the job once it has finished or timeout seconds have passed."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.store.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in TERMINAL:
+                self._done.pop(job_id, None)
+                return job
+            if remaining <= 0:
+                return job
+            event = self._done.setdefault(job_id, asyncio.Event())
+            try:
+                # Jobs run by another process have no local event, so re-check periodically
+                await asyncio.wait_for(event.wait(), min(remaining, 0.5))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            JOB_QUEUE_DEPTH.set(self._queue.qsize())
+            degradation.set_queue_depth(self._queue.qsize())
+            try:
+                job = self.store.claim(job_id)
+                if job is not None:
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Dict[str, Any]):
+        JOB_WAIT.observe(job["started_at"] - job["created_at"])
+        JOBS_RUNNING.inc()
+        started = time.perf_counter()
+        status = COMPLETED
+        try:
+            result = await asyncio.wait_for(self.runner(job["request"]), JOB_TIMEOUT_SECONDS)
+            self.store.finish(job["id"], result=result)
+        except asyncio.CancelledError:
+            # Shutting down: the next start picks the job up again
+            self.store.requeue(job["id"])
+            raise
+        except Exception as e:
+            status = FAILED
+            detail = getattr(e, "detail", None) or str(e) or type(e).__name__
+            print(f"Ticket job {job['id']} failed: {detail}")
+            self.store.finish(job["id"], error=detail)
+        finally:
+            JOBS_RUNNING.dec()
+        JOBS.inc(status=status)
+        JOB_DURATION.observe(time.perf_counter() - started, status=status)
+        event = self._done.pop(job["id"], None)
+        if event is not None:
+            event.set()
+
+    async def _cleanup(self):
+        while True:
+            await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
+            removed = self.store.cleanup()
+            if removed:
+                print(f"🧹 Removed {removed} expired ticket jobs")
+            failed = self.store.fail_stale(time.time() - JOB_TIMEOUT_SECONDS)
+            if failed:
+                print(f"Warning: Marked {failed} interrupted ticket jobs as failed")
+
+
+# Started by the API lifespan with the copilot runner
+job_pool = JobPool()
@@ -1,8 +1,14 @@
+import time
+
+# Measured first so cold-start reports include this module's own import cost
+_IMPORT_STARTED = time.perf_counter()
+
 import os
 import sys
 import json
 import asyncio
-from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, Literal
 
 # Add backend directory to path for imports if running as a script
 if __name__ == "__main__" or "uvicorn" in sys.argv[0]:
@@ -11,18 +17,43 @@ if __name__ == "__main__" or "uvicorn" in sys.argv[0]:
         sys.path.insert(0, backend_dir)
 
 from dotenv import load_dotenv
-import weaviate
-from weaviate.classes.query import MetadataQuery
 
 load_dotenv()
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Header, HTTPException, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse, FileResponse
 from pydantic import BaseModel
-from graph import create_support_graph
-
-app = FastAPI(title="RAG Support Agent API")
+from api.runtime import runtime, warmup_enabled
+from api import suggestions
+from api.validation import get_validation, start_background_validation
+from api.jobs import TERMINAL, QueueFull, job_pool
+from api.websocket import TicketMultiplexer
+from store.weaviate_client import connect_weaviate
+from store.index_versions import active_collection
+from store.chunk_store import awith_previews
+from observability.degradation import controller as degradation, describe as describe_degradation
+from observability.instrumentation import start_request_timings, summarize_timings
+from observability.metrics import REQUEST_LATENCY, REQUEST_ERRORS, render_metrics
+from observability.tracing import start_trace
+from observability.profiling import profile_path, profile_run, profile_text, profiling_enabled, sample_stacks
+
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the pipeline in the background so the worker starts serving immediately."""
+    runtime.startup_ms["module_import"] = _IMPORT_MS
+    init_task = asyncio.create_task(runtime.initialize(warmup=warmup_enabled()))
+    job_pool.start(run_ticket_job)
+    yield
+    await job_pool.stop()
+    suggestions.close()
+    init_task.cancel()
+    await runtime.shutdown()
+
+
+app = FastAPI(title="RAG Support Agent API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,8 +63,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create the LangGraph pipeline
-graph = create_support_graph()
 
 
 class Message(BaseModel):
@@ -51,6 +80,14 @@ class ChatRequest(BaseModel):
     tools: Optional[List[Dict]] = None
     tool_choice: Optional[str] = "auto"
     selected_sources: Optional[List[str]] = None  # Optional list of document names to filter RAG retrieval
+    ticket_id: Optional[str] = None  # Scopes conversation state to a ticket; omit for stateless one-off requests
+    async_validation: Optional[bool] = False  # Non-streaming only: return the draft now, fetch the verdict from /api/validations/{id}
+    retrieval_handle: Optional[str] = None  # From /api/suggest-sources; reuses its search results for the same query
+    session_id: Optional[str] = None  # /api/suggest-sources only: as-you-type mode, supersedes the session's previous request
+    pipeline_mode: Optional[Literal["staged", "fused"]] = None  # Overrides PIPELINE_MODE for this request
+    # Follow-up on a ticket_id thread: "regenerate" reruns only generate/validate, "change_sources"
+    # reruns from retrieve keeping the category. Falls back to a full run if the thread can't be resumed.
+    action: Optional[Literal["regenerate", "change_sources"]] = None
 
 
 @app.get("/")
@@ -58,8 +95,63 @@ async def root():
     return {"status": "ok", "message": "RAG Support Agent API is running"}
 
 
-async def generate_stream_response(messages: List[Message], selected_sources: Optional[List[str]] = None):
-    """Generate streaming response using the LangGraph pipeline."""
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving HTTP."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: the pipeline is built (and warmed up, if enabled)."""
+    status = runtime.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Expose pipeline metrics in Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+STREAM_CHUNK_SIZE = 64
+
+
+async def _stream_graph_updates(run_graph, graph_input: Optional[Dict[str, Any]], config: Dict[str, Any], updates: asyncio.Queue):
+    """Run (or, with graph_input None, resume) the graph and forward each node's update to the queue."""
+    try:
+        async for update in run_graph.astream(graph_input, config, stream_mode="updates"):
+            await updates.put(("update", update))
+        await updates.put(("done", None))
+    except Exception as e:
+        await updates.put(("error", e))
+
+
+def _delta(content: str) -> Dict[str, Any]:
+    return {'choices': [{'delta': {'content': content}, 'index': 0}]}
+
+
+def _run_summary(config: Dict[str, Any], resumed_from: Optional[str], timings: Optional[Dict[str, Any]],
+                 checkpoint_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """Which thread a run used, where it resumed, which nodes actually executed and the size of its latest checkpoint."""
+    return {
+        "thread_id": config.get("configurable", {}).get("thread_id"),
+        "resumed_from": resumed_from,
+        "executed_nodes": list(timings["nodes"]) if timings else [],
+        "latest_checkpoint_bytes": checkpoint_bytes,
+    }
+
+
+async def pipeline_events(messages: List[Message], selected_sources: Optional[List[str]] = None,
+                          ticket_id: Optional[str] = None, retrieval_handle: Optional[str] = None,
+                          pipeline_mode: Optional[str] = None, action: Optional[str] = None,
+                          endpoint: str = "copilot_stream"):
+    """Run the LangGraph pipeline for one ticket and yield (event, data) pairs as it progresses.
+
+    event is None for chat-completion deltas, or "validation"/"revision"/"run" for
+    the structured events; the last pair is (None, "[DONE]"). The SSE endpoint and
+    the WebSocket multiplexer both serialize these.
+    """
 
     # Extract the last user message as the customer query
     customer_query = ""
@@ -70,72 +162,142 @@ async def generate_stream_response(messages: List[Message], selected_sources: Op
 
     if not customer_query:
         # Yield error message
-        yield f"data: {json.dumps({'choices': [{'delta': {'content': 'No user message found.'}, 'index': 0}]})}\n\n"
-        yield "data: [DONE]\n\n"
+        yield None, _delta('No user message found.')
+        yield None, "[DONE]"
         return
 
     try:
         # Run the LangGraph pipeline
         initial_state = {
-            "ticket_id": "runtime",
+            "ticket_id": ticket_id or "runtime",
             "customer_query": customer_query,
+            "prepared_query": None,
+            "preprocessing": None,
             "selected_sources": selected_sources,
+            "retrieval_handle": retrieval_handle,
+            "pipeline_mode": pipeline_mode,
             "messages": [],
             "category": None,
-            "retrieved_context": [],
+            "context_ids": [],
             "draft_response": None,
             "confidence_score": 0.0,
             "critique": None,
             "needs_human_review": True,
+            "retrieval_fallback": None,
+            "early_exit": None,
+            "faq_match": None,
+            "defer_validation": False,
+            "model_tiers": None,
+            "model_escalation": None,
+            "degradation_level": degradation.level(),
         }
 
-        config = {"configurable": {"thread_id": "chat-thread"}}
+        run_graph, config, graph_input, resumed_from = await runtime.plan_run(ticket_id, initial_state, action)
+        started = time.perf_counter()
+        timings = start_request_timings()
 
         # Yield a "thinking" message
-        yield f"data: {json.dumps({'choices': [{'delta': {'content': 'Analyzing your request...'}, 'index': 0}]})}\n\n"
-        await asyncio.sleep(0.1)
+        yield None, _delta('Analyzing your request...')
+
+        with start_trace(endpoint, query_chars=len(customer_query), selected_sources=selected_sources or []), \
+                degradation.track_run():
+            # The graph runs in its own task so validation keeps going while the draft is being sent
+            updates: asyncio.Queue = asyncio.Queue()
+            graph_task = asyncio.create_task(_stream_graph_updates(run_graph, graph_input, config, updates))
+            verdict: Dict[str, Any] = {}
+            draft_sent = False
+            try:
+                while True:
+                    kind, payload = await updates.get()
+                    if kind == "error":
+                        raise payload
+                    if kind == "done":
+                        break
+                    for node, update in payload.items():
+                        update = update or {}
+                        if node in ("generate", "classify_and_draft", "escalate", "match_faq", "template_answer") and update.get("draft_response") is not None:
+                            if draft_sent:
+                                # A strong-tier rewrite of a low-scoring draft replaces the one already sent
+                                yield "revision", {'draft_response': update['draft_response']}
+                                continue
+                            # Deliver the draft as soon as it exists
+                            draft_sent = True
+                            response_text = f"\n\n---\n\n{update['draft_response']}\n\n---\n"
+                            for i in range(0, len(response_text), STREAM_CHUNK_SIZE):
+                                chunk = response_text[i:i + STREAM_CHUNK_SIZE]
+                                yield None, _delta(chunk)
+                        if node in ("validate", "escalate", "match_faq", "template_answer"):
+                            verdict.update({k: update[k] for k in ("confidence_score", "needs_human_review", "critique") if k in update})
+                        for key in ("early_exit", "faq_match", "preprocessing"):
+                            if key in update:
+                                verdict[key] = update[key]
+            finally:
+                graph_task.cancel()
+
+        # Validation verdict as a trailing structured event
+        validation = {
+            "confidence": verdict.get("confidence_score", 0.0),
+            "needs_human_review": verdict.get("needs_human_review", True),
+            "critique": verdict.get("critique", ""),
+            "early_exit": verdict.get("early_exit"),
+            "faq_match": verdict.get("faq_match"),
+            "preprocessing": verdict.get("preprocessing"),
+            "degradation": describe_degradation(initial_state["degradation_level"]),
+        }
+        yield "validation", validation
+        yield "run", _run_summary(config, resumed_from, timings, await runtime.checkpoint_bytes(config))
+
+        yield None, "[DONE]"
+        REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint)
+
+    except Exception as e:
+        REQUEST_ERRORS.inc(endpoint=endpoint)
+        error_msg = f"Error processing request: {str(e)}"
+        yield None, _delta(error_msg)
+        yield None, "[DONE]"
 
-        # Run the graph
-        result = await graph.ainvoke(initial_state, config)
 
-        # Get the draft response from the result
-        draft_response = result.get("draft_response", "I couldn't generate a response.")
-        confidence = result.get("confidence_score", 0.0)
-        critique = result.get("critique", "")
-        needs_review = result.get("needs_human_review", True)
+def _sse(event: Optional[str], data: Any) -> str:
+    payload = data if isinstance(data, str) else json.dumps(data)
+    return (f"event: {event}\n" if event else "") + f"data: {payload}\n\n"
 
-        # Format the response
-        response_text = f"\n\n---\n\n{draft_response}\n\n---\n\n"
-        response_text += f"**AI Confidence:** {int(confidence * 100)}%\n"
 
-        if needs_review:
-            response_text += "\n**Note:** This response should be reviewed before sending.\n"
+async def generate_stream_response(messages: List[Message], selected_sources: Optional[List[str]] = None,
+                                   ticket_id: Optional[str] = None, retrieval_handle: Optional[str] = None,
+                                   pipeline_mode: Optional[str] = None, action: Optional[str] = None):
+    """Generate streaming response using the LangGraph pipeline."""
+    async for event, data in pipeline_events(messages, selected_sources, ticket_id, retrieval_handle, pipeline_mode, action):
+        yield _sse(event, data)
 
-        if critique:
-            response_text += f"\n**Validation:** {critique}\n"
 
-        # Stream the response character by character for smooth effect
-        chunk_size = 10
-        for i in range(0, len(response_text), chunk_size):
-            chunk = response_text[i:i + chunk_size]
-            yield f"data: {json.dumps({'choices': [{'delta': {'content': chunk}, 'index': 0}]})}\n\n"
-            await asyncio.sleep(0.02)
+def _websocket_events(payload: Dict[str, Any]):
+    """Event source for a WebSocket stream: the SSE pipeline events for a ChatRequest payload."""
+    request = ChatRequest(**payload)
+    return pipeline_events(request.messages, request.selected_sources, request.ticket_id,
+                           request.retrieval_handle, request.pipeline_mode, request.action, endpoint="copilot_ws")
 
-        yield "data: [DONE]\n\n"
 
-    except Exception as e:
-        error_msg = f"Error processing request: {str(e)}"
-        yield f"data: {json.dumps({'choices': [{'delta': {'content': error_msg}, 'index': 0}]})}\n\n"
-        yield "data: [DONE]\n\n"
+@app.websocket("/api/ws")
+async def ticket_socket(websocket: WebSocket):
+    """Multiplex many ticket pipelines over one connection (see api/websocket.py for the protocol)."""
+    await websocket.accept()
+    await TicketMultiplexer(websocket, _websocket_events).serve()
 
 
 @app.post("/api/copilot")
-async def chat_completion(request: ChatRequest):
-    """OpenAI-compatible chat completion endpoint for CopilotKit."""
+async def chat_completion(request: ChatRequest, x_profile: Optional[str] = Header(default=None),
+                          x_admin_token: Optional[str] = Header(default=None)):
+    """OpenAI-compatible chat completion endpoint for CopilotKit.
+
+    With profiling enabled, a non-streaming request sent with an X-Profile header
+    is run under cProfile; the saved profile is referenced in metadata.profile.
+    """
+    runtime.require_ready()
 
     if request.stream:
         return StreamingResponse(
-            generate_stream_response(request.messages, request.selected_sources),
+            generate_stream_response(request.messages, request.selected_sources, request.ticket_id,
+                                     request.retrieval_handle, request.pipeline_mode, request.action),
             media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
@@ -143,58 +305,210 @@ async def chat_completion(request: ChatRequest):
                 "X-Accel-Buffering": "no",
             }
         )
+    elif x_profile and _profiling_allowed(x_admin_token):
+        with profile_run() as profile:
+            response = await run_copilot(request)
+        response["metadata"]["profile"] = profile.summary() if profile else {"error": "Another request is being profiled"}
+        return response
     else:
-        # Non-streaming response
-        messages = request.messages
-        customer_query = ""
-        for msg in reversed(messages):
-            if msg.role == "user":
-                customer_query = msg.content
-                break
+        return await run_copilot(request)
 
-        initial_state = {
-            "ticket_id": "runtime",
-            "customer_query": customer_query,
-            "selected_sources": request.selected_sources,
-            "messages": [],
-            "category": None,
-            "retrieved_context": [],
-            "draft_response": None,
-            "confidence_score": 0.0,
-            "critique": None,
-            "needs_human_review": True,
-        }
 
-        config = {"configurable": {"thread_id": "chat-thread"}}
-        try:
-            result = await graph.ainvoke(initial_state, config)
-        except Exception as e:
-            from fastapi import HTTPException
-            raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
-
-        # Return structured response with metadata
-        return {
-            "id": "chatcmpl-support",
-            "object": "chat.completion",
-            "choices": [{
-                "index": 0,
-                "message": {
-                    "role": "assistant",
-                    "content": result.get("draft_response", "")
-                },
-                "finish_reason": "stop"
-            }],
-            # Custom metadata for the frontend
-            "metadata": {
-                "confidence": result.get("confidence_score", 0.0),
-                "critique": result.get("critique", ""),
-                "needs_human_review": result.get("needs_human_review", True),
-                "category": result.get("category", ""),
-                "sentiment": result.get("sentiment", "Neutral"),
-                "urgency": result.get("urgency", "Medium"),
-                "rag_sources": result.get("rag_sources", [])
-            }
+async def run_copilot(request: ChatRequest, endpoint: str = "copilot") -> Dict[str, Any]:
+    """Run the graph for a non-streaming request and build the chat completion response."""
+    # Non-streaming response
+    messages = request.messages
+    customer_query = ""
+    for msg in reversed(messages):
+        if msg.role == "user":
+            customer_query = msg.content
+            break
+
+    initial_state = {
+        "ticket_id": request.ticket_id or "runtime",
+        "customer_query": customer_query,
+        "prepared_query": None,
+        "preprocessing": None,
+        "selected_sources": request.selected_sources,
+        "retrieval_handle": request.retrieval_handle,
+        "pipeline_mode": request.pipeline_mode,
+        "messages": [],
+        "category": None,
+        "context_ids": [],
+        "draft_response": None,
+        "confidence_score": 0.0,
+        "critique": None,
+        "needs_human_review": True,
+        "retrieval_fallback": None,
+        "early_exit": None,
+        "faq_match": None,
+        "defer_validation": bool(request.async_validation),
+        "model_tiers": None,
+        "model_escalation": None,
+        "degradation_level": degradation.level(),
+    }
+
+    run_graph, config, graph_input, resumed_from = await runtime.plan_run(request.ticket_id, initial_state, request.action)
+    started = time.perf_counter()
+    timings = start_request_timings()
+    trace_id = None
+    try:
+        with start_trace(endpoint, query_chars=len(customer_query), selected_sources=request.selected_sources or []) as root, \
+                degradation.track_run():
+            trace_id = root.trace.trace_id if root else None
+            result = await run_graph.ainvoke(graph_input, config)
+    except Exception as e:
+        REQUEST_ERRORS.inc(endpoint=endpoint)
+        raise HTTPException(status_code=500, detail=f"Error generating response: {str(e)}")
+    REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint)
+
+    validation = {"status": "completed"}
+    # Escalations need no verdict and FAQ answers were validated when the index was built
+    if request.async_validation and not result.get("early_exit") and not result.get("faq_match"):
+        validation_id = start_background_validation(runtime.agents["validator"], result)
+        validation = {"status": "pending", "id": validation_id, "url": f"/api/validations/{validation_id}"}
+
+    # Return structured response with metadata
+    return {
+        "id": "chatcmpl-support",
+        "object": "chat.completion",
+        "choices": [{
+            "index": 0,
+            "message": {
+                "role": "assistant",
+                "content": result.get("draft_response", "")
+            },
+            "finish_reason": "stop"
+        }],
+        # Custom metadata for the frontend
+        "metadata": {
+            "confidence": result.get("confidence_score", 0.0),
+            "critique": result.get("critique", ""),
+            "needs_human_review": result.get("needs_human_review", True),
+            "category": result.get("category", ""),
+            "sentiment": result.get("sentiment", "Neutral"),
+            "urgency": result.get("urgency", "Medium"),
+            "rag_sources": await awith_previews(result.get("rag_sources")),
+            "early_exit": result.get("early_exit"),
+            "faq_match": result.get("faq_match"),
+            "preprocessing": result.get("preprocessing"),
+            "pipeline_mode": result.get("pipeline_mode"),
+            "model_tiers": result.get("model_tiers") or {},
+            "model_escalation": result.get("model_escalation"),
+            "degradation": describe_degradation(result.get("degradation_level")),
+            "validation": validation,
+            "timings": summarize_timings(timings),
+            "trace_id": trace_id,
+            "ticket_id": request.ticket_id,
+            **_run_summary(config, resumed_from, timings, await runtime.checkpoint_bytes(config)),
         }
+    }
+
+
+@app.get("/api/validations/{validation_id}")
+async def get_validation_result(validation_id: str):
+    """Fetch the verdict of a validation started with async_validation."""
+    result = get_validation(validation_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired validation id")
+    return result
+
+
+def _profiling_allowed(admin_token: Optional[str]) -> bool:
+    """Profiling is opt-in (PROFILING_ENABLED) and, if PROFILING_ADMIN_TOKEN is set, needs X-Admin-Token."""
+    expected = os.getenv("PROFILING_ADMIN_TOKEN")
+    return profiling_enabled() and (not expected or admin_token == expected)
+
+
+def _require_profiling(admin_token: Optional[str]):
+    if not profiling_enabled():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not _profiling_allowed(admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.get("/admin/profile")
+async def sample_profile(seconds: float = 10.0, interval_ms: float = 5.0, idle: bool = False,
+                         x_admin_token: Optional[str] = Header(default=None)):
+    """Sample this worker's stacks for N seconds (max 60) and return them in collapsed-stack format."""
+    _require_profiling(x_admin_token)
+    try:
+        stacks = await asyncio.to_thread(sample_stacks, seconds, max(interval_ms, 1.0) / 1000, idle)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(stacks, headers={"Content-Disposition": "attachment; filename=profile.collapsed"})
+
+
+@app.get("/admin/profiles/{profile_id}")
+async def get_profile(profile_id: str, format: str = "prof", x_admin_token: Optional[str] = Header(default=None)):
+    """Download a request profile (.prof for snakeviz/flameprof) or view its top functions (format=text)."""
+    _require_profiling(x_admin_token)
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Unknown profile id")
+    if format == "text":
+        return PlainTextResponse(profile_text(path))
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
+
+async def run_ticket_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Job runner: the same graph run and response as a non-streaming /api/copilot call."""
+    # Jobs recovered at startup can be picked up before the pipeline is built
+    await runtime.wait_ready()
+    return await run_copilot(ChatRequest(**payload, stream=False), endpoint="ticket_job")
+
+
+def _job_response(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {**job, "url": f"/api/tickets/{job['id']}", "events_url": f"/api/tickets/{job['id']}/events"}
+
+
+@app.post("/api/tickets", status_code=202)
+async def submit_ticket(request: ChatRequest, idempotency_key: Optional[str] = Header(default=None)):
+    """Queue a ticket for the pipeline and return its job id without waiting for the result.
+
+    Retries that send the same Idempotency-Key header get the original job back.
+    """
+    try:
+        job = job_pool.submit(request.model_dump(exclude={"stream"}), idempotency_key)
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    return _job_response(job)
+
+
+@app.get("/api/tickets/{job_id}")
+async def get_ticket(job_id: str, wait: float = 0.0):
+    """Job status and, once completed, the copilot response; wait=N long-polls up to N seconds (max 60)."""
+    job = await job_pool.wait(job_id, min(max(wait, 0.0), 60.0))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired ticket job")
+    return _job_response(job)
+
+
+@app.get("/api/tickets/{job_id}/events")
+async def ticket_events(job_id: str):
+    """Server-sent status updates for a job, ending with its result."""
+    if job_pool.store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired ticket job")
+
+    async def events():
+        status = None
+        while True:
+            job = await job_pool.wait(job_id, 15.0)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'detail': 'Ticket job expired'})}\n\n"
+                break
+            if job["status"] != status:
+                status = job["status"]
+                yield f"event: status\ndata: {json.dumps({'id': job_id, 'status': status})}\n\n"
+            if job["status"] in TERMINAL:
+                yield f"event: result\ndata: {json.dumps(_job_response(job))}\n\n"
+                break
+            # Keeps proxies from closing an idle stream
+            yield ": keepalive\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.get("/api/sources")
@@ -202,18 +516,13 @@ async def get_available_sources():
     """Get all available RAG sources from knowledge base."""
     try:
         # Connect to Weaviate
-        client = weaviate.connect_to_local(
-            host='localhost',
-            port=8080,
-            headers={'X-OpenAI-Api-Key': os.getenv('OPENAI_API_KEY')},
-            skip_init_checks=True
-        )
+        client = connect_weaviate(skip_init_checks=True)
 
         if not client.is_ready():
             return {"sources": [], "error": "Weaviate not connected"}
 
         # Get all documents
-        collection = client.collections.get("SupportDocs")
+        collection = active_collection(client)
         response = collection.query.fetch_objects(limit=100)
 
         # Extract unique sources with metadata
@@ -255,7 +564,11 @@ async def get_available_sources():
 
 @app.post("/api/suggest-sources")
 async def suggest_sources(request: ChatRequest):
-    """Suggest best RAG sources for a query without generating draft."""
+    """Suggest best RAG sources for a query without generating draft.
+
+    With session_id, answers as-you-type: lexical results first, superseding
+    the session's previous request (see api/suggestions.py).
+    """
     try:
         # Extract query
         customer_query = ""
@@ -264,67 +577,19 @@ async def suggest_sources(request: ChatRequest):
                 customer_query = msg.content
                 break
 
-        if not customer_query:
-            return {"suggested_sources": []}
-
-        # Connect to Weaviate
-        client = weaviate.connect_to_local(
-            host='localhost',
-            port=8080,
-            headers={'X-OpenAI-Api-Key': os.getenv('OPENAI_API_KEY')},
-            skip_init_checks=True
-        )
-
-        if not client.is_ready():
+        if not customer_query.strip():
             return {"suggested_sources": []}
 
-        # Perform vector search
-        collection = client.collections.get("SupportDocs")
-        response = collection.query.near_text(
-            query=customer_query,
-            limit=5,
-            return_metadata=MetadataQuery(distance=True, certainty=True)
-        )
-
-        # Extract sources with relevance
-        suggested = []
-        seen_docs = set()
-
-        for obj in response.objects:
-            props = obj.properties
-            meta = obj.metadata
-            doc_name = props.get("document", "Unknown")
-
-            # Skip duplicates (same document)
-            if doc_name in seen_docs:
-                continue
-            seen_docs.add(doc_name)
-
-            # Calculate relevance
-            relevance = 0.0
-            if hasattr(meta, 'certainty') and meta.certainty is not None:
-                relevance = meta.certainty
-            elif hasattr(meta, 'distance') and meta.distance is not None:
-                relevance = max(0.0, 1.0 - meta.distance)
-            else:
-                relevance = 0.75
-
-            suggested.append({
-                "document": doc_name,
-                "section": props.get("section", "Unknown"),
-                "category": props.get("category", "General"),
-                "relevance": round(float(relevance), 3),
-                "content_preview": props.get("content", "")[:150] + "..."
-            })
-
-        client.close()
-        return {"suggested_sources": suggested}
+        return await suggestions.suggest(customer_query, request.session_id)
 
     except Exception as e:
         print(f"Error suggesting sources: {e}")
         return {"suggested_sources": []}
 
 
+_IMPORT_MS = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 1)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,196 @@
+"""
+Lazily initialized pipeline runtime for the API.
+
+Building the graph imports langchain/langgraph, creates the ChatOpenAI
+clients and opens a (blocking) Weaviate connection. None of that happens at
+import time any more: the FastAPI lifespan starts initialize() in the
+background, so workers bind their port immediately, /healthz answers right
+away and /readyz reports when the pipeline can take traffic.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from observability.degradation import controller as degradation
+from observability.metrics import counter, gauge
+
+STARTUP_SECONDS = gauge("support_startup_seconds", "Cold-start duration per phase.", ["phase"])
+RESUMED_RUNS = counter("support_resumed_runs_total", "Ticket follow-ups by the node they resumed after ('none' for full runs).", ["action", "resumed_from"])
+
+# Follow-up actions on a ticket thread resume from its checkpoint: the update is
+# written as if this node had just finished, so only the nodes after it run.
+# "regenerate" keeps the retrieved context and redrafts (generate -> validate);
+# "change_sources" keeps the category and retrieves again.
+RESUME_AFTER = {"regenerate": "retrieve", "change_sources": "classify"}
+# Per-run fields that must not carry over from the previous run on the thread
+RUN_FIELDS = ("defer_validation", "model_tiers", "model_escalation", "early_exit", "faq_match", "degradation_level")
+
+WarmupStep = Callable[["PipelineRuntime"], Awaitable[None]]
+
+
+class PipelineRuntime:
+    """Holds the compiled graphs once they are built and tracks readiness."""
+
+    def __init__(self):
+        self.agents: Dict[str, Any] = {}
+        self.graph = None
+        self.stateless_graph = None
+        self.ready = False
+        self.phase = "not_started"
+        self.error: Optional[str] = None
+        self.startup_ms: Dict[str, float] = {}
+        self._warmup_steps: List[Tuple[str, WarmupStep]] = []
+        self._started: Optional[float] = None
+
+    def add_warmup_step(self, name: str, step: WarmupStep):
+        """Register an async step to run after the graph is built when warm-up is enabled."""
+        self._warmup_steps.append((name, step))
+
+    def _mark(self, phase: str, started: float):
+        elapsed = time.perf_counter() - started
+        self.startup_ms[phase] = round(elapsed * 1000, 1)
+        STARTUP_SECONDS.set(elapsed, phase=phase)
+
+    async def initialize(self, warmup: bool = False):
+        """Import and build the pipeline off the event loop, then optionally warm it up."""
+        self._started = time.perf_counter()
+        try:
+            self.phase = "importing"
+            started = time.perf_counter()
+            graph_module, checkpointer_module = await asyncio.to_thread(_import_pipeline_modules)
+            self._mark("import", started)
+
+            self.phase = "building"
+            started = time.perf_counter()
+            self.agents = await asyncio.to_thread(graph_module.create_agents)
+            workflow = graph_module.build_support_workflow(self.agents)
+            self.graph = workflow.compile(checkpointer=checkpointer_module.create_checkpointer())
+            self.stateless_graph = workflow.compile()
+            self._mark("build", started)
+
+            if warmup:
+                self.phase = "warming_up"
+                started = time.perf_counter()
+                for name, step in self._warmup_steps:
+                    step_started = time.perf_counter()
+                    try:
+                        await step(self)
+                    except Exception as e:
+                        print(f"Warning: Warm-up step '{name}' failed: {e}")
+                    self._mark(f"warmup_{name}", step_started)
+                self._mark("warmup", started)
+
+            self._mark("total", self._started)
+            self.phase = "ready"
+            self.ready = True
+            print(f"🚀 Pipeline ready in {self.startup_ms['total']:.0f} ms {self.startup_ms}")
+        except Exception as e:
+            self.phase = "failed"
+            self.error = str(e)
+            print(f"❌ Pipeline initialization failed: {e}")
+
+    def require_ready(self):
+        """Raise 503 until the pipeline has finished initializing."""
+        if not self.ready:
+            detail = f"Pipeline not ready ({self.phase})" + (f": {self.error}" if self.error else "")
+            raise HTTPException(status_code=503, detail=detail, headers={"Retry-After": "2"})
+
+    async def wait_ready(self, poll_interval: float = 0.1):
+        """Wait for initialization to finish; raises like require_ready() if it failed."""
+        while not self.ready and self.phase != "failed":
+            await asyncio.sleep(poll_interval)
+        self.require_ready()
+
+    def graph_for_ticket(self, ticket_id: Optional[str]):
+        """Return the graph and run config for a request.
+
+        Requests tied to a ticket run in a checkpointed per-ticket thread so
+        follow-ups can build on them; one-off requests use the stateless
+        compile of the same workflow and leave nothing behind.
+        """
+        self.require_ready()
+        if ticket_id and self.graph.checkpointer is not None:
+            return self.graph, {"configurable": {"thread_id": f"ticket-{ticket_id}"}}
+        return self.stateless_graph, {}
+
+    async def plan_run(self, ticket_id: Optional[str], initial_state: Dict[str, Any], action: Optional[str] = None):
+        """Return (graph, config, graph_input, resumed_from) for a request.
+
+        With an action on a ticket thread whose last run answered the same query,
+        the checkpoint is updated and graph_input is None, so the run resumes
+        after resumed_from. Anything else (no action, no checkpoint, a new query
+        or pipeline mode) is a full run from initial_state.
+        """
+        run_graph, config = self.graph_for_ticket(ticket_id)
+        if not action or not config:
+            return run_graph, config, initial_state, None
+        saved = (await run_graph.aget_state(config)).values or {}
+        requested_mode = initial_state.get("pipeline_mode")
+        if (saved.get("customer_query") != initial_state["customer_query"] or not saved.get("draft_response")
+                or (requested_mode and requested_mode != saved.get("pipeline_mode"))):
+            RESUMED_RUNS.inc(action=action, resumed_from="none")
+            return run_graph, config, initial_state, None
+
+        if action == "regenerate" and initial_state.get("selected_sources") is not None and \
+                sorted(initial_state["selected_sources"]) != sorted(saved.get("selected_sources") or []):
+            action = "change_sources"
+        values = {field: initial_state.get(field) for field in RUN_FIELDS}
+        if action == "change_sources":
+            values.update(selected_sources=initial_state.get("selected_sources"),
+                          retrieval_handle=initial_state.get("retrieval_handle"),
+                          retrieval_fallback=None)
+        resumed_from = RESUME_AFTER[action]
+        await run_graph.aupdate_state(config, values, as_node=resumed_from)
+        RESUMED_RUNS.inc(action=action, resumed_from=resumed_from)
+        return run_graph, config, None, resumed_from
+
+    async def checkpoint_bytes(self, config: Dict[str, Any]) -> Optional[int]:
+        """Serialized size of the checkpoint the run left behind (None for stateless runs)."""
+        thread_id = config.get("configurable", {}).get("thread_id")
+        if not thread_id or self.graph.checkpointer is None:
+            return None
+        from state.checkpointer import latest_checkpoint_bytes
+        try:
+            return await latest_checkpoint_bytes(self.graph.checkpointer, thread_id)
+        except Exception as e:
+            print(f"Warning: Could not measure checkpoint size: {e}")
+            return None
+
+    def status(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "phase": self.phase, "error": self.error, "startup_ms": self.startup_ms,
+                "degradation": degradation.status()}
+
+    async def shutdown(self):
+        retriever = self.agents.get("retriever")
+        if retriever is not None and getattr(retriever, "client", None) is not None:
+            try:
+                retriever.client.close()
+            except Exception:
+                pass
+        checkpointer = getattr(self.graph, "checkpointer", None)
+        conn = getattr(checkpointer, "conn", None)
+        if conn is not None:
+            await conn.close()
+
+
+def _import_pipeline_modules():
+    import graph
+    from state import checkpointer
+    return graph, checkpointer
+
+
+async def warm_up_retriever(runtime: PipelineRuntime):
+    """Run one retrieval so the vector store connection and query path are hot."""
+    retriever = runtime.agents["retriever"]
+    await retriever.run({"customer_query": "How do I request a refund?", "category": "Billing"})
+
+
+def warmup_enabled() -> bool:
+    return os.getenv("WARMUP_ON_START", "false").lower() in ("1", "true", "yes")
+
+
+runtime = PipelineRuntime()
+runtime.add_warmup_step("retriever", warm_up_retriever)
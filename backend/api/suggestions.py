@@ -0,0 +1,300 @@
+"""
+Source suggestions for /api/suggest-sources, built for as-you-type input.
+
+Every request goes through a cache keyed by the active index version and
+the query text. Full requests are keyed on all of its words; incremental
+ones on its settled words, i.e. everything except a trailing half-typed
+word, so typing inside a word returns the previous result straight from the
+cache. Misses take one of two paths:
+
+    full         (no session_id) vector search with the index's provider,
+                 on a shared client instead of a connection per call
+    incremental  (session_id) an in-process BM25 lookup (store.lexical) that
+                 answers immediately. A vector search for the same text is
+                 scheduled after SUGGEST_REFINE_DELAY_MS and replaces the
+                 cached entry. It is also cached under the full key for its
+                 text, so the final full call gets the refined ranking.
+
+A new incremental request cancels the session's previous request and its
+pending refinement. Superseded requests return {"superseded": true}, and
+refinements the session no longer needs never reach the vector store.
+Retrieval handles are only issued in full mode, for vector results found
+for exactly the requested text.
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from cache.store import cache_key, get_cache
+from observability.metrics import counter, histogram
+from store.chunk_store import object_chunk_id, put as put_chunk
+from store.embeddings import semantic_search
+from store.index_versions import INDEX_ALIAS_TTL_SECONDS, active_collection, resolve_collection
+from store.lexical import get_index
+from store.retrieval_handles import RETRIEVAL_HANDLE_TTL_SECONDS, save_candidates
+from store.weaviate_client import connect_weaviate
+
+SUGGEST_LIMIT = 5
+SUGGEST_CACHE_TTL_SECONDS = float(os.getenv("SUGGEST_CACHE_TTL_SECONDS", "300"))
+SUGGEST_REFINE_DELAY_MS = float(os.getenv("SUGGEST_REFINE_DELAY_MS", "150"))
+SUGGEST_REFINE_CONCURRENCY = int(os.getenv("SUGGEST_REFINE_CONCURRENCY", "4"))
+
+SUGGEST_LATENCY = histogram("support_suggest_latency_seconds", "Source suggestion latency by stage.", ["stage"],
+                            buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+SUGGEST_REQUESTS = counter("support_suggest_requests_total", "Source suggestion requests by outcome.", ["outcome"])
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+_cache = get_cache("suggestions", ttl=SUGGEST_CACHE_TTL_SECONDS)
+_sessions: Dict[str, asyncio.Task] = {}
+_refinements: Dict[str, Tuple[str, asyncio.Task]] = {}  # session_id -> (cache key, task)
+_client = None
+_client_lock = threading.Lock()
+_version: Optional[Tuple[str, float]] = None  # (active collection, monotonic time it goes stale)
+_version_refresh: Optional[asyncio.Task] = None
+_refine_slots: Optional[asyncio.Semaphore] = None
+
+
+def normalized_text(query: str) -> str:
+    """Lower-cased words of the query."""
+    return " ".join(_WORD_RE.findall(query.lower()))
+
+
+def settled_text(query: str) -> str:
+    """Lower-cased words of the query, without a trailing word that may still be half-typed."""
+    words = _WORD_RE.findall(query.lower())
+    if len(words) > 1 and query[-1:].isalnum():
+        words = words[:-1]
+    return " ".join(words)
+
+
+def _full_key(version: str, query: str) -> str:
+    return cache_key(version, "full", normalized_text(query))
+
+
+def _prefix_key(version: str, query: str) -> str:
+    return cache_key(version, "prefix", settled_text(query))
+
+
+def _shared_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = connect_weaviate(skip_init_checks=True)
+        return _client
+
+
+def _reset_client():
+    """Drop the shared client after a failed search so the next request reconnects."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def _resolve_version() -> str:
+    global _version
+    version = resolve_collection(_shared_client())
+    _version = (version, time.monotonic() + INDEX_ALIAS_TTL_SECONDS)
+    return version
+
+
+async def _refresh_version():
+    try:
+        await asyncio.to_thread(_resolve_version)
+    except Exception as e:
+        print(f"Warning: Could not refresh the active index version: {e}")
+        _reset_client()
+
+
+async def _active_version() -> str:
+    """The active index version. Only the first lookup waits for Weaviate; after that the
+    version is served from memory and refreshed in the background once it goes stale."""
+    global _version_refresh
+    if _version is None:
+        return await asyncio.to_thread(_resolve_version)
+    if _version[1] <= time.monotonic() and (_version_refresh is None or _version_refresh.done()):
+        _version_refresh = asyncio.create_task(_refresh_version())
+    return _version[0]
+
+
+def _relevance(meta: Any) -> float:
+    if getattr(meta, "certainty", None) is not None:
+        return meta.certainty
+    if getattr(meta, "distance", None) is not None:
+        return max(0.0, 1.0 - meta.distance)
+    if getattr(meta, "score", None) is not None:
+        return meta.score
+    return 0.75
+
+
+def to_sources(collection_name: str, objects: List[Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """(one suggestion per document, every chunk as a retrieval candidate) for search results."""
+    suggested, candidates, seen_docs = [], [], set()
+    for obj in objects:
+        props = obj.properties
+        doc_name = props.get("document", "Unknown")
+        relevance = round(float(_relevance(obj.metadata)), 3)
+        candidates.append({
+            "chunk_id": put_chunk(object_chunk_id(collection_name, obj.uuid), props.get("content", "")),
+            "document": doc_name,
+            "section": props.get("section", "Unknown"),
+            "category": props.get("category", "General"),
+            "relevance": relevance,
+        })
+        if doc_name in seen_docs:
+            continue
+        seen_docs.add(doc_name)
+        suggested.append({
+            "document": doc_name,
+            "section": props.get("section", "Unknown"),
+            "category": props.get("category", "General"),
+            "relevance": relevance,
+            "content_preview": props.get("content", "")[:150] + "...",
+        })
+    return suggested, candidates
+
+
+def _vector_entry(query: str) -> Dict[str, Any]:
+    from weaviate.classes.query import MetadataQuery
+    client = _shared_client()
+    collection = active_collection(client)
+    response = semantic_search(client, collection, query, limit=SUGGEST_LIMIT,
+                               return_metadata=MetadataQuery(distance=True, certainty=True))
+    suggested, candidates = to_sources(collection.name, response.objects)
+    return {"stage": "vector", "text": normalized_text(query), "suggested_sources": suggested,
+            "candidates": candidates}
+
+
+def _lexical_entry(query: str) -> Dict[str, Any]:
+    collection = active_collection(_shared_client())
+    suggested, candidates = to_sources(collection.name, get_index(collection).search(query, SUGGEST_LIMIT))
+    return {"stage": "lexical", "text": normalized_text(query), "suggested_sources": suggested,
+            "candidates": candidates}
+
+
+async def _refine(key: str, full_key: str, query: str):
+    """Replace a lexical cache entry with vector results once the text has settled."""
+    global _refine_slots
+    await asyncio.sleep(SUGGEST_REFINE_DELAY_MS / 1000)
+    _refine_slots = _refine_slots or asyncio.Semaphore(SUGGEST_REFINE_CONCURRENCY)
+    async with _refine_slots:
+        started = time.perf_counter()
+        try:
+            entry = await asyncio.to_thread(_vector_entry, query)
+        except Exception as e:
+            print(f"Warning: Suggestion refinement failed: {e}")
+            _reset_client()
+            return
+        SUGGEST_LATENCY.observe(time.perf_counter() - started, stage="refine")
+        _cache.set(key, entry)
+        _cache.set(full_key, entry)
+
+
+def _cancel_refinement(session_id: str, keep_key: Optional[str] = None) -> bool:
+    """Cancel the session's pending refinement unless it is for keep_key; True if one is kept."""
+    pending = _refinements.get(session_id)
+    if pending is None or pending[1].done():
+        return False
+    if pending[0] == keep_key:
+        return True
+    pending[1].cancel()
+    return False
+
+
+def _schedule_refinement(session_id: str, key: str, full_key: str, query: str):
+    if _cancel_refinement(session_id, keep_key=key):
+        return
+    task = asyncio.create_task(_refine(key, full_key, query))
+    _refinements[session_id] = (key, task)
+
+    def forget(done: asyncio.Task):
+        if _refinements.get(session_id, (None, None))[1] is done:
+            del _refinements[session_id]
+
+    task.add_done_callback(forget)
+
+
+def _respond(entry: Dict[str, Any], stage: str, query: str, issue_handle: bool) -> Dict[str, Any]:
+    handle = None
+    # An entry found for other text (older entries carry none) must not hand its candidates to /api/copilot
+    if (issue_handle and entry["stage"] == "vector" and entry["candidates"]
+            and entry.get("text") == normalized_text(query)):
+        handle = save_candidates(query, entry["candidates"])
+    return {
+        "suggested_sources": entry["suggested_sources"],
+        "retrieval_handle": handle,
+        "expires_in": RETRIEVAL_HANDLE_TTL_SECONDS,
+        "stage": stage,
+        "refined": entry["stage"] == "vector",
+    }
+
+
+async def _suggest(query: str, session_id: Optional[str]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    version = await _active_version()
+    full_key = _full_key(version, query)
+    # Only as-you-type lookups may share an entry with other text that has the same settled words
+    key = _prefix_key(version, query) if session_id else full_key
+    entry = _cache.get(key)
+    if session_id:
+        # The text moved on; a vector search for an older prefix is wasted work
+        _cancel_refinement(session_id, keep_key=key)
+    if entry is not None and (session_id or entry["stage"] == "vector"):
+        if session_id and entry["stage"] != "vector":
+            _schedule_refinement(session_id, key, full_key, query)
+        stage = "cache"
+    elif session_id:
+        # The first lookup of a version builds its lexical index; keep that off the event loop
+        entry = await asyncio.to_thread(_lexical_entry, query)
+        _cache.set(key, entry)
+        _schedule_refinement(session_id, key, full_key, query)
+        stage = "lexical"
+    else:
+        entry = await asyncio.to_thread(_vector_entry, query)
+        _cache.set(key, entry)
+        stage = "vector"
+    SUGGEST_LATENCY.observe(time.perf_counter() - started, stage=stage)
+    SUGGEST_REQUESTS.inc(outcome=stage)
+    return _respond(entry, stage, query, issue_handle=session_id is None)
+
+
+async def suggest(query: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+    """Suggestions for query; with a session_id, supersedes that session's in-flight request."""
+    if not session_id:
+        try:
+            return await _suggest(query, None)
+        except Exception:
+            _reset_client()
+            raise
+    previous = _sessions.get(session_id)
+    if previous is not None and not previous.done():
+        previous.cancel()
+    task = asyncio.create_task(_suggest(query, session_id))
+    _sessions[session_id] = task
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if task.cancelled() and _sessions.get(session_id) is not task:
+            SUGGEST_REQUESTS.inc(outcome="superseded")
+            return {"suggested_sources": [], "superseded": True}
+        raise
+    finally:
+        if _sessions.get(session_id) is task:
+            del _sessions[session_id]
+
+
+def close():
+    for task in list(_sessions.values()) + [task for _, task in _refinements.values()]:
+        task.cancel()
+    if _version_refresh is not None:
+        _version_refresh.cancel()
+    _reset_client()
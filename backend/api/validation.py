@@ -0,0 +1,62 @@
+"""
+Background validation for clients that don't want to wait for QualityValidator.
+
+The copilot endpoint returns the draft immediately and hands the graph state
+to start_background_validation(); the verdict is stored under a validation id
+in the shared cache (so any worker can serve it) and fetched later via
+GET /api/validations/{validation_id}.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, Optional, Set
+
+from cache.store import get_cache
+
+VALIDATION_TTL_SECONDS = 3600
+
+_results = get_cache("validations", ttl=VALIDATION_TTL_SECONDS, required=True)
+_tasks: Set[asyncio.Task] = set()
+
+
+async def _validate(validation_id: str, validator, state: Dict[str, Any]):
+    started = time.perf_counter()
+    try:
+        verdict = await validator.run(state)
+        _results.set(validation_id, {
+            "status": "completed",
+            "confidence": verdict.get("confidence_score", 0.0),
+            "needs_human_review": verdict.get("needs_human_review", True),
+            "critique": verdict.get("critique", ""),
+            "validation_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+    except Exception as e:
+        print(f"Background validation failed: {e}")
+        _results.set(validation_id, {"status": "failed", "error": str(e), "needs_human_review": True})
+
+
+def start_background_validation(validator, state: Dict[str, Any]) -> str:
+    """Schedule validation of a finished draft and return its id."""
+    validation_id = uuid.uuid4().hex
+    _results.set(validation_id, {"status": "pending"})
+    snapshot = {
+        "customer_query": state.get("customer_query", ""),
+        "prepared_query": state.get("prepared_query"),
+        "context_ids": state.get("context_ids", []),
+        "draft_response": state.get("draft_response", ""),
+        # Routing inputs, so the validator picks the same model tier it would have inline
+        "urgency": state.get("urgency"),
+        "model_tiers": state.get("model_tiers"),
+        "model_escalation": state.get("model_escalation"),
+        "degradation_level": state.get("degradation_level"),
+    }
+    task = asyncio.create_task(_validate(validation_id, validator, snapshot))
+    # Keep a reference so the task isn't garbage collected mid-flight
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return validation_id
+
+
+def get_validation(validation_id: str) -> Optional[Dict[str, Any]]:
+    return _results.get(validation_id)
@@ -0,0 +1,177 @@
+"""
+Multiplexed WebSocket transport: many ticket pipelines over one connection.
+
+A support agent with a dozen tickets open keeps a single socket instead of
+one SSE request per ticket. Each ticket runs as its own stream, identified
+by a client-chosen stream_id, and produces the same events as the SSE path.
+
+Client -> server (JSON text frames):
+    {"type": "start", "stream_id": "t-1", "request": {...ChatRequest fields...}}
+    {"type": "cancel", "stream_id": "t-1"}
+    {"type": "credit", "stream_id": "t-1", "credits": 16}
+
+Server -> client:
+    {"stream_id": "t-1", "event": "message", "data": {"choices": [...]}}   (SSE data lines)
+    {"stream_id": "t-1", "event": "validation" | "revision" | "run", "data": {...}}
+    {"stream_id": "t-1", "event": "done" | "cancelled"}
+    {"stream_id": "t-1", "event": "error", "data": {"detail": "..."}}
+
+Backpressure is per stream: a stream may send WS_STREAM_WINDOW events before
+it waits for the client to grant more with a credit message, so a ticket the
+client isn't reading stalls on its own without holding up the others.
+Credits beyond the window are ignored.
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from observability.metrics import counter, gauge
+
+WS_STREAM_WINDOW = int(os.getenv("WS_STREAM_WINDOW", "256"))
+WS_MAX_STREAMS = int(os.getenv("WS_MAX_STREAMS", "32"))
+
+WS_CONNECTIONS = gauge("support_ws_connections", "Open multiplexed WebSocket connections.")
+WS_ACTIVE_STREAMS = gauge("support_ws_active_streams", "Ticket streams running over WebSocket connections.")
+WS_STREAMS = counter("support_ws_streams_total", "WebSocket ticket streams by outcome.", ["outcome"])
+
+# Builds the (event, data) iterator for a start message's request payload
+EventSource = Callable[[Dict[str, Any]], AsyncIterator[Tuple[Optional[str], Any]]]
+
+
+class CreditWindow:
+    """Send credits of one stream, at most size outstanding."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.available = size
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.available > 0)
+            self.available -= 1
+
+    async def grant(self, credits: int) -> int:
+        """Add credits, clamped to the room left in the window; returns how many were added."""
+        async with self._condition:
+            granted = max(0, min(credits, self.size - self.available))
+            self.available += granted
+            self._condition.notify_all()
+        return granted
+
+
+class TicketMultiplexer:
+    """Serve one WebSocket connection, running a pipeline stream per stream_id."""
+
+    def __init__(self, websocket: WebSocket, event_source: EventSource):
+        self.websocket = websocket
+        self.event_source = event_source
+        self.streams: Dict[str, asyncio.Task] = {}
+        self.credits: Dict[str, CreditWindow] = {}
+        self._send_lock = asyncio.Lock()
+
+    async def serve(self):
+        WS_CONNECTIONS.inc()
+        try:
+            while True:
+                try:
+                    message = json.loads(await self.websocket.receive_text())
+                except json.JSONDecodeError:
+                    await self._send(None, "error", {"detail": "Messages must be JSON"})
+                    continue
+                await self._handle(message)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            WS_CONNECTIONS.dec()
+            for task in list(self.streams.values()):
+                task.cancel()
+            await asyncio.gather(*self.streams.values(), return_exceptions=True)
+
+    async def _handle(self, message: Any):
+        if not isinstance(message, dict):
+            await self._send(None, "error", {"detail": "Messages must be JSON objects"})
+            return
+        kind = message.get("type")
+        stream_id = message.get("stream_id")
+        if not isinstance(stream_id, str) or not stream_id:
+            await self._send(None, "error", {"detail": "stream_id is required"})
+        elif kind == "start":
+            await self._start(stream_id, message.get("request") or {})
+        elif kind == "cancel":
+            await self._cancel(stream_id)
+        elif kind == "credit":
+            credits = message.get("credits", 0)
+            if not isinstance(credits, int) or isinstance(credits, bool):
+                await self._send(stream_id, "error", {"detail": "credits must be an integer"})
+                return
+            window = self.credits.get(stream_id)
+            if window is not None:
+                await window.grant(credits)
+        else:
+            await self._send(stream_id, "error", {"detail": f"Unknown message type '{kind}'"})
+
+    async def _start(self, stream_id: str, request: Dict[str, Any]):
+        if stream_id in self.streams:
+            await self._send(stream_id, "error", {"detail": "Stream already running"})
+            return
+        if len(self.streams) >= WS_MAX_STREAMS:
+            WS_STREAMS.inc(outcome="rejected")
+            await self._send(stream_id, "error", {"detail": f"At most {WS_MAX_STREAMS} concurrent streams per connection"})
+            return
+        try:
+            events = self.event_source(request)
+        except Exception as e:
+            WS_STREAMS.inc(outcome="rejected")
+            await self._send(stream_id, "error", {"detail": str(e)})
+            return
+        self.credits[stream_id] = CreditWindow(WS_STREAM_WINDOW)
+        self.streams[stream_id] = asyncio.create_task(self._run(stream_id, events))
+        WS_ACTIVE_STREAMS.inc()
+
+    async def _run(self, stream_id: str, events: AsyncIterator[Tuple[Optional[str], Any]]):
+        outcome = "completed"
+        try:
+            async for event, data in events:
+                await self.credits[stream_id].acquire()
+                if event is None and data == "[DONE]":
+                    await self._send(stream_id, "done")
+                else:
+                    await self._send(stream_id, event or "message", data)
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            outcome = "failed"
+            await self._send(stream_id, "error", {"detail": str(e)})
+        finally:
+            # Closing the generator cancels the graph run behind it
+            await events.aclose()
+            self.streams.pop(stream_id, None)
+            self.credits.pop(stream_id, None)
+            WS_ACTIVE_STREAMS.dec()
+            WS_STREAMS.inc(outcome=outcome)
+
+    async def _cancel(self, stream_id: str):
+        task = self.streams.get(stream_id)
+        if task is None:
+            await self._send(stream_id, "error", {"detail": "No such stream"})
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await self._send(stream_id, "cancelled")
+
+    async def _send(self, stream_id: Optional[str], event: str, data: Any = None):
+        message = {"stream_id": stream_id, "event": event}
+        if data is not None:
+            message["data"] = data
+        async with self._send_lock:
+            try:
+                await self.websocket.send_text(json.dumps(message))
+            except (WebSocketDisconnect, RuntimeError):
+                # The client went away; serve() cancels the remaining streams
+                pass
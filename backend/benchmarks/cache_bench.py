@@ -0,0 +1,95 @@
+"""
+Cache hit rate and lookup latency with one worker versus N workers.
+
+Each simulated worker process draws keys from a skewed (Zipf-like)
+distribution, looks them up and stores the value on a miss, as the
+classifier and retriever do. With the per-process memory backend every
+worker warms its own copy; with the SQLite backend all workers share one.
+
+Usage (from backend/):
+    python -m benchmarks.cache_bench --workers 1,4,8 --lookups 5000 --keys 2000
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from cache.store import MemoryCache, SQLiteCache
+
+
+def _zipf_keys(count: int, universe: int, seed: int) -> List[int]:
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(universe)]
+    return rng.choices(range(universe), weights=weights, k=count)
+
+
+def _worker(backend: str, path: str, lookups: int, universe: int, seed: int, results):
+    cache = SQLiteCache(path) if backend == "sqlite" else MemoryCache()
+    value = {"retrieved_context": ["x" * 800] * 3, "rag_sources": [{"document": "doc.md", "relevance": 0.9}] * 3}
+    hits, latencies = 0, []
+    for key in _zipf_keys(lookups, universe, seed):
+        started = time.perf_counter()
+        cached = cache.get(f"retrieval:{key}")
+        latencies.append(time.perf_counter() - started)
+        if cached is None:
+            cache.set(f"retrieval:{key}", value, ttl=3600)
+        else:
+            hits += 1
+    results.put((hits, latencies))
+
+
+def run(backend: str, workers: int, lookups: int, universe: int) -> Dict:
+    path = os.path.join(tempfile.mkdtemp(), "cache.sqlite")
+    if backend == "sqlite":
+        SQLiteCache(path)  # create the schema once before workers race for it
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=_worker, args=(backend, path, lookups // workers, universe, seed, results))
+        for seed in range(workers)
+    ]
+    started = time.perf_counter()
+    for p in processes:
+        p.start()
+    collected = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+    wall = time.perf_counter() - started
+
+    hits = sum(h for h, _ in collected)
+    latencies = sorted(l for _, ls in collected for l in ls)
+    total = len(latencies)
+    return {
+        "backend": backend,
+        "workers": workers,
+        "lookups": total,
+        "hit_rate": round(hits / total, 3),
+        "p50_us": round(latencies[total // 2] * 1e6, 1),
+        "p95_us": round(latencies[int(total * 0.95)] * 1e6, 1),
+        "wall_s": round(wall, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cache hit rate and lookup latency across worker processes.")
+    parser.add_argument("--workers", default="1,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--lookups", type=int, default=8000, help="Total lookups, split across workers")
+    parser.add_argument("--keys", type=int, default=2000, help="Number of distinct queries")
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'workers':>7} {'hit rate':>9} {'p50 µs':>8} {'p95 µs':>8} {'wall s':>7}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        for backend in ("memory", "sqlite"):
+            r = run(backend, workers, args.lookups, args.keys)
+            print(f"{r['backend']:<8} {r['workers']:>7} {r['hit_rate']:>9.3f} {r['p50_us']:>8.1f} {r['p95_us']:>8.1f} {r['wall_s']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Chunking throughput: the streaming MarkdownChunker versus the old splitter.
+
+Builds a synthetic markdown corpus of --mb megabytes (knowledge-base
+sections shuffled into many documents, with ### subsections, code fences
+and some oversized paragraphs), writes it to a temp directory and chunks it
+with:
+
+    legacy         the indexers' previous pipeline: read the whole file, group
+                   it into '## ' sections, RecursiveCharacterTextSplitter with
+                   800/150 characters per section
+    legacy_tokens  the same pipeline with the splitter measuring tokens
+                   (--max-tokens/--overlap), i.e. the old way made token-aware
+    streaming      store.chunking.MarkdownChunker (token-bounded, token overlap)
+
+For each it reports MB/s, chunk count, token sizes (counted with the
+chunker's tokenizer) and how many chunks exceed the token limit.
+
+Usage (from backend/):
+    python -m benchmarks.chunk_bench --mb 50 --max-tokens 200 --overlap 32
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fixtures import KNOWLEDGE_BASE_PATH
+from store.chunking import MarkdownChunker, get_tokenizer
+
+
+def _corpus_sections() -> List[str]:
+    sections = []
+    for md_file in sorted(KNOWLEDGE_BASE_PATH.glob("*.md")):
+        for block in md_file.read_text(encoding="utf-8").split("\n## ")[1:]:
+            sections.append("## " + block.strip())
+    return sections
+
+
+def write_corpus(directory: Path, megabytes: float, seed: int = 7) -> int:
+    """Write synthetic markdown files totalling about `megabytes`; returns bytes written."""
+    rng = random.Random(seed)
+    sections = _corpus_sections()
+    target = int(megabytes * 1024 * 1024)
+    written, doc = 0, 0
+    while written < target:
+        parts = [f"# Synthetic guide {doc}\n"]
+        for _ in range(rng.randint(8, 24)):
+            parts.append(rng.choice(sections))
+            if rng.random() < 0.15:
+                # A pasted log or run-on answer: one paragraph well over the chunk size
+                body = rng.choice(sections).split("\n", 1)[-1]
+                parts.append(" ".join(" ".join(body.split()) for _ in range(rng.randint(2, 4))))
+            if rng.random() < 0.1:
+                parts.append("```\n## not a heading\n\ncurl -H 'Authorization: Bearer KEY' https://api.example.com\n```")
+        text = "\n\n".join(parts) + "\n"
+        (directory / f"billing_{doc:05d}.md").write_text(text, encoding="utf-8")
+        written += len(text.encode("utf-8"))
+        doc += 1
+    return written
+
+
+def legacy_chunks(path: Path, chunk_size: int = 800, overlap: int = 150,
+                  length_function: Callable[[str], int] = len) -> Iterator[str]:
+    """The indexers' previous approach: whole-file sections, then a recursive splitter per section."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=overlap, length_function=length_function,
+        separators=["\n## ", "\n### ", "\n\n", "\n", ". ", " ", ""],
+    )
+    for md_file in sorted(path.glob("*.md")):
+        with open(md_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        sections, current = [], []
+        for line in content.split("\n"):
+            if line.startswith("## "):
+                sections.append("\n".join(current).strip())
+                current = []
+            else:
+                current.append(line)
+        sections.append("\n".join(current).strip())
+        for section in sections:
+            if section:
+                yield from splitter.split_text(section)
+
+
+def streaming_chunks(chunker: MarkdownChunker) -> Callable[[Path], Iterator[str]]:
+    def chunks(path: Path) -> Iterator[str]:
+        for md_file in sorted(path.glob("*.md")):
+            for chunk in chunker.chunk_file(md_file):
+                yield chunk["content"]
+    return chunks
+
+
+def measure(name: str, chunk_fn: Callable[[Path], Iterator[str]], path: Path, size: int,
+            tokenizer, max_tokens: int) -> Dict:
+    started = time.perf_counter()
+    chunks = list(chunk_fn(path))
+    elapsed = time.perf_counter() - started
+    # Token sizes are measured after the timed pass so counting doesn't skew throughput
+    sizes = sorted(tokenizer.count(chunk) for chunk in chunks)
+    return {
+        "chunker": name,
+        "mb_per_s": round(size / 1024 / 1024 / elapsed, 2),
+        "seconds": round(elapsed, 2),
+        "chunks": len(chunks),
+        "mean_tokens": round(sum(sizes) / len(sizes), 1) if sizes else 0,
+        "max_tokens": sizes[-1] if sizes else 0,
+        "over_limit": sum(1 for s in sizes if s > max_tokens),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark markdown chunking throughput (MB/s).")
+    parser.add_argument("--mb", type=float, default=50.0, help="Size of the synthetic corpus")
+    parser.add_argument("--max-tokens", type=int, default=200)
+    parser.add_argument("--overlap", type=int, default=32)
+    parser.add_argument("--chunkers", default="legacy,legacy_tokens,streaming")
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer()
+    chunker = MarkdownChunker(args.max_tokens, args.overlap, tokenizer)
+    runners = {
+        "legacy": legacy_chunks,
+        "legacy_tokens": lambda path: legacy_chunks(path, args.max_tokens, args.overlap, tokenizer.count),
+        "streaming": streaming_chunks(chunker),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        size = write_corpus(Path(tmp), args.mb)
+        print(f"📚 {size / 1024 / 1024:.1f} MB synthetic corpus, tokens counted with '{tokenizer.name}'\n")
+        print(f"{'chunker':<14} {'MB/s':>7} {'s':>7} {'chunks':>8} {'mean tok':>9} {'max tok':>8} {f'>{args.max_tokens} tok':>9}")
+        for name in [c.strip() for c in args.chunkers.split(",") if c.strip()]:
+            r = measure(name, runners[name], Path(tmp), size, tokenizer, args.max_tokens)
+            print(f"{r['chunker']:<14} {r['mb_per_s']:>7.2f} {r['seconds']:>7.2f} {r['chunks']:>8} "
+                  f"{r['mean_tokens']:>9.1f} {r['max_tokens']:>8} {r['over_limit']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Deterministic fake of the OpenAI chat-completions and embeddings APIs.
+
+Responses are chosen from the prompt so every agent gets well-formed output:
+JSON classifications for the classifier, classification plus draft for the
+fused classify-and-draft call, JSON verdicts for the validator and a canned
+draft for everything else. Latency follows a configurable
+distribution, e.g. "fixed:50", "uniform:20,80", "normal:400,100" or
+"lognormal:800,0.4" (median ms, sigma). A malformed_rate > 0 truncates that
+share of JSON answers, which exercises the agents' parse-failure handling
+(e.g. a fast model tier escalating to the strong one).
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+EMBEDDING_DIMENSIONS = 1536
+
+
+class LatencyModel:
+    """Sample per-request latencies (in seconds) from a named distribution."""
+
+    def __init__(self, spec: str = "fixed:0", seed: int = 42):
+        self.spec = spec
+        self.rng = random.Random(seed)
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v]
+        samplers = {
+            "fixed": lambda: values[0],
+            "uniform": lambda: self.rng.uniform(values[0], values[1]),
+            "normal": lambda: max(0.0, self.rng.gauss(values[0], values[1])),
+            "lognormal": lambda: values[0] * math.exp(self.rng.gauss(0.0, values[1])),
+        }
+        if kind not in samplers:
+            raise ValueError(f"Unknown latency distribution '{kind}' (expected one of {sorted(samplers)})")
+        self._sample = samplers[kind]
+
+    def sample(self) -> float:
+        return self._sample() / 1000.0
+
+
+def _count_tokens(text: str) -> int:
+    # Roughly 4 characters per token, which is close enough for cost comparisons
+    return max(1, len(text) // 4)
+
+
+def _pick(options: List[str], text: str) -> str:
+    digest = int(hashlib.sha256(text.encode("utf-8")).hexdigest(), 16)
+    return options[digest % len(options)]
+
+
+def classify_text(text: str) -> Dict[str, str]:
+    """Keyword classification mirroring the categories QueryClassifier enforces."""
+    lowered = text.lower()
+    if any(word in lowered for word in ("refund", "charge", "invoice", "billing", "payment", "subscription")):
+        category = "Billing"
+    elif any(word in lowered for word in ("crash", "bug", "broken", "glitch")):
+        category = "Bug"
+    elif any(word in lowered for word in ("dark mode", "feature", "how do i", "how to", "enable")):
+        category = "Feature"
+    else:
+        category = "Technical"
+    negative = any(word in lowered for word in ("angry", "frustrated", "unacceptable", "again", "still"))
+    urgent = any(word in lowered for word in ("down", "urgent", "production", "security", "twice", "duplicate"))
+    return {
+        "category": category,
+        "sentiment": "Negative" if negative else "Neutral",
+        "urgency": "High" if urgent else _pick(["Low", "Medium"], text),
+    }
+
+
+def _fused_response(system: str, user: str) -> Optional[str]:
+    if '"draft"' in system and '"urgency"' in system:
+        return json.dumps({**classify_text(user), "draft": _draft_response(system, user)})
+    return None
+
+
+def _classification_response(system: str, user: str) -> Optional[str]:
+    if '"category"' in system and '"urgency"' in system:
+        return json.dumps(classify_text(user))
+    return None
+
+
+def _validation_response(system: str, user: str) -> Optional[str]:
+    if "Quality Assurance" in system:
+        score = 0.6 + (int(hashlib.sha256(user.encode("utf-8")).hexdigest(), 16) % 40) / 100
+        return json.dumps({
+            "confidence_score": round(score, 2),
+            "needs_human_review": score < 0.8,
+            "critique": "Draft is grounded in the provided context.",
+        })
+    return None
+
+
+def _draft_response(system: str, user: str) -> Optional[str]:
+    return (
+        "Thank you for reaching out! Based on our documentation, here is how to resolve this:\n\n"
+        "- Open Settings and navigate to the relevant section.\n"
+        "- Follow the steps described in the linked guide.\n"
+        "- If the issue persists, reply to this ticket and we will escalate it.\n\n"
+        "Best regards,\nSupport Team"
+    )
+
+
+# Tried in order; the first responder returning text wins
+RESPONDERS: List[Callable[[str, str], Optional[str]]] = [
+    _fused_response,
+    _classification_response,
+    _validation_response,
+    _draft_response,
+]
+
+
+def _split_messages(messages: List[Dict[str, Any]]) -> Tuple[str, str]:
+    system = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") == "system")
+    user = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") != "system")
+    return system, user
+
+
+def _embed(text: str) -> List[float]:
+    """Deterministic unit vector derived from the text hash."""
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    vector = [rng.gauss(0.0, 1.0) for _ in range(EMBEDDING_DIMENSIONS)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def create_fake_openai_app(chat_latency: str = "fixed:0", embedding_latency: str = "fixed:0", seed: int = 42,
+                           malformed_rate: float = 0.0) -> FastAPI:
+    """Build the fake API; point OPENAI_BASE_URL at <server>/v1 to use it."""
+    app = FastAPI(title="Fake OpenAI API")
+    chat_model = LatencyModel(chat_latency, seed)
+    embedding_model = LatencyModel(embedding_latency, seed + 1)
+    malformed = random.Random(seed + 2)
+    app.state.calls = {"chat": 0, "embeddings": 0, "prompt_tokens": 0, "completion_tokens": 0, "malformed": 0}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        system, user = _split_messages(body.get("messages", []))
+        content = next(text for text in (r(system, user) for r in RESPONDERS) if text is not None)
+        if content.startswith("{") and malformed.random() < malformed_rate:
+            content = content[:len(content) // 2]
+            app.state.calls["malformed"] += 1
+        model = body.get("model", "gpt-4-turbo")
+        prompt_tokens = _count_tokens(system + user)
+        completion_tokens = _count_tokens(content)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                 "total_tokens": prompt_tokens + completion_tokens}
+        app.state.calls["chat"] += 1
+        app.state.calls["prompt_tokens"] += prompt_tokens
+        app.state.calls["completion_tokens"] += completion_tokens
+
+        delay = chat_model.sample()
+        headers = {"openai-processing-ms": str(int(delay * 1000))}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay)
+            return JSONResponse({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            }, headers=headers)
+
+        async def stream():
+            # Spend a third of the latency before the first token, the rest spread over the tokens
+            pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+            await asyncio.sleep(delay / 3)
+            for piece in pieces:
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                         "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(2 * delay / 3 / len(pieces))
+            final = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body.get("input", [])
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        app.state.calls["embeddings"] += 1
+        await asyncio.sleep(embedding_model.sample())
+        data = [{"object": "embedding", "index": i, "embedding": _embed(json.dumps(item))} for i, item in enumerate(inputs)]
+        tokens = sum(_count_tokens(json.dumps(item)) for item in inputs)
+        return JSONResponse({
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-3-small"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+    return app
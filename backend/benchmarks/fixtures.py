@@ -0,0 +1,53 @@
+"""Shared fixtures for offline benchmarks: knowledge-base chunks and an in-memory SupportDocs store."""
+
+from pathlib import Path
+from typing import Dict, List
+
+from store.chunking import category_for
+from store.memory import InMemoryClient, InMemoryCollection
+from store.weaviate_client import COLLECTION_NAME
+
+KNOWLEDGE_BASE_PATH = Path(__file__).parent.parent / "knowledge_base"
+
+SAMPLE_QUERIES = [
+    "I was charged twice for my subscription this month, please refund the duplicate charge",
+    "How do I enable dark mode?",
+    "Our production API calls return 401 Unauthorized since this morning",
+    "The app keeps crashing when I export a report",
+    "What is the rate limit for the /v1/tickets endpoint?",
+    "How can I set up two-factor authentication for my team?",
+    "My payment failed and I got a suspension warning",
+    "Webhook deliveries are delayed by several minutes",
+]
+
+
+def load_knowledge_base_chunks(path: Path = KNOWLEDGE_BASE_PATH) -> List[Dict]:
+    """Split each markdown file into one chunk per '## ' section."""
+    chunks = []
+    for md_file in sorted(path.glob("*.md")):
+        category = category_for(md_file)
+        section, lines = "Introduction", []
+        sections = []
+        for line in md_file.read_text(encoding="utf-8").split("\n"):
+            if line.startswith("## "):
+                sections.append((section, lines))
+                section, lines = line[3:].strip(), []
+            else:
+                lines.append(line)
+        sections.append((section, lines))
+
+        for idx, (name, body) in enumerate(s for s in sections if "\n".join(s[1]).strip()):
+            chunks.append({
+                "content": "\n".join(body).strip(),
+                "document": md_file.name,
+                "section": name,
+                "category": category,
+                "chunk_index": idx,
+            })
+    return chunks
+
+
+def create_memory_client(chunks: List[Dict] = None) -> InMemoryClient:
+    """An InMemoryClient whose SupportDocs collection holds the knowledge base."""
+    collection = InMemoryCollection(COLLECTION_NAME, chunks if chunks is not None else load_knowledge_base_chunks())
+    return InMemoryClient({COLLECTION_NAME: collection})
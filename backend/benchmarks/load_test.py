@@ -0,0 +1,270 @@
+"""
+Offline load test for the support API.
+
+Starts a fake OpenAI server and the FastAPI app in this process (the app's
+Weaviate client is replaced by an in-memory SupportDocs collection), then
+drives the endpoints at fixed concurrency levels and reports latency
+percentiles, time-to-first-byte, throughput and the fake LLM calls and
+tokens spent per request (e.g. copilot vs copilot_fused compares the staged
+pipeline against the single-call classify-and-draft mode).
+
+Usage (from backend/):
+    python -m benchmarks.load_test --concurrency 1,8,32 --requests 64 \
+        --chat-latency lognormal:600,0.3 --output results.json [--baseline old.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_openai import create_fake_openai_app
+from benchmarks.fixtures import SAMPLE_QUERIES, create_memory_client
+from benchmarks.servers import ServerThread
+from store.weaviate_client import set_client_factory
+
+RESULTS_DIR = Path(__file__).parent / "results"
+SCHEMA_VERSION = 1
+
+
+def _chat_payload(index: int, stream: bool, **extra) -> Dict:
+    query = SAMPLE_QUERIES[index % len(SAMPLE_QUERIES)]
+    return {"messages": [{"role": "user", "content": query}], "stream": stream, **extra}
+
+
+# name -> (method, path, payload builder)
+SCENARIOS = {
+    "copilot": ("POST", "/api/copilot", lambda i: _chat_payload(i, False)),
+    "copilot_stream": ("POST", "/api/copilot", lambda i: _chat_payload(i, True)),
+    "copilot_fused": ("POST", "/api/copilot", lambda i: _chat_payload(i, False, pipeline_mode="fused")),
+    "copilot_fused_stream": ("POST", "/api/copilot", lambda i: _chat_payload(i, True, pipeline_mode="fused")),
+    "sources": ("GET", "/api/sources", lambda i: None),
+    "suggest_sources": ("POST", "/api/suggest-sources", lambda i: _chat_payload(i, False)),
+}
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return round(ordered[rank], 2)
+
+
+def summarize(samples: List[float]) -> Dict:
+    return {
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "mean": round(sum(samples) / len(samples), 2) if samples else None,
+    }
+
+
+async def _one_request(client: httpx.AsyncClient, method: str, path: str, payload) -> Dict:
+    started = time.perf_counter()
+    ttfb = None
+    async with client.stream(method, path, json=payload) as response:
+        async for chunk in response.aiter_raw():
+            if ttfb is None and chunk:
+                ttfb = time.perf_counter() - started
+        ok = response.status_code < 400
+    latency = time.perf_counter() - started
+    return {"ok": ok, "latency_ms": latency * 1000, "ttfb_ms": (ttfb or latency) * 1000}
+
+
+async def run_level(base_url: str, scenario: str, concurrency: int, total: int) -> Dict:
+    """Issue `total` requests with `concurrency` requests in flight at a time."""
+    method, path, payload_for = SCENARIOS[scenario]
+    samples: List[Dict] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        for index in counter:
+            try:
+                samples.append(await _one_request(client, method, path, payload_for(index)))
+            except httpx.HTTPError:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    ok = [s for s in samples if s["ok"]]
+    errors += len(samples) - len(ok)
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "rps": round(len(ok) / wall, 2) if wall else None,
+        "latency_ms": summarize([s["latency_ms"] for s in ok]),
+        "ttfb_ms": summarize([s["ttfb_ms"] for s in ok]),
+    }
+
+
+def wait_until_ready(base_url: str, timeout: float = 60.0) -> Dict:
+    """Poll /readyz until the pipeline is built; returns the reported startup timings."""
+    deadline = time.monotonic() + timeout
+    while True:
+        response = httpx.get(f"{base_url}/readyz")
+        if response.status_code == 200:
+            return response.json()
+        if response.json().get("phase") == "failed" or time.monotonic() > deadline:
+            raise RuntimeError(f"API did not become ready: {response.json()}")
+        time.sleep(0.05)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results: List[Dict], baseline: Optional[Dict] = None):
+    previous = {}
+    if baseline:
+        previous = {(r["scenario"], r["concurrency"]): r for r in baseline.get("results", [])}
+
+    print(f"\n{'scenario':<20} {'conc':>4} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'ttfb50':>8} "
+          f"{'llm/req':>8} {'tok/req':>8} {'fast%':>6} {'err':>4}  vs baseline")
+    for r in results:
+        lat, ttfb = r["latency_ms"], r["ttfb_ms"]
+        delta = ""
+        old = previous.get((r["scenario"], r["concurrency"]))
+        if old and old["latency_ms"]["p95"] and lat["p95"]:
+            change = (lat["p95"] - old["latency_ms"]["p95"]) / old["latency_ms"]["p95"] * 100
+            delta = f"p95 {change:+.1f}%, rps {r['rps'] - old['rps']:+.1f}"
+        llm = r.get("llm_per_request", {})
+        print(f"{r['scenario']:<20} {r['concurrency']:>4} {r['rps'] or 0:>8.1f} {lat['p50'] or 0:>8.1f} "
+              f"{lat['p95'] or 0:>8.1f} {lat['p99'] or 0:>8.1f} {ttfb['p50'] or 0:>8.1f} "
+              f"{llm.get('chat', 0):>8.2f} {llm.get('tokens', 0):>8.0f} {llm.get('fast_share', 0) * 100:>6.0f} "
+              f"{r['errors']:>4}  {delta}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test with fake LLM and vector-store stand-ins.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per scenario and concurrency level")
+    parser.add_argument("--chat-latency", default="lognormal:400,0.3", help="Fake chat completion latency distribution (ms)")
+    parser.add_argument("--embedding-latency", default="uniform:20,60", help="Fake embeddings latency distribution (ms)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-relevance", default="0.0",
+                        help="MIN_RETRIEVAL_RELEVANCE for the run; the in-memory store scores lower than Weaviate, "
+                             "so the default keeps every ticket on the full pipeline")
+    parser.add_argument("--cache-backend", default=None, choices=["memory", "sqlite", "none"],
+                        help="CACHE_BACKEND for the run; 'none' keeps repeated sample queries from hitting "
+                             "the classification and retrieval caches when comparing pipeline modes")
+    parser.add_argument("--fast-chat-latency", default=None,
+                        help="Start a second fake for the fast model tier with this latency (enables cascade routing)")
+    parser.add_argument("--fast-malformed-rate", type=float, default=0.0,
+                        help="Share of the fast tier's JSON answers to truncate, to trigger parse-failure escalations")
+    parser.add_argument("--output", default=None, help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {unknown}")
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    fake = ServerThread(create_fake_openai_app(args.chat_latency, args.embedding_latency, args.seed)).start()
+    os.environ["OPENAI_BASE_URL"] = f"{fake.url}/v1"
+    os.environ["OPENAI_API_KEY"] = "sk-fake"
+    os.environ["MIN_RETRIEVAL_RELEVANCE"] = args.min_relevance
+    if args.cache_backend:
+        os.environ["CACHE_BACKEND"] = args.cache_backend
+    fakes = {"strong": fake}
+    if args.fast_chat_latency:
+        fakes["fast"] = ServerThread(create_fake_openai_app(args.fast_chat_latency, args.embedding_latency, args.seed,
+                                                            malformed_rate=args.fast_malformed_rate)).start()
+        os.environ["LLM_FAST_MODEL"] = "fake-fast"
+        os.environ["LLM_FAST_BASE_URL"] = f"{fakes['fast'].url}/v1"
+    memory_client = create_memory_client()
+    set_client_factory(lambda: memory_client)
+
+    # Imported only now so the graph is built against the fakes
+    from api.main import app
+    api = ServerThread(app).start()
+    readiness = wait_until_ready(api.url)
+    print(f"🧊 Cold start: {readiness['startup_ms']}")
+
+    print(f"🚀 Load test against {api.url} (fake OpenAI at {fake.url})")
+    calls = {tier: server.server.config.app.state.calls for tier, server in fakes.items()}
+    results = []
+    for scenario in scenarios:
+        for concurrency in levels:
+            before = {tier: dict(counts) for tier, counts in calls.items()}
+            result = asyncio.run(run_level(api.url, scenario, concurrency, args.requests))
+            spent = {key: sum(calls[tier][key] - before[tier][key] for tier in calls) for key in calls["strong"]}
+            fast_chat = calls["fast"]["chat"] - before["fast"]["chat"] if "fast" in calls else 0
+            result["llm_per_request"] = {
+                "chat": round(spent["chat"] / args.requests, 2),
+                "embeddings": round(spent["embeddings"] / args.requests, 2),
+                "tokens": round((spent["prompt_tokens"] + spent["completion_tokens"]) / args.requests, 1),
+                "fast_share": round(fast_chat / spent["chat"], 2) if spent["chat"] else 0.0,
+            }
+            print(f"   ✓ {scenario} @ {concurrency}: p95 {result['latency_ms']['p95']} ms, {result['rps']} rps")
+            results.append(result)
+
+    api.stop()
+    for server in fakes.values():
+        server.stop()
+
+    commit = _git_commit()
+    report = {
+        "schema_version": SCHEMA_VERSION,
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": levels,
+            "chat_latency": args.chat_latency,
+            "embedding_latency": args.embedding_latency,
+            "seed": args.seed,
+            "min_relevance": args.min_relevance,
+            "cache_backend": args.cache_backend or os.getenv("CACHE_BACKEND", "memory"),
+            "fast_chat_latency": args.fast_chat_latency,
+            "fast_malformed_rate": args.fast_malformed_rate,
+        },
+        "startup_ms": readiness["startup_ms"],
+        "fake_openai_calls": calls,
+        "results": results,
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    if args.output:
+        output = Path(args.output)
+    else:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = RESULTS_DIR / f"load_{commit or 'nocommit'}_{stamp}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
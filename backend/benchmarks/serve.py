@@ -0,0 +1,47 @@
+"""
+Run the support API against the offline fakes in its own process.
+
+Benchmarks that measure the server's memory or open sockets start this as a
+subprocess, so their own client connections don't show up in the numbers.
+
+Usage (from backend/):
+    python -m benchmarks.serve --port 8100 --chat-latency lognormal:400,0.3
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import uvicorn
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_openai import create_fake_openai_app
+from benchmarks.fixtures import create_memory_client
+from benchmarks.servers import ServerThread
+from store.weaviate_client import set_client_factory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the API with fake LLM and vector-store stand-ins.")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--chat-latency", default="lognormal:400,0.3")
+    parser.add_argument("--embedding-latency", default="uniform:20,60")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-relevance", default="0.0")
+    args = parser.parse_args()
+
+    fake = ServerThread(create_fake_openai_app(args.chat_latency, args.embedding_latency, args.seed)).start()
+    os.environ["OPENAI_BASE_URL"] = f"{fake.url}/v1"
+    os.environ["OPENAI_API_KEY"] = "sk-fake"
+    os.environ["MIN_RETRIEVAL_RELEVANCE"] = args.min_relevance
+    memory_client = create_memory_client()
+    set_client_factory(lambda: memory_client)
+
+    from api.main import app
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Checkpoint size per ticket and memory under load.
+
+Runs --tickets ticket threads through the checkpointed graph (BoundedMemorySaver,
+fake OpenAI, in-memory SupportDocs) with --concurrency in flight, then
+reports the serialized checkpoint bytes each thread holds and the Python
+heap (tracemalloc) retained by the checkpointer, caches and chunk store
+once the load has passed.
+
+Usage (from backend/):
+    python -m benchmarks.state_size_bench --tickets 500 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import gc
+import os
+import statistics
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_openai import create_fake_openai_app
+from benchmarks.fixtures import SAMPLE_QUERIES, create_memory_client
+from benchmarks.servers import ServerThread
+from store.weaviate_client import set_client_factory
+
+
+def _initial_state(ticket: int) -> dict:
+    return {
+        "ticket_id": f"bench-{ticket}",
+        # Distinct queries, so retrieval and classification caches don't share results across tickets
+        "customer_query": f"{SAMPLE_QUERIES[ticket % len(SAMPLE_QUERIES)]} (ticket {ticket})",
+        "selected_sources": None,
+        "retrieval_handle": None,
+        "messages": [],
+        "draft_response": None,
+        "confidence_score": 0.0,
+        "needs_human_review": True,
+    }
+
+
+async def run(tickets: int, concurrency: int):
+    import graph
+    from state.checkpointer import BoundedMemorySaver
+
+    saver = BoundedMemorySaver(max_threads=tickets + 1, ttl_seconds=0)
+    app = graph.build_support_workflow(graph.create_agents()).compile(checkpointer=saver)
+    gc.collect()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(ticket: int):
+        async with semaphore:
+            await app.ainvoke(_initial_state(ticket), {"configurable": {"thread_id": f"ticket-bench-{ticket}"}})
+
+    await asyncio.gather(*(one(t) for t in range(tickets)))
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    sizes = sorted(saver.thread_bytes(f"ticket-bench-{t}") for t in range(tickets))
+    return {
+        "mean": statistics.mean(sizes),
+        "p95": sizes[int(len(sizes) * 0.95) - 1],
+        "total": sum(sizes),
+        "retained": current - baseline,
+        "peak": peak - baseline,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure checkpoint bytes per ticket and retained memory.")
+    parser.add_argument("--tickets", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    fake = ServerThread(create_fake_openai_app("fixed:0", "fixed:0")).start()
+    os.environ["OPENAI_BASE_URL"] = f"{fake.url}/v1"
+    os.environ["OPENAI_API_KEY"] = "sk-fake"
+    os.environ.setdefault("MIN_RETRIEVAL_RELEVANCE", "0.0")
+    memory_client = create_memory_client()
+    set_client_factory(lambda: memory_client)
+
+    tracemalloc.start()
+    r = asyncio.run(run(args.tickets, args.concurrency))
+    print(f"🧵 {args.tickets} tickets, concurrency {args.concurrency}")
+    print(f"   checkpoint bytes per ticket: mean {r['mean'] / 1024:.1f} KB, p95 {r['p95'] / 1024:.1f} KB, "
+          f"total {r['total'] / 1024 / 1024:.2f} MB")
+    print(f"   heap retained after load: {r['retained'] / 1024 / 1024:.2f} MB (peak {r['peak'] / 1024 / 1024:.2f} MB)")
+
+
+if __name__ == "__main__":
+    main()
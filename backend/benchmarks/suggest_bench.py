@@ -0,0 +1,112 @@
+"""
+As-you-type source suggestion latency.
+
+Types each sample query into /api/suggest-sources one keystroke every
+--keystroke-ms, without waiting for earlier responses, like an agent editing
+a ticket. The final text is then sent once more as a full (non-session)
+request. The vector store is the in-memory SupportDocs with --vector-latency-ms
+added to every vector search, standing in for a Weaviate round trip.
+
+Reports latency per stage (cache, lexical, vector), superseded requests and
+how many vector searches ran compared to the keystrokes sent. A second pass
+retypes the same queries to measure the cache-hit path.
+
+Usage (from backend/):
+    python -m benchmarks.suggest_bench --keystroke-ms 60 --vector-latency-ms 80
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fixtures import SAMPLE_QUERIES, create_memory_client
+from benchmarks.servers import ServerThread
+from store.weaviate_client import COLLECTION_NAME, set_client_factory
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))]
+
+
+async def type_query(client: httpx.AsyncClient, session: str, query: str, keystroke_ms: float, results):
+    async def send(text: str, session_id=None):
+        started = time.perf_counter()
+        response = await client.post("/api/suggest-sources", json={
+            "messages": [{"role": "user", "content": text}], "session_id": session_id})
+        data = response.json()
+        stage = "superseded" if data.get("superseded") else data.get("stage", "error")
+        results[stage].append((time.perf_counter() - started) * 1000)
+
+    keystrokes = []
+    for end in range(1, len(query) + 1):
+        keystrokes.append(asyncio.create_task(send(query[:end], session)))
+        await asyncio.sleep(keystroke_ms / 1000)
+    await asyncio.gather(*keystrokes)
+    await send(query)
+
+
+async def run_pass(url: str, keystroke_ms: float):
+    results = defaultdict(list)
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        await asyncio.gather(*(type_query(client, f"bench-{i}", query, keystroke_ms, results)
+                               for i, query in enumerate(SAMPLE_QUERIES)))
+    return results
+
+
+def report(title: str, results, vector_searches: int):
+    keystrokes = sum(len(q) for q in SAMPLE_QUERIES)
+    print(f"\n{title}: {keystrokes} keystrokes + {len(SAMPLE_QUERIES)} full requests, "
+          f"{vector_searches} vector searches")
+    for stage in ("cache", "lexical", "vector", "superseded"):
+        latencies = results.get(stage)
+        if latencies:
+            print(f"   {stage:<10} n={len(latencies):>4}  p50 {_percentile(latencies, 50):6.1f} ms  "
+                  f"p95 {_percentile(latencies, 95):6.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure as-you-type source suggestion latency.")
+    parser.add_argument("--keystroke-ms", type=float, default=60)
+    parser.add_argument("--vector-latency-ms", type=float, default=80)
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+    memory_client = create_memory_client()
+    collection = memory_client.collections.get(COLLECTION_NAME)
+    near_text = collection.query.near_text
+    vector_searches = [0]
+
+    def slow_near_text(*a, **kw):
+        vector_searches[0] += 1
+        time.sleep(args.vector_latency_ms / 1000)
+        return near_text(*a, **kw)
+
+    collection.query.near_text = slow_near_text
+    set_client_factory(lambda: memory_client)
+
+    from api.main import app
+    server = ServerThread(app).start()
+    try:
+        # Pipeline start-up imports hold the GIL; don't let them land in the first pass
+        while httpx.get(f"{server.url}/readyz").status_code != 200:
+            time.sleep(0.1)
+        first = asyncio.run(run_pass(server.url, args.keystroke_ms))
+        report("Pass 1 (cold cache)", first, vector_searches[0])
+        before = vector_searches[0]
+        second = asyncio.run(run_pass(server.url, args.keystroke_ms))
+        report("Pass 2 (retyped)", second, vector_searches[0] - before)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
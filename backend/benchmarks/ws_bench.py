@@ -0,0 +1,192 @@
+"""
+Compare SSE and the multiplexed WebSocket transport for agents with many tickets open.
+
+Starts the API (with fakes) in a subprocess, then simulates --agents support
+agents that each stream --tickets drafts at once: over SSE every ticket is
+its own POST /api/copilot connection, over WebSocket each agent shares one
+/api/ws connection. While each run is in flight the server process is
+sampled for established client connections on its port and resident memory
+(each transport gets its own warmed-up server process).
+
+Usage (from backend/):
+    python -m benchmarks.ws_bench --agents 8 --tickets 12 --chat-latency lognormal:400,0.3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+import websockets
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fixtures import SAMPLE_QUERIES
+from benchmarks.load_test import percentile, wait_until_ready
+
+CREDIT_BATCH = 32
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _established_on_port(port: int) -> int:
+    """Established TCP connections whose local port is the API's (i.e. server-side client sockets)."""
+    count = 0
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        if not os.path.exists(table):
+            continue
+        with open(table, "r", encoding="utf-8") as f:
+            next(f)
+            for line in f:
+                fields = line.split()
+                if int(fields[1].rsplit(":", 1)[1], 16) == port and fields[3] == "01":
+                    count += 1
+    return count
+
+
+def _payload(agent: int, ticket: int, stream: bool) -> Dict:
+    query = SAMPLE_QUERIES[(agent * 7 + ticket) % len(SAMPLE_QUERIES)]
+    return {"messages": [{"role": "user", "content": query}], "stream": stream}
+
+
+async def _sse_agent(base_url: str, agent: int, tickets: int) -> List[float]:
+    async def one(client: httpx.AsyncClient, ticket: int) -> float:
+        started = time.perf_counter()
+        async with client.stream("POST", "/api/copilot", json=_payload(agent, ticket, True)) as response:
+            async for line in response.aiter_lines():
+                if line == "data: [DONE]":
+                    break
+        return time.perf_counter() - started
+
+    limits = httpx.Limits(max_connections=tickets, max_keepalive_connections=tickets)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        return await asyncio.gather(*(one(client, ticket) for ticket in range(tickets)))
+
+
+async def _ws_agent(base_url: str, agent: int, tickets: int) -> List[float]:
+    started: Dict[str, float] = {}
+    finished: Dict[str, float] = {}
+    received: Dict[str, int] = {}
+    async with websockets.connect(base_url.replace("http", "ws", 1) + "/api/ws", max_size=None) as ws:
+        for ticket in range(tickets):
+            stream_id = f"t{ticket}"
+            started[stream_id] = time.perf_counter()
+            await ws.send(json.dumps({"type": "start", "stream_id": stream_id, "request": _payload(agent, ticket, True)}))
+        while len(finished) < tickets:
+            message = json.loads(await ws.recv())
+            stream_id = message["stream_id"]
+            received[stream_id] = received.get(stream_id, 0) + 1
+            if received[stream_id] % CREDIT_BATCH == 0:
+                await ws.send(json.dumps({"type": "credit", "stream_id": stream_id, "credits": CREDIT_BATCH}))
+            if message["event"] in ("done", "error", "cancelled"):
+                finished[stream_id] = time.perf_counter()
+    return [finished[s] - started[s] for s in started]
+
+
+async def _run(transport: str, base_url: str, port: int, pid: int, agents: int, tickets: int) -> Dict:
+    baseline_rss = _rss_mb(pid)
+    peak = {"connections": 0, "rss_mb": baseline_rss}
+    running = True
+
+    async def sample():
+        while running:
+            peak["connections"] = max(peak["connections"], _established_on_port(port))
+            peak["rss_mb"] = max(peak["rss_mb"], _rss_mb(pid))
+            await asyncio.sleep(0.02)
+
+    sampler = asyncio.create_task(sample())
+    agent_fn = _sse_agent if transport == "sse" else _ws_agent
+    wall_started = time.perf_counter()
+    per_agent = await asyncio.gather(*(agent_fn(base_url, agent, tickets) for agent in range(agents)))
+    wall = time.perf_counter() - wall_started
+    running = False
+    await sampler
+
+    latencies = [seconds * 1000 for agent in per_agent for seconds in agent]
+    rss_delta = peak["rss_mb"] - baseline_rss
+    return {
+        "transport": transport,
+        "agents": agents,
+        "tickets_per_agent": tickets,
+        "peak_connections": peak["connections"],
+        "connections_per_agent": round(peak["connections"] / agents, 2),
+        "peak_rss_delta_mb": round(rss_delta, 1),
+        "rss_delta_per_agent_mb": round(rss_delta / agents, 2),
+        "ticket_ms": {"p50": percentile(latencies, 50), "p95": percentile(latencies, 95)},
+        "wall_s": round(wall, 2),
+    }
+
+
+def _wait_for_server(server: subprocess.Popen, base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            wait_until_ready(base_url)
+            return
+        except httpx.TransportError:
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("API subprocess failed to start")
+            time.sleep(0.2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE vs multiplexed WebSocket: connections and memory per agent.")
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--tickets", type=int, default=12, help="Concurrent tickets per agent")
+    parser.add_argument("--chat-latency", default="lognormal:400,0.3")
+    parser.add_argument("--transports", default="sse,ws")
+    parser.add_argument("--output", default=None, help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    results = []
+    for transport in [t.strip() for t in args.transports.split(",") if t.strip()]:
+        # A fresh server per transport, warmed up with one agent, so earlier runs don't skew memory
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.serve", "--port", str(port), "--chat-latency", args.chat_latency],
+            cwd=str(Path(__file__).parent.parent),
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            _wait_for_server(server, base_url)
+            asyncio.run(_run(transport, base_url, port, server.pid, 1, args.tickets))
+            result = asyncio.run(_run(transport, base_url, port, server.pid, args.agents, args.tickets))
+            print(f"   ✓ {transport}: {result['peak_connections']} connections, +{result['peak_rss_delta_mb']} MB")
+            results.append(result)
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    print(f"\n{'transport':<10} {'conns':>6} {'conns/agent':>12} {'+rss MB':>8} {'MB/agent':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for r in results:
+        print(f"{r['transport']:<10} {r['peak_connections']:>6} {r['connections_per_agent']:>12.2f} "
+              f"{r['peak_rss_delta_mb']:>8.1f} {r['rss_delta_per_agent_mb']:>9.2f} "
+              f"{r['ticket_ms']['p50'] or 0:>8.1f} {r['ticket_ms']['p95'] or 0:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+        print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Result caches shared by the agents and the retriever.
+
+Two storage backends implement the same small get/set interface:
+
+    MemoryCache   per-process LRU with TTL (default)
+    SQLiteCache   one SQLite file in WAL mode shared by every worker process
+                  on the host, with atomic upserts and a shared LRU/TTL
+                  eviction policy
+
+Select with CACHE_BACKEND=memory|sqlite|none; CACHE_PATH, CACHE_MAX_ENTRIES
+and CACHE_TTL_SECONDS tune it. Callers use get_cache(namespace), which adds
+hit/miss accounting to /metrics.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from observability.metrics import record_cache_lookup
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL_SECONDS = 3600.0
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable key for JSON-serializable parts."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCache:
+    """Cache stored in a WAL-mode SQLite file that all worker processes share.
+
+    Writes are single upsert statements, so readers in other processes never
+    see partial values. Recency is tracked approximately (accessed_at is only
+    rewritten when it is older than touch_interval) to keep hits read-only
+    in the common case; eviction of expired and least-recently-used rows runs
+    every evict_every writes from whichever process happens to write.
+    """
+
+    touch_interval = 30.0
+    evict_every = 100
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at, accessed_at = row
+        if expires_at < now:
+            return None
+        if now - accessed_at > self.touch_interval:
+            self._conn().execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float):
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at, "
+            "accessed_at = excluded.accessed_at",
+            (key, json.dumps(value, default=str), now + ttl, now),
+        )
+        self._writes += 1
+        if self._writes % self.evict_every == 0:
+            self.evict()
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        self._conn().execute("DELETE FROM cache")
+
+    def evict(self):
+        """Drop expired rows, then the least recently used rows beyond max_entries."""
+        conn = self._conn()
+        conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM cache WHERE key IN ("
+            " SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+
+class NamespacedCache:
+    """View over a storage backend that prefixes keys and records hit rates."""
+
+    def __init__(self, backend, namespace: str, ttl: float):
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            value = self.backend.get(f"{self.namespace}:{key}")
+        except sqlite3.Error as e:
+            print(f"Warning: Cache read failed ({self.namespace}): {e}")
+            value = None
+        record_cache_lookup(self.namespace, value is not None)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        try:
+            self.backend.set(f"{self.namespace}:{key}", value, self.ttl if ttl is None else ttl)
+        except sqlite3.Error as e:
+            print(f"Warning: Cache write failed ({self.namespace}): {e}")
+
+    def delete(self, key: str):
+        self.backend.delete(f"{self.namespace}:{key}")
+
+
+class NullCache:
+    """Cache that never stores anything (CACHE_BACKEND=none)."""
+
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        pass
+
+    def delete(self, key: str):
+        pass
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """The process-wide storage backend selected by CACHE_BACKEND."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                kind = os.getenv("CACHE_BACKEND", "memory").lower()
+                max_entries = int(os.getenv("CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES)))
+                if kind == "sqlite":
+                    _backend = SQLiteCache(os.getenv("CACHE_PATH", "support_cache.sqlite"), max_entries)
+                elif kind == "none":
+                    _backend = False
+                else:
+                    _backend = MemoryCache(max_entries)
+    return _backend
+
+
+def get_cache(namespace: str, ttl: Optional[float] = None, required: bool = False):
+    """A cache for one kind of result (e.g. 'classification', 'retrieval').
+
+    Pass required=True for stores the app depends on (not just an
+    optimisation); they fall back to a private MemoryCache when caching is
+    disabled.
+    """
+    backend = get_backend()
+    if backend is False:
+        if not required:
+            return NullCache()
+        backend = MemoryCache()
+    default_ttl = float(os.getenv("CACHE_TTL_SECONDS", str(DEFAULT_TTL_SECONDS)))
+    return NamespacedCache(backend, namespace, default_ttl if ttl is None else ttl)
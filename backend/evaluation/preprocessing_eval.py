@@ -0,0 +1,64 @@
+"""
+Regression cases for long-ticket preprocessing (agents.preprocessing).
+
+Each case in preprocessing_cases.jsonl is a ticket (its "lines") with
+substrings that prepare() must keep and ones it must remove. "min_tokens"
+overrides PREPROCESS_MIN_TOKENS for the case, so the thread and signature
+heuristics can be checked on tickets short enough to read. Exits non-zero
+if any case fails.
+
+Usage (from backend/):
+    python -m evaluation.preprocessing_eval [--cases evaluation/preprocessing_cases.jsonl] [--verbose]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agents import preprocessing
+
+DEFAULT_CASES = Path(__file__).parent / "preprocessing_cases.jsonl"
+
+
+def load_cases(path: Path) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run_case(case: Dict[str, Any]) -> List[str]:
+    """Failures for one case (empty if it passed)."""
+    default = preprocessing.PREPROCESS_MIN_TOKENS
+    preprocessing.PREPROCESS_MIN_TOKENS = case.get("min_tokens", default)
+    try:
+        prepared, _ = preprocessing.prepare("\n".join(case["lines"]))
+    finally:
+        preprocessing.PREPROCESS_MIN_TOKENS = default
+    failures = [f"removed {text!r}" for text in case.get("keep", []) if text not in prepared]
+    failures += [f"kept {text!r}" for text in case.get("drop", []) if text in prepared]
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check ticket preprocessing against labelled cases.")
+    parser.add_argument("--cases", type=Path, default=DEFAULT_CASES)
+    parser.add_argument("--verbose", action="store_true", help="Print the prepared text of failing cases")
+    args = parser.parse_args()
+
+    failed = 0
+    for case in load_cases(args.cases):
+        failures = run_case(case)
+        print(f"{'✅' if not failures else '❌'} {case['id']:<28} {'; '.join(failures)}")
+        if failures:
+            failed += 1
+            if args.verbose:
+                print(preprocessing.prepare("\n".join(case["lines"]))[0])
+    print(f"\n{failed} of {len(load_cases(args.cases))} cases failed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
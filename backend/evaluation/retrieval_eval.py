@@ -0,0 +1,243 @@
+"""
+Retrieval quality-versus-latency evaluation.
+
+Runs a labelled query set against one or more retrieval configurations and
+reports recall@k, MRR and nDCG@k next to per-query latency, so retrieval
+speed-ups can be checked for quality loss.
+
+Relevance is labelled per (document, section) pair; a section retrieved as
+several chunks only counts once, at its best rank.
+
+Configurations:
+    near_text          Weaviate vector search (needs a running Weaviate)
+    hybrid:<alpha>     Weaviate hybrid search, alpha in [0, 1] (1 = pure vector)
+    memory             Local in-memory lexical index over backend/knowledge_base
+    embed:<provider>   Dense index of backend/knowledge_base built with an embedding
+                       provider (store.embeddings: local, openai) and searched with
+                       NumPy; also reports index build time and chunks/s, so the
+                       local CPU provider can be weighed against OpenAI embeddings
+
+Usage (from backend/):
+    python -m evaluation.retrieval_eval --configs near_text,hybrid:0.5,memory,embed:local,embed:openai --k 3,5 \
+        [--queries evaluation/queries.jsonl --queries my_queries.jsonl] [--output results.md]
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from store.index_versions import active_collection
+from store.weaviate_client import COLLECTION_NAME
+
+DEFAULT_QUERIES = Path(__file__).parent / "queries.jsonl"
+
+Hit = Tuple[str, str]  # (document, section)
+SearchFn = Callable[[str, int], List[Hit]]
+
+
+def load_queries(paths: List[Path]) -> List[Dict]:
+    """Load labelled queries from one or more JSONL files."""
+    queries = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    queries.append(json.loads(line))
+    return queries
+
+
+def _dedupe(hits: List[Hit]) -> List[Hit]:
+    seen, unique = set(), []
+    for hit in hits:
+        if hit not in seen:
+            seen.add(hit)
+            unique.append(hit)
+    return unique
+
+
+def score_query(hits: List[Hit], relevant: List[Dict], k: int) -> Dict[str, float]:
+    """recall@k, reciprocal rank and nDCG@k for one ranked list."""
+    grades = {(r["document"], r["section"]): r.get("grade", 1) for r in relevant}
+    ranked = _dedupe(hits)[:k]
+
+    found = [hit for hit in ranked if hit in grades]
+    recall = len(found) / len(grades) if grades else 0.0
+
+    reciprocal_rank = 0.0
+    for rank, hit in enumerate(ranked, 1):
+        if hit in grades:
+            reciprocal_rank = 1.0 / rank
+            break
+
+    dcg = sum((2 ** grades[hit] - 1) / math.log2(rank + 1) for rank, hit in enumerate(ranked, 1) if hit in grades)
+    ideal = sorted(grades.values(), reverse=True)[:k]
+    idcg = sum((2 ** grade - 1) / math.log2(rank + 1) for rank, grade in enumerate(ideal, 1))
+    return {"recall": recall, "mrr": reciprocal_rank, "ndcg": dcg / idcg if idcg else 0.0}
+
+
+def _hits(objects) -> List[Hit]:
+    return [(obj.properties.get("document", ""), obj.properties.get("section", "")) for obj in objects]
+
+
+def _embedding_search(provider_name: str) -> SearchFn:
+    """Embed the knowledge-base chunks in one batch and search them by cosine."""
+    import numpy as np
+    from benchmarks.fixtures import load_knowledge_base_chunks
+    from store.embeddings import get_provider
+
+    provider = get_provider(provider_name)
+    chunks = load_knowledge_base_chunks()
+    started = time.perf_counter()
+    vectors = provider.embed_documents([chunk["content"] for chunk in chunks])
+    build_seconds = time.perf_counter() - started
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    hits = [(chunk["document"], chunk["section"]) for chunk in chunks]
+
+    def search(query: str, k: int) -> List[Hit]:
+        scores = vectors @ provider.embed_query(query)
+        return [hits[row] for row in np.argsort(-scores)[:k]]
+
+    search.index_stats = {
+        "provider": provider.name,
+        "model": provider.model,
+        "dimensions": int(vectors.shape[1]),
+        "chunks": len(chunks),
+        "build_s": round(build_seconds, 3),
+        "chunks_per_s": round(len(chunks) / build_seconds, 1) if build_seconds else None,
+    }
+    return search
+
+
+def build_search(config: str, clients: Dict[str, object]) -> SearchFn:
+    """Turn a configuration name into a search function."""
+    kind, _, param = config.partition(":")
+
+    if kind == "memory":
+        from benchmarks.fixtures import create_memory_client
+        collection = create_memory_client().collections.get(COLLECTION_NAME)
+        return lambda query, k: _hits(collection.query.near_text(query=query, limit=k).objects)
+
+    if kind == "embed":
+        return _embedding_search(param or "local")
+
+    if kind in ("near_text", "hybrid"):
+        if "weaviate" not in clients:
+            from store.weaviate_client import connect_weaviate
+            clients["weaviate"] = connect_weaviate(skip_init_checks=True)
+        collection = active_collection(clients["weaviate"])
+        if kind == "near_text":
+            return lambda query, k: _hits(collection.query.near_text(query=query, limit=k).objects)
+        alpha = float(param) if param else 0.5
+        return lambda query, k: _hits(collection.query.hybrid(query=query, alpha=alpha, limit=k).objects)
+
+    raise ValueError(f"Unknown retrieval configuration '{config}'")
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def evaluate(config: str, search: SearchFn, queries: List[Dict], k: int, category_prefix: bool) -> Dict:
+    """Run every query through one configuration and aggregate metrics."""
+    totals = {"recall": 0.0, "mrr": 0.0, "ndcg": 0.0}
+    latencies = []
+    per_query = []
+
+    # Warm up connections and lazily built indexes so they don't skew the first query
+    search(queries[0]["query"], k)
+
+    for item in queries:
+        query = f"{item['category']}: {item['query']}" if category_prefix and item.get("category") else item["query"]
+        started = time.perf_counter()
+        hits = search(query, k)
+        latency_ms = (time.perf_counter() - started) * 1000
+        scores = score_query(hits, item["relevant"], k)
+        for key in totals:
+            totals[key] += scores[key]
+        latencies.append(latency_ms)
+        per_query.append({"id": item.get("id"), "latency_ms": round(latency_ms, 2), **{m: round(v, 3) for m, v in scores.items()}})
+
+    n = len(queries)
+    return {
+        "config": config,
+        "k": k,
+        "queries": n,
+        f"recall@{k}": round(totals["recall"] / n, 3),
+        "mrr": round(totals["mrr"] / n, 3),
+        f"ndcg@{k}": round(totals["ndcg"] / n, 3),
+        "latency_p50_ms": round(_percentile(latencies, 50), 2),
+        "latency_p95_ms": round(_percentile(latencies, 95), 2),
+        "index": getattr(search, "index_stats", None),
+        "per_query": per_query,
+    }
+
+
+def format_table(rows: List[Dict], csv: bool = False) -> str:
+    headers = ["config", "k", "recall@k", "MRR", "nDCG@k", "p50 ms", "p95 ms", "index build s", "chunks/s"]
+    lines = []
+    for row in rows:
+        k = row["k"]
+        index = row.get("index") or {}
+        lines.append([row["config"], str(k), f"{row[f'recall@{k}']:.3f}", f"{row['mrr']:.3f}",
+                      f"{row[f'ndcg@{k}']:.3f}", f"{row['latency_p50_ms']:.1f}", f"{row['latency_p95_ms']:.1f}",
+                      f"{index['build_s']:.3f}" if index else "-", f"{index['chunks_per_s']}" if index else "-"])
+    if csv:
+        return "\n".join(",".join(line) for line in [headers] + lines) + "\n"
+    table = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+    table.extend("| " + " | ".join(line) + " |" for line in lines)
+    return "\n".join(table) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality against latency.")
+    parser.add_argument("--configs", default="memory", help="Comma-separated retrieval configurations")
+    parser.add_argument("--k", default="3,5", help="Comma-separated cut-offs")
+    parser.add_argument("--queries", action="append", type=Path, help="Labelled JSONL query file (repeatable)")
+    parser.add_argument("--category-prefix", action="store_true", help="Prefix queries with their category like RAGRetriever does")
+    parser.add_argument("--output", type=Path, default=None, help="Write the table (.md or .csv) and a .json with per-query details")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries or [DEFAULT_QUERIES])
+    ks = [int(k) for k in args.k.split(",")]
+    clients: Dict[str, object] = {}
+
+    print(f"🧪 Evaluating {len(queries)} queries")
+    rows = []
+    try:
+        for config in [c.strip() for c in args.configs.split(",") if c.strip()]:
+            try:
+                search = build_search(config, clients)
+            except Exception as e:
+                print(f"   ❌ Skipping {config}: {e}")
+                continue
+            for k in ks:
+                row = evaluate(config, search, queries, k, args.category_prefix)
+                rows.append(row)
+                print(f"   ✓ {config} @ k={k}: recall {row[f'recall@{k}']:.3f}, p95 {row['latency_p95_ms']:.1f} ms")
+    finally:
+        for client in clients.values():
+            client.close()
+
+    print()
+    print(format_table(rows))
+
+    if args.output:
+        args.output.write_text(format_table(rows, csv=args.output.suffix == ".csv"), encoding="utf-8")
+        details = args.output.with_suffix(".json")
+        details.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"💾 Table written to {args.output}, per-query details to {details}")
+
+
+if __name__ == "__main__":
+    main()
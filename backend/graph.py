@@ -1,11 +1,68 @@
+import os
+from typing import Any, Dict, Optional
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.messages import AIMessage, HumanMessage
 from state.state_manager import TicketState
 from agents.classifier import QueryClassifier
 from agents.retriever import RAGRetriever
 from agents.generator import ResponseGenerator
 from agents.validator import QualityValidator
+from agents.fused import ClassifyAndDraft
+from agents.preprocessing import agent_query, prepare
+from agents.routing import needs_strong_redraft
+from observability.degradation import SKIP_VALIDATION, TEMPLATE_ONLY
+from observability.instrumentation import instrument_node
+from observability.metrics import counter
+from observability.tracing import set_attributes
+from state.checkpointer import create_checkpointer
+from store.chunk_store import context_text
+from store.faq_index import lookup
+
+_DEFAULT_CHECKPOINTER = object()
+
+# Below this best-chunk relevance the knowledge base can't answer the ticket,
+# so generation and validation are skipped in favour of a templated escalation.
+MIN_RETRIEVAL_RELEVANCE = float(os.getenv("MIN_RETRIEVAL_RELEVANCE", "0.7"))
+ESCALATE_ON_MOCK_FALLBACK = os.getenv("ESCALATE_ON_MOCK_FALLBACK", "true").lower() in ("1", "true", "yes")
+
+# "staged" runs classify -> retrieve -> generate; "fused" retrieves with the raw query and
+# classifies and drafts in a single LLM call. Requests can override it with pipeline_mode.
+PIPELINE_MODES = ("staged", "fused")
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "staged")
+
+EARLY_EXITS = counter("support_early_exit_total", "Tickets escalated without generation/validation.", ["reason"])
+
+ESCALATION_TEMPLATE = """Thank you for reaching out, and sorry for the trouble.
+
+I wasn't able to find a documented answer to your {category_text}question, so I've passed your ticket to a specialist on our {team} team. They will review the details and get back to you as soon as possible.
+
+If you have any additional information (screenshots, error messages, or steps to reproduce), please reply to this message and it will be added to your ticket.
+
+Best regards,
+Support Team"""
+
+# Highest degradation level: no LLM calls, point the customer at the best-matching documentation
+TEMPLATE_ANSWER = """Thank you for reaching out.
+
+While we look into your request, this part of our documentation should help:
+
+**{section}**
+
+{excerpt}
+
+A member of our team will review your ticket and follow up if this doesn't resolve it.
+
+Best regards,
+Support Team"""
+TEMPLATE_EXCERPT_CHARS = 600
+SKIP_VALIDATION_URGENCIES = ("Low", "Medium")
+
+ESCALATION_TEAMS = {
+    "Billing": "billing",
+    "Technical": "technical support",
+    "Feature": "product",
+    "Bug": "engineering",
+}
 
 
 async def parse_input(state: TicketState) -> TicketState:
@@ -15,20 +72,150 @@ async def parse_input(state: TicketState) -> TicketState:
     """
     messages = state.get("messages", [])
     customer_query = state.get("customer_query", "")
+    # Record the resolved mode so callers can report which pipeline ran
+    mode = {"pipeline_mode": pipeline_mode(state)}
 
     # If customer_query is already set (from frontend context), use it
     if customer_query:
-        return {}
+        return mode
 
     # Otherwise, try to extract from the last human message
     for msg in reversed(messages):
         if isinstance(msg, HumanMessage) or (hasattr(msg, 'type') and msg.type == 'human'):
             content = msg.content if hasattr(msg, 'content') else str(msg)
             # The content might contain both the instruction and ticket context
-            return {"customer_query": content}
+            return {"customer_query": content, **mode}
 
     # Fallback - no query found
-    return {"customer_query": "No query provided"}
+    return {"customer_query": "No query provided", **mode}
+
+
+async def preprocess(state: TicketState) -> TicketState:
+    """Strip quoted replies, signatures and log noise from the query; customer_query keeps the raw text."""
+    prepared, stats = prepare(state.get("customer_query", ""))
+    if stats["removed"]:
+        print(f"✂️  Preprocessed ticket: ~{stats['raw_tokens']} -> ~{stats['prepared_tokens']} tokens {stats['removed']}")
+    set_attributes(raw_tokens=stats["raw_tokens"], prepared_tokens=stats["prepared_tokens"])
+    return {"prepared_query": prepared, "preprocessing": stats}
+
+
+def pipeline_mode(state: TicketState) -> str:
+    """The request's pipeline mode, defaulting to PIPELINE_MODE."""
+    mode = state.get("pipeline_mode") or PIPELINE_MODE
+    return mode if mode in PIPELINE_MODES else "staged"
+
+
+async def match_faq(state: TicketState) -> TicketState:
+    """Answer from the pre-built FAQ index when the query matches an intent closely enough."""
+    # Source-restricted requests want an answer from those sources, not the stock one
+    if state.get("selected_sources"):
+        return {"faq_match": None}
+    intent, score = lookup(agent_query(state, "faq"))
+    if intent is None:
+        return {"faq_match": None}
+    print(f"⚡ FAQ intent '{intent['id']}' matched ({score:.2f}), skipping generation")
+    return {
+        "faq_match": {"intent": intent["id"], "score": round(score, 3)},
+        "category": intent["category"],
+        "sentiment": intent["sentiment"],
+        "urgency": intent["urgency"],
+        "context_ids": [source["chunk_id"] for source in intent["rag_sources"] if source.get("chunk_id")],
+        "rag_sources": intent["rag_sources"],
+        "retrieval_fallback": None,
+        "draft_response": intent["draft_response"],
+        "confidence_score": intent["confidence_score"],
+        "critique": intent["critique"],
+        "needs_human_review": intent["needs_human_review"],
+    }
+
+
+def degradation_level(state: TicketState) -> int:
+    return state.get("degradation_level") or 0
+
+
+def route_after_input(state: TicketState) -> str:
+    """FAQ matches are already answered; fused mode and template-only answers retrieve first."""
+    if state.get("faq_match"):
+        return "format_response"
+    if pipeline_mode(state) == "fused" or degradation_level(state) >= TEMPLATE_ONLY:
+        return "retrieve"
+    return "classify"
+
+
+def route_after_retrieval(state: TicketState) -> str:
+    """Skip generation and validation when retrieval found nothing worth answering from."""
+    fallback = state.get("retrieval_fallback")
+    if fallback and ESCALATE_ON_MOCK_FALLBACK:
+        return "escalate"
+    relevances = [source.get("relevance", 0.0) for source in state.get("rag_sources") or []]
+    if not fallback and (not relevances or max(relevances) < MIN_RETRIEVAL_RELEVANCE):
+        return "escalate"
+    if degradation_level(state) >= TEMPLATE_ONLY:
+        return "template_answer"
+    return "classify_and_draft" if pipeline_mode(state) == "fused" else "generate"
+
+
+def route_after_generation(state: TicketState) -> str:
+    """Leave validation to the caller when it asked to validate asynchronously, or skip it under load."""
+    if state.get("defer_validation"):
+        return "format_response"
+    if degradation_level(state) >= SKIP_VALIDATION and state.get("urgency") in SKIP_VALIDATION_URGENCIES:
+        return "format_response"
+    return "validate"
+
+
+def route_after_validation(state: TicketState) -> str:
+    """Send a low-scoring fast-tier draft back for a strong-tier rewrite."""
+    return "upgrade_model" if needs_strong_redraft(state) else "format_response"
+
+
+async def upgrade_model(state: TicketState) -> TicketState:
+    """Move the remaining calls of this run to the strong model tier."""
+    print(f"⬆️  Fast-tier draft scored {state.get('confidence_score', 0.0):.2f}, redrafting on the strong tier")
+    return {"model_escalation": "low_score"}
+
+
+async def escalate(state: TicketState) -> TicketState:
+    """Return a templated escalation draft instead of calling the generator and validator."""
+    category = state.get("category") or ""
+    fallback = state.get("retrieval_fallback")
+    if fallback:
+        reason = f"mock_fallback:{fallback}"
+    else:
+        best = max((source.get("relevance", 0.0) for source in state.get("rag_sources") or []), default=0.0)
+        reason = f"low_relevance:{best:.2f}<{MIN_RETRIEVAL_RELEVANCE:.2f}"
+    EARLY_EXITS.inc(reason=reason.split(":")[0])
+
+    draft = ESCALATION_TEMPLATE.format(
+        category_text=f"{category.lower()} " if category else "",
+        team=ESCALATION_TEAMS.get(category, "support"),
+    )
+    return {
+        "draft_response": draft,
+        "confidence_score": 0.0,
+        "needs_human_review": True,
+        "critique": "Knowledge base had no relevant content; skipped generation and validation and escalated.",
+        "early_exit": reason,
+    }
+
+
+async def template_answer(state: TicketState) -> TicketState:
+    """Answer from the top retrieved chunk without any LLM call (highest degradation level)."""
+    sources = state.get("rag_sources") or []
+    texts = await context_text(state)
+    if not sources or not texts:
+        return await escalate(state)
+    EARLY_EXITS.inc(reason="degraded")
+    excerpt = texts[0].strip()
+    if len(excerpt) > TEMPLATE_EXCERPT_CHARS:
+        excerpt = excerpt[:TEMPLATE_EXCERPT_CHARS].rsplit(" ", 1)[0] + " ..."
+    return {
+        "draft_response": TEMPLATE_ANSWER.format(section=sources[0].get("section", "Documentation"), excerpt=excerpt),
+        "confidence_score": 0.0,
+        "needs_human_review": True,
+        "critique": "Served a template answer under load; the draft was not generated or validated.",
+        "early_exit": "degraded:template_only",
+    }
 
 
 async def format_response(state: TicketState) -> TicketState:
@@ -65,35 +252,84 @@ async def format_response(state: TicketState) -> TicketState:
     }
 
 
-def create_support_graph():
-    """Create the CopilotKit-compatible support agent graph."""
+def create_agents() -> Dict[str, Any]:
+    """Initialize the agents used by the graph (opens the Weaviate connection)."""
+    generator = ResponseGenerator()
+    return {
+        "classifier": QueryClassifier(),
+        "retriever": RAGRetriever(),
+        "generator": generator,
+        "validator": QualityValidator(),
+        "fused": ClassifyAndDraft(generator),
+    }
+
+
+def build_support_workflow(agents: Optional[Dict[str, Any]] = None) -> StateGraph:
+    """Build the (uncompiled) support agent workflow."""
 
     # Initialize Agents
-    classifier = QueryClassifier()
-    retriever = RAGRetriever()
-    generator = ResponseGenerator()
-    validator = QualityValidator()
+    agents = agents or create_agents()
+    classifier = agents["classifier"]
+    retriever = agents["retriever"]
+    generator = agents["generator"]
+    validator = agents["validator"]
+    fused = agents.get("fused") or ClassifyAndDraft(generator)
 
     # Create Graph
     workflow = StateGraph(TicketState)
 
-    # Add Nodes
-    workflow.add_node("parse_input", parse_input)
-    workflow.add_node("classify", classifier.run)
-    workflow.add_node("retrieve", retriever.run)
-    workflow.add_node("generate", generator.run)
-    workflow.add_node("validate", validator.run)
-    workflow.add_node("format_response", format_response)
+    # Add Nodes (each wrapped with latency/error instrumentation)
+    nodes = {
+        "parse_input": parse_input,
+        "preprocess": preprocess,
+        "match_faq": match_faq,
+        "classify": classifier.run,
+        "retrieve": retriever.run,
+        "generate": generator.run,
+        "classify_and_draft": fused.run,
+        "validate": validator.run,
+        "escalate": escalate,
+        "template_answer": template_answer,
+        "upgrade_model": upgrade_model,
+        "format_response": format_response,
+    }
+    for name, node in nodes.items():
+        workflow.add_node(name, instrument_node(name, node))
 
-    # Define Edges - linear pipeline with input parsing and output formatting
+    # Define Edges - linear pipeline with input parsing, preprocessing and output formatting,
+    # short-circuiting to a templated escalation when retrieval comes up empty.
+    # Fused mode goes parse_input -> retrieve -> classify_and_draft instead.
+    # A low-scoring fast-tier draft loops once through upgrade_model -> generate -> validate.
+    # A pre-answered FAQ match goes straight from match_faq to format_response.
+    # At the template_only degradation level retrieve leads to template_answer instead.
     workflow.set_entry_point("parse_input")
-    workflow.add_edge("parse_input", "classify")
+    workflow.add_edge("parse_input", "preprocess")
+    workflow.add_edge("preprocess", "match_faq")
+    workflow.add_conditional_edges("match_faq", route_after_input, {
+        "classify": "classify", "retrieve": "retrieve", "format_response": "format_response"})
     workflow.add_edge("classify", "retrieve")
-    workflow.add_edge("retrieve", "generate")
-    workflow.add_edge("generate", "validate")
-    workflow.add_edge("validate", "format_response")
+    workflow.add_conditional_edges("retrieve", route_after_retrieval, {
+        "generate": "generate", "classify_and_draft": "classify_and_draft", "escalate": "escalate",
+        "template_answer": "template_answer"})
+    for drafting_node in ("generate", "classify_and_draft"):
+        workflow.add_conditional_edges(drafting_node, route_after_generation,
+                                       {"validate": "validate", "format_response": "format_response"})
+    workflow.add_conditional_edges("validate", route_after_validation,
+                                   {"upgrade_model": "upgrade_model", "format_response": "format_response"})
+    workflow.add_edge("upgrade_model", "generate")
+    workflow.add_edge("escalate", "format_response")
+    workflow.add_edge("template_answer", "format_response")
     workflow.add_edge("format_response", END)
 
-    # Compile with checkpointer for CopilotKit state management
-    memory = MemorySaver()
-    return workflow.compile(checkpointer=memory)
+    return workflow
+
+
+def create_support_graph(checkpointer=_DEFAULT_CHECKPOINTER):
+    """Create the CopilotKit-compatible support agent graph.
+
+    By default the graph is compiled with the checkpointer selected by the
+    CHECKPOINTER env var; pass checkpointer=None for a stateless graph.
+    """
+    if checkpointer is _DEFAULT_CHECKPOINTER:
+        checkpointer = create_checkpointer()
+    return build_support_workflow().compile(checkpointer=checkpointer)
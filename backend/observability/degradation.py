@@ -0,0 +1,167 @@
+"""
+Load-adaptive degradation of the agent pipeline.
+
+The controller watches three live signals:
+
+    queue    ticket jobs waiting for a worker plus pipeline runs in flight
+    latency  p95 of LLM call latency over the last DEGRADE_WINDOW_SECONDS
+    errors   share of agent node runs over the same window that failed or
+             hit an error the agent handled itself (validator, retrieval)
+
+Each signal is divided by its threshold (DEGRADE_QUEUE_DEPTH,
+DEGRADE_LLM_LATENCY_MS, DEGRADE_ERROR_RATE) and the largest ratio is the
+pressure. DEGRADE_STEPS lists the pressures at which each level starts:
+
+    0  normal
+    1  reduced_retrieval   retrieval k drops to DEGRADED_RETRIEVAL_K
+    2  skip_validation     + no QualityValidator for Low/Medium urgency
+    3  cheap_generator     + drafts always on the fast model tier
+    4  template_only       + no LLM calls; a templated answer from the top source
+
+The level rises as soon as the pressure crosses a step. It falls one level
+for every DEGRADE_RECOVERY_SECONDS the pressure stays below
+DEGRADE_RECOVERY_RATIO of the current step. The API fixes the level when a
+request starts (state "degradation_level"); the graph and the agents read it
+from there, so a run never changes level halfway.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from observability.metrics import counter, gauge
+
+DEGRADATION_ENABLED = os.getenv("DEGRADATION_ENABLED", "true").lower() in ("1", "true", "yes")
+DEGRADE_QUEUE_DEPTH = float(os.getenv("DEGRADE_QUEUE_DEPTH", "32"))
+DEGRADE_LLM_LATENCY_MS = float(os.getenv("DEGRADE_LLM_LATENCY_MS", "8000"))
+DEGRADE_ERROR_RATE = float(os.getenv("DEGRADE_ERROR_RATE", "0.2"))
+DEGRADE_WINDOW_SECONDS = float(os.getenv("DEGRADE_WINDOW_SECONDS", "60"))
+DEGRADE_RECOVERY_SECONDS = float(os.getenv("DEGRADE_RECOVERY_SECONDS", "30"))
+DEGRADE_RECOVERY_RATIO = float(os.getenv("DEGRADE_RECOVERY_RATIO", "0.8"))
+DEGRADE_STEPS = tuple(float(step) for step in os.getenv("DEGRADE_STEPS", "1.0,1.5,2.0,3.0").split(","))
+DEGRADE_MAX_LEVEL = int(os.getenv("DEGRADE_MAX_LEVEL", "4"))
+DEGRADED_RETRIEVAL_K = int(os.getenv("DEGRADED_RETRIEVAL_K", "2"))
+
+NORMAL, REDUCED_RETRIEVAL, SKIP_VALIDATION, CHEAP_GENERATOR, TEMPLATE_ONLY = range(5)
+LEVEL_NAMES = ("normal", "reduced_retrieval", "skip_validation", "cheap_generator", "template_only")
+
+# Nodes whose failures count towards the error rate (the rest never call out)
+AGENT_NODES = ("classify", "retrieve", "generate", "classify_and_draft", "validate")
+
+# Too few samples say nothing about a rate or a percentile
+MIN_LATENCY_SAMPLES = 5
+MIN_NODE_SAMPLES = 10
+
+DEGRADATION_LEVEL = gauge("support_degradation_level", "Current pipeline degradation level (0 = normal).")
+DEGRADATION_PRESSURE = gauge("support_degradation_pressure", "Load signal divided by its threshold.", ["signal"])
+DEGRADATION_CHANGES = counter("support_degradation_changes_total", "Degradation level changes.", ["direction"])
+
+
+class DegradationController:
+    """Turns windowed load signals into a degradation level with hysteresis."""
+
+    def __init__(self):
+        self._latencies: Deque[Tuple[float, float]] = deque()
+        self._nodes: Deque[Tuple[float, bool]] = deque()
+        self._queue_depth = 0
+        self._in_flight = 0
+        self._level = NORMAL
+        self._changed_at = time.monotonic()
+        self._last_hot = self._changed_at
+        self._lock = threading.Lock()
+
+    def observe_llm_latency(self, seconds: float):
+        with self._lock:
+            self._latencies.append((time.monotonic(), seconds))
+
+    def observe_node(self, name: str, failed: bool):
+        if name not in AGENT_NODES:
+            return
+        with self._lock:
+            self._nodes.append((time.monotonic(), failed))
+
+    def observe_agent_error(self):
+        """An error an agent caught and fell back from; its node still reports success."""
+        with self._lock:
+            self._nodes.append((time.monotonic(), True))
+
+    def set_queue_depth(self, depth: int):
+        self._queue_depth = depth
+
+    @contextmanager
+    def track_run(self):
+        """Count a pipeline run as in flight while the block runs."""
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _prune(self, now: float):
+        horizon = now - DEGRADE_WINDOW_SECONDS
+        while self._latencies and self._latencies[0][0] < horizon:
+            self._latencies.popleft()
+        while self._nodes and self._nodes[0][0] < horizon:
+            self._nodes.popleft()
+
+    def signals(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Each signal divided by its threshold (1.0 = at the threshold)."""
+        now = now or time.monotonic()
+        with self._lock:
+            self._prune(now)
+            latencies = sorted(seconds for _, seconds in self._latencies)
+            failures = [failed for _, failed in self._nodes]
+            queue = self._queue_depth + self._in_flight
+        latency = 0.0
+        if len(latencies) >= MIN_LATENCY_SAMPLES:
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            latency = p95 * 1000 / DEGRADE_LLM_LATENCY_MS
+        errors = (sum(failures) / len(failures) / DEGRADE_ERROR_RATE) if len(failures) >= MIN_NODE_SAMPLES else 0.0
+        return {"queue": round(queue / DEGRADE_QUEUE_DEPTH, 3), "latency": round(latency, 3), "errors": round(errors, 3)}
+
+    def level(self, now: Optional[float] = None) -> int:
+        """The level for a request starting now."""
+        if not DEGRADATION_ENABLED:
+            return NORMAL
+        now = now or time.monotonic()
+        signals = self.signals(now)
+        pressure = max(signals.values())
+        for name, value in signals.items():
+            DEGRADATION_PRESSURE.set(value, signal=name)
+        target = min(DEGRADE_MAX_LEVEL, sum(1 for step in DEGRADE_STEPS if pressure >= step))
+
+        with self._lock:
+            current = self._level
+            if current and pressure >= DEGRADE_STEPS[current - 1] * DEGRADE_RECOVERY_RATIO:
+                self._last_hot = now
+            if target > current:
+                new = target
+            else:
+                # One level down per quiet DEGRADE_RECOVERY_SECONDS, never below what the pressure calls for
+                quiet = now - max(self._last_hot, self._changed_at)
+                new = max(target, current - int(quiet // DEGRADE_RECOVERY_SECONDS))
+            if new != current:
+                self._level, self._changed_at = new, now
+        if new != current:
+            DEGRADATION_CHANGES.inc(direction="up" if new > current else "down")
+            DEGRADATION_LEVEL.set(new)
+            print(f"{'🔻' if new > current else '🔺'} Degradation level {current} -> {new} ({LEVEL_NAMES[new]}), "
+                  f"signals {signals}")
+        return new
+
+    def status(self) -> Dict[str, Any]:
+        return {"level": self._level, "name": LEVEL_NAMES[self._level], "signals": self.signals()}
+
+
+controller = DegradationController()
+
+
+def describe(level: Optional[int]) -> Dict[str, Any]:
+    """Metadata block for a run's level."""
+    level = level or NORMAL
+    return {"level": level, "name": LEVEL_NAMES[level]}
@@ -0,0 +1,118 @@
+"""
+Timing hooks for graph nodes and token accounting for LLM calls.
+
+Per-request timings are collected in a context variable so that a request
+handler can attach them to its response without threading extra fields
+through TicketState.
+"""
+
+import functools
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from observability.degradation import controller as degradation
+from observability.metrics import LLM_LATENCY, LLM_TOKENS, NODE_ERRORS, NODE_LATENCY
+from observability.tracing import record_span, span
+
+_request_timings: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_timings", default=None)
+
+
+def start_request_timings() -> Dict[str, Any]:
+    """Begin collecting timings for the current request and return the collector."""
+    timings = {"started": time.perf_counter(), "nodes": {}, "llm": {}}
+    _request_timings.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[Dict[str, Any]]:
+    return _request_timings.get()
+
+
+def summarize_timings(timings: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert a collector into the JSON-friendly block returned to clients."""
+    if not timings:
+        return {}
+    return {
+        "total_ms": round((time.perf_counter() - timings["started"]) * 1000, 1),
+        "nodes_ms": {name: round(seconds * 1000, 1) for name, seconds in timings["nodes"].items()},
+        "llm": timings["llm"],
+    }
+
+
+def instrument_node(name: str, fn: Callable[..., Awaitable[Dict]]) -> Callable[..., Awaitable[Dict]]:
+    """Wrap a graph node so its latency and failures are recorded."""
+
+    @functools.wraps(fn)
+    async def wrapper(state, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            with span(f"node:{name}"):
+                result = await fn(state, *args, **kwargs)
+        except Exception:
+            NODE_ERRORS.inc(node=name)
+            degradation.observe_node(name, failed=True)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            NODE_LATENCY.observe(elapsed, node=name)
+            timings = _request_timings.get()
+            if timings is not None:
+                timings["nodes"][name] = timings["nodes"].get(name, 0.0) + elapsed
+        degradation.observe_node(name, failed=False)
+        return result
+
+    return wrapper
+
+
+def _token_usage(message: Any) -> Dict[str, int]:
+    """Read prompt/completion token counts from a chat model response."""
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        return {
+            "prompt_tokens": int(usage.get("input_tokens", 0) or 0),
+            "completion_tokens": int(usage.get("output_tokens", 0) or 0),
+        }
+    metadata = getattr(message, "response_metadata", None) or {}
+    usage = metadata.get("token_usage") or {}
+    return {
+        "prompt_tokens": int(usage.get("prompt_tokens", 0) or 0),
+        "completion_tokens": int(usage.get("completion_tokens", 0) or 0),
+    }
+
+
+def _server_processing_ms(message: Any) -> Optional[float]:
+    """Time the provider reports spending on the request, if response headers were kept."""
+    metadata = getattr(message, "response_metadata", None) or {}
+    headers = metadata.get("headers") or {}
+    value = headers.get("openai-processing-ms")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def record_llm_call(agent: str, message: Any, elapsed: float) -> Dict[str, int]:
+    """Record latency and token usage of one LLM call made by an agent."""
+    usage = _token_usage(message)
+    LLM_LATENCY.observe(elapsed, agent=agent)
+    degradation.observe_llm_latency(elapsed)
+    LLM_TOKENS.inc(usage["prompt_tokens"], agent=agent, kind="prompt")
+    LLM_TOKENS.inc(usage["completion_tokens"], agent=agent, kind="completion")
+
+    attributes = dict(usage)
+    processing_ms = _server_processing_ms(message)
+    if processing_ms is not None:
+        # Whatever the provider didn't spend processing was spent queued or in transit
+        attributes["server_processing_ms"] = processing_ms
+        attributes["queue_ms"] = round(max(0.0, elapsed * 1000 - processing_ms), 1)
+    record_span(f"llm:{agent}", elapsed, **attributes)
+
+    timings = _request_timings.get()
+    if timings is not None:
+        entry = timings["llm"].setdefault(agent, {"calls": 0, "latency_ms": 0.0, "prompt_tokens": 0, "completion_tokens": 0})
+        entry["calls"] += 1
+        entry["latency_ms"] = round(entry["latency_ms"] + elapsed * 1000, 1)
+        entry["prompt_tokens"] += usage["prompt_tokens"]
+        entry["completion_tokens"] += usage["completion_tokens"]
+    return usage
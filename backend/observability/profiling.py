@@ -0,0 +1,128 @@
+"""
+Opt-in profiling for a live worker.
+
+Two tools, both off unless PROFILING_ENABLED=true:
+
+    sample_stacks()   a sampling profiler: a background thread snapshots every
+                      thread's Python stack at a fixed interval and returns the
+                      counts in collapsed-stack format ("frame;frame;frame N"),
+                      which flamegraph.pl, speedscope and inferno read directly.
+                      The worker keeps serving while it runs.
+    profile_run()     a cProfile context manager for one request. Because
+                      asyncio interleaves coroutines on the same thread, the
+                      profile also contains whatever else the loop ran meanwhile.
+
+Profiles from profile_run() are written to PROFILE_DIR as .prof files (for
+snakeviz, flameprof or pstats) and fetched by id. When profiling is disabled
+the admin endpoints answer 404 and requests never start a profiler.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+MAX_SAMPLE_SECONDS = 60.0
+
+_sampling = threading.Lock()
+# cProfile allows one active profiler per thread, and requests share the event loop thread
+_profiling_request = threading.Lock()
+
+
+def profiling_enabled() -> bool:
+    return os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005, include_idle: bool = False) -> str:
+    """Sample all threads' stacks for `seconds` and return collapsed stacks.
+
+    Blocking: run it in a worker thread (asyncio.to_thread). Raises
+    RuntimeError if another sampling run is in progress.
+    """
+    if not _sampling.acquire(blocking=False):
+        raise RuntimeError("A sampling profile is already running")
+    try:
+        me = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        counts: Counter = Counter()
+        deadline = time.monotonic() + min(seconds, MAX_SAMPLE_SECONDS)
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                # Threads parked in the selector or a lock wait aren't using CPU
+                if not include_idle and stack and stack[0].split(":")[1] in ("select", "poll", "wait", "_wait_for_tstate_lock"):
+                    continue
+                thread = names.get(ident, f"thread-{ident}")
+                counts[";".join([thread] + stack[::-1])] += 1
+            time.sleep(interval)
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+    finally:
+        _sampling.release()
+
+
+class ProfileResult:
+    """Where a profile_run() capture was saved."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.path = os.path.join(PROFILE_DIR, f"{self.id}.prof")
+        self.elapsed_ms: Optional[float] = None
+
+    def summary(self) -> Dict:
+        return {"id": self.id, "elapsed_ms": self.elapsed_ms, "url": f"/admin/profiles/{self.id}"}
+
+
+@contextmanager
+def profile_run():
+    """Capture a cProfile of the enclosed block and save it under PROFILE_DIR.
+
+    Yields None (and profiles nothing) while another request is being profiled.
+    """
+    if not _profiling_request.acquire(blocking=False):
+        yield None
+        return
+    result = ProfileResult()
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        _profiling_request.release()
+        result.elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(result.path)
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """Path of a saved profile, or None for unknown (or malformed) ids."""
+    if not profile_id.isalnum():
+        return None
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.prof")
+    return path if os.path.exists(path) else None
+
+
+def profile_text(path: str, limit: int = 40, sort: str = "cumulative") -> str:
+    """Top functions of a saved profile as pstats text."""
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).sort_stats(sort).print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,210 @@
+"""
+Lightweight per-ticket tracing.
+
+A trace is started per API request and carried through the graph nodes via a
+context variable. Finished traces are written as one JSON line each to a local
+file by a background thread, so the request path never blocks on disk I/O.
+Traces are sampled at TRACE_SAMPLE_RATE; unsampled requests pay only for a
+context-variable lookup per span.
+"""
+
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+
+
+class Span:
+    """A timed operation inside a trace."""
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, duration_s: Optional[float] = None):
+        if duration_s is None:
+            duration_s = time.perf_counter() - self._started
+        self.duration_ms = round(duration_s * 1000, 3)
+        self.trace.spans.append(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """All spans recorded for one request."""
+
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.spans: List[Span] = []
+
+    def to_dict(self, root: Span) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "start_time": root.start_time,
+            "duration_ms": root.duration_ms,
+            "status": root.status,
+            "attributes": root.attributes,
+            "spans": [span.to_dict() for span in self.spans if span is not root],
+        }
+
+
+class JsonlExporter:
+    """Append finished traces to a JSONL file from a background thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, record: Dict[str, Any]):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.shutdown)
+        self._queue.put(record)
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+            batch = [record]
+            # Drain whatever else is queued so bursts become one write
+            while True:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    self._write(batch)
+                    return
+                batch.append(record)
+            self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                for record in batch:
+                    f.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            print(f"Warning: Could not write traces to {self.path}: {e}")
+
+    def shutdown(self):
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=2)
+
+
+_exporter = JsonlExporter(TRACE_EXPORT_PATH)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def _reset(token):
+    # Streaming generators may be closed from a different context on client disconnect
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        pass
+
+
+@contextmanager
+def start_trace(name: str, sample_rate: Optional[float] = None, **attributes):
+    """Start a sampled root span for a request; yields the span or None if not sampled."""
+    rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+    if rate <= 0 or random.random() >= rate:
+        token = _current_span.set(None)
+        try:
+            yield None
+        finally:
+            _reset(token)
+        return
+
+    trace = Trace(name)
+    root = Span(trace, name, None, attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException:
+        root.status = "error"
+        raise
+    finally:
+        _reset(token)
+        root.end()
+        _exporter.export(trace.to_dict(root))
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a child span of the current span; a no-op when the request is not sampled."""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.status = "error"
+        child.attributes["error"] = repr(e)
+        raise
+    finally:
+        _reset(token)
+        child.end()
+
+
+def record_span(name: str, duration_s: float, **attributes):
+    """Record an already finished operation as a child of the current span."""
+    parent = _current_span.get()
+    if parent is None:
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    child.start_time = time.time() - duration_s
+    child.end(duration_s)
+
+
+def set_attributes(**attributes):
+    """Attach attributes to the current span if the request is sampled."""
+    current = _current_span.get()
+    if current is not None:
+        current.set_attributes(**attributes)
+
+
+def current_trace_id() -> Optional[str]:
+    current = _current_span.get()
+    return current.trace.trace_id if current is not None else None
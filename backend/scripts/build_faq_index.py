@@ -0,0 +1,239 @@
+"""
+Build or refresh the pre-answered FAQ intent index (see store/faq_index.py).
+
+Mining: every knowledge-base section is a candidate intent, with its
+heading as the question. Every logged ticket query is mapped to the section
+that best answers it, and candidates are ranked by how many tickets asked
+about them (sections nobody asked about keep their knowledge-base order).
+Logged queries come from the trace export's weaviate:near_text spans and
+from any --tickets JSONL files with a "query" field. The top --max-intents
+sections asked about at least --min-tickets times (default 0, so a
+deployment without logs still gets an index) become intents. Their distinct
+ticket phrasings, plus the section heading, are the examples requests are
+matched against.
+
+Each new or stale intent is answered the way the pipeline would answer it:
+QueryClassifier, RAGRetriever, ResponseGenerator, then QualityValidator.
+It is kept only if the validator scores it at least FAQ_MIN_CONFIDENCE
+without asking for human review. Intents whose source sections are
+unchanged are reused as they are, so a refresh only pays for what changed.
+
+Usage (from backend/):
+    python scripts/build_faq_index.py [--tickets evaluation/queries.jsonl] [--min-tickets 0] [--force]
+
+scripts/setup_rag.py runs a refresh after every re-index when an index exists.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from store import chunk_store
+from store.chunking import MarkdownChunker, chunk_directory
+from store.faq_index import FAQ_INDEX_PATH, INDEX_VERSION, KNOWLEDGE_BASE_PATH, section_hashes, section_key, save_index
+from store.embeddings import semantic_search
+from store.index_versions import active_collection
+from store.memory import tokenize
+from store.weaviate_client import connect_weaviate
+
+FAQ_MIN_CONFIDENCE = float(os.getenv("FAQ_MIN_CONFIDENCE", "0.85"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+
+# The staged pipeline searches for "<Category>: <query>"
+_CATEGORY_PREFIX_RE = re.compile(r"^(Billing|Technical|Feature|Bug): ")
+_STOPWORDS = {"the", "and", "for", "you", "your", "our", "are", "was", "can", "how", "what", "why", "when",
+              "does", "with", "this", "that", "have", "has", "from", "there", "please", "my", "do", "is", "it"}
+
+
+def logged_queries(trace_path: str, ticket_files: List[str]) -> List[str]:
+    """Customer queries from the trace export and from JSONL ticket files."""
+    queries = []
+    if os.path.exists(trace_path):
+        with open(trace_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    trace = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                for span in trace.get("spans", []):
+                    if span.get("name") == "weaviate:near_text" and span.get("attributes", {}).get("query"):
+                        queries.append(_CATEGORY_PREFIX_RE.sub("", span["attributes"]["query"]))
+    for path in ticket_files:
+        with open(path, "r", encoding="utf-8") as f:
+            queries.extend(json.loads(line)["query"] for line in f if line.strip())
+    return [q.strip() for q in queries if q.strip()]
+
+
+def kb_sections(path: Path = KNOWLEDGE_BASE_PATH) -> Dict[str, str]:
+    """Heading of every '## ' section in the knowledge base, keyed by section_key(), in document order."""
+    if not path.exists():
+        return {}
+    return {section_key(chunk["document"], chunk["section"]): chunk["section"]
+            for chunk in chunk_directory(path, MarkdownChunker())}
+
+
+def mine_intents(client: Any, queries: List[str], min_tickets: int, max_intents: int,
+                 max_examples: int) -> List[Dict[str, Any]]:
+    """Every knowledge-base section is a candidate intent; logged queries are grouped by
+    their best-matching section and rank the candidates by how often they are asked."""
+    headings = kb_sections()
+    phrasings: Dict[str, Counter] = defaultdict(Counter)
+    if queries:
+        collection = active_collection(client)
+        for query in queries:
+            hits = semantic_search(client, collection, query, limit=1).objects
+            if not hits:
+                continue
+            props = hits[0].properties
+            key = section_key(props.get("document", "Unknown"), props.get("section", "Unknown"))
+            phrasings[key][query] += 1
+            headings.setdefault(key, props.get("section", ""))
+
+    # sorted() is stable, so sections nobody asked about keep their knowledge-base order
+    ranked = sorted(headings, key=lambda key: sum(phrasings[key].values()), reverse=True)
+    intents = []
+    for key in ranked[:max_intents]:
+        tickets = sum(phrasings[key].values())
+        if tickets < min_tickets:
+            break
+        examples = [query for query, _ in phrasings[key].most_common(max_examples)]
+        intents.append({
+            "id": key,
+            # Without logged phrasings the section heading is the question
+            "question": examples[0] if examples else headings[key],
+            "examples": examples + [headings[key]],
+            "ticket_count": tickets,
+        })
+    return intents
+
+
+def grounded_examples(intent: Dict[str, Any], chunks: Dict[str, str]) -> List[str]:
+    """Examples whose content words mostly appear in the answer's chunks.
+
+    A query the mining search mapped to the wrong section would otherwise
+    become an exact-match trigger for an answer that doesn't address it.
+    """
+    vocabulary = set(tokenize(" ".join(text or "" for text in chunks.values())))
+    kept = []
+    for example in intent["examples"]:
+        words = {w for w in tokenize(example) if len(w) > 2 and w not in _STOPWORDS}
+        if example in (intent["question"], intent["examples"][-1]) or \
+                (words and len(words & vocabulary) / len(words) >= 0.5):
+            kept.append(example)
+    return kept
+
+
+async def answer_intent(agents: Dict[str, Any], intent: Dict[str, Any], hashes: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Run classify/retrieve/generate/validate for the intent's question; None if it isn't good enough."""
+    state: Dict[str, Any] = {"customer_query": intent["question"], "selected_sources": None, "retrieval_handle": None}
+    state.update(await agents["classifier"].run(state))
+    state.update(await agents["retriever"].run(state))
+    if state.get("retrieval_fallback"):
+        print(f"   ✗ {intent['id']}: retrieval fell back to {state['retrieval_fallback']}")
+        return None
+    state.update(await agents["generator"].run(state))
+    state.update(await agents["validator"].run(state))
+    if state.get("needs_human_review") or state.get("confidence_score", 0.0) < FAQ_MIN_CONFIDENCE:
+        print(f"   ✗ {intent['id']}: validator scored {state.get('confidence_score', 0.0):.2f}")
+        return None
+
+    sources = {intent["id"]} | {section_key(s["document"], s["section"]) for s in state["rag_sources"]}
+    chunks = {chunk_id: chunk_store.get(chunk_id) for chunk_id in state.get("context_ids", [])}
+    print(f"   ✓ {intent['id']}: validator scored {state['confidence_score']:.2f}")
+    return {
+        **intent,
+        "examples": grounded_examples(intent, chunks),
+        "category": state.get("category"),
+        "sentiment": state.get("sentiment"),
+        "urgency": state.get("urgency"),
+        "draft_response": state["draft_response"],
+        "confidence_score": state["confidence_score"],
+        "critique": state.get("critique", ""),
+        "needs_human_review": False,
+        "rag_sources": state["rag_sources"],
+        "chunks": chunks,
+        # A source section missing from the knowledge base on disk hashes to None, i.e. always stale
+        "sources": {key: hashes.get(key) for key in sorted(sources)},
+        "generated_at": time.time(),
+    }
+
+
+def _existing_intents(path: str) -> Dict[str, Dict[str, Any]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != INDEX_VERSION:
+        return {}
+    return {intent["id"]: intent for intent in data["intents"]}
+
+
+async def build_index(path: str = FAQ_INDEX_PATH, ticket_files: Optional[List[str]] = None,
+                      min_tickets: int = 0, max_intents: int = 50, max_examples: int = 20,
+                      force: bool = False) -> Dict[str, int]:
+    """Mine intents and (re)generate the ones that are new or whose source sections changed."""
+    import graph
+
+    hashes = section_hashes(KNOWLEDGE_BASE_PATH)
+    existing = {} if force else _existing_intents(path)
+    queries = logged_queries(TRACE_EXPORT_PATH, ticket_files or [])
+    print(f"📥 {len(queries)} logged ticket queries")
+
+    client = connect_weaviate(skip_init_checks=True)
+    try:
+        intents = mine_intents(client, queries, min_tickets, max_intents, max_examples)
+    finally:
+        client.close()
+    print(f"🧭 {len(intents)} intents ({sum(1 for i in intents if i['ticket_count'])} asked about in logged tickets)")
+
+    agents = None
+    built, stats = [], Counter()
+    for intent in intents:
+        previous = existing.get(intent["id"])
+        if previous and all(hashes.get(key) == digest for key, digest in previous["sources"].items()):
+            # Unchanged sources: keep the answer, refresh the mined phrasings
+            refreshed = {**intent, "question": previous["question"]}
+            built.append({**previous, **refreshed, "examples": grounded_examples(refreshed, previous["chunks"])})
+            stats["reused"] += 1
+            continue
+        agents = agents or graph.create_agents()
+        answer = await answer_intent(agents, intent, hashes)
+        if answer is None:
+            stats["rejected"] += 1
+            continue
+        built.append(answer)
+        stats["regenerated" if previous else "generated"] += 1
+
+    save_index(path, built, hashes)
+    print(f"✅ Wrote {len(built)} intents to {path} ({dict(stats)})")
+    return dict(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the pre-answered FAQ intent index.")
+    parser.add_argument("--out", default=FAQ_INDEX_PATH)
+    parser.add_argument("--tickets", action="append", default=[], help="JSONL file of logged tickets with a 'query' field")
+    parser.add_argument("--min-tickets", type=int, default=0,
+                        help="Only sections at least this many logged tickets asked about become intents")
+    parser.add_argument("--max-intents", type=int, default=50)
+    parser.add_argument("--max-examples", type=int, default=20)
+    parser.add_argument("--force", action="store_true", help="Regenerate every intent, even unchanged ones")
+    args = parser.parse_args()
+
+    asyncio.run(build_index(args.out, args.tickets, args.min_tickets, args.max_intents, args.max_examples, args.force))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Export and import portable SupportDocs snapshots (see store/snapshot.py).
+
+Usage:
+    python scripts/index_snapshot.py export [--out snapshots/support_docs.snap] [--collection NAME]
+    python scripts/index_snapshot.py import snapshots/support_docs.snap [--no-activate]
+    python scripts/index_snapshot.py info snapshots/support_docs.snap
+
+export reads the active version (or --collection) with its stored vectors.
+import bulk-inserts the vectors into a new SupportDocs version, verifies it
+and switches the alias; nothing is sent to the embedding API. To skip
+Weaviate entirely, point a worker at the file with VECTOR_BACKEND=snapshot.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from store.index_versions import IndexVerificationError, resolve_collection
+from store.snapshot import SNAPSHOT_PATH, SnapshotError, export_collection, import_snapshot, read_header
+from store.weaviate_client import connect_weaviate
+
+
+def print_info(path: str):
+    header = read_header(path)
+    embedding = header["embedding"]
+    print(f"📦 {path}  ({os.path.getsize(path) / 1024 / 1024:.1f} MB, format v{header['format_version']})")
+    print(f"   collection: {header['collection']}")
+    print(f"   objects:    {header['count']}")
+    print(f"   embedding:  {embedding.get('provider', 'openai')} {embedding['model']} ({embedding['dimensions']} dims)")
+    print(f"   created:    {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(header['created_at']))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export/import SupportDocs snapshots.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_parser = sub.add_parser("export", help="Dump a collection and its vectors to a snapshot file")
+    export_parser.add_argument("--out", default=SNAPSHOT_PATH)
+    export_parser.add_argument("--collection", help="Version to export (default: the active one)")
+    export_parser.add_argument("--model", help="Embedding model to record if the collection config doesn't say")
+    import_parser = sub.add_parser("import", help="Load a snapshot into a new SupportDocs version")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--no-activate", action="store_true", help="Import and verify without switching the alias")
+    info_parser = sub.add_parser("info", help="Show a snapshot's header")
+    info_parser.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        print_info(args.path)
+        return
+
+    client = connect_weaviate(skip_init_checks=True)
+    started = time.perf_counter()
+    try:
+        if args.command == "export":
+            name = args.collection or resolve_collection(client)
+            header = export_collection(client, name, args.out, model=args.model)
+            print(f"✅ Exported {header['count']} objects from {name} in {time.perf_counter() - started:.1f}s")
+            print_info(args.out)
+        else:
+            result = import_snapshot(client, args.path, make_active=not args.no_activate)
+            print(f"✅ Imported {result['count']} objects into {result['collection']} "
+                  f"in {time.perf_counter() - started:.1f}s (no embedding calls)")
+    except (SnapshotError, IndexVerificationError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Inspect and switch the blue/green versions of the SupportDocs collection.
+
+Usage:
+    python scripts/index_versions.py status
+    python scripts/index_versions.py rollback
+    python scripts/index_versions.py activate SupportDocs_v20250101120000
+    python scripts/index_versions.py prune [--keep 2]
+
+Running API workers pick up a switch within INDEX_ALIAS_TTL_SECONDS.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from store.index_versions import (INDEX_KEEP_VERSIONS, IndexVerificationError, activate, describe,
+                                  prune_versions, rollback)
+from store.weaviate_client import connect_weaviate
+
+
+def print_status(client):
+    status = describe(client)
+    print(f"📚 {status['alias']} → {status['active']}")
+    print(f"   previous: {status['previous'] or 'none'}")
+    for name in status["versions"]:
+        count = client.collections.get(name).aggregate.over_all(total_count=True).total_count
+        marker = "●" if name == status["active"] else ("↩" if name == status["previous"] else " ")
+        print(f"   {marker} {name}  ({count} objects)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage versioned SupportDocs collections.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Show the active, previous and retained versions")
+    sub.add_parser("rollback", help="Switch back to the previously active version")
+    activate_parser = sub.add_parser("activate", help="Point SupportDocs at a specific version")
+    activate_parser.add_argument("name")
+    prune_parser = sub.add_parser("prune", help="Delete old versions (active and previous are kept)")
+    prune_parser.add_argument("--keep", type=int, default=INDEX_KEEP_VERSIONS)
+    args = parser.parse_args()
+
+    client = connect_weaviate(skip_init_checks=True)
+    try:
+        if args.command == "rollback":
+            rollback(client)
+        elif args.command == "activate":
+            activate(client, args.name)
+        elif args.command == "prune":
+            removed = prune_versions(client, keep=args.keep)
+            print(f"🧹 Removed {len(removed)} old versions")
+        print_status(client)
+    except IndexVerificationError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,14 @@ import sys
 from pathlib import Path
 import weaviate
 from weaviate.classes.config import Property, DataType, Configure
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
 
 sys.path.append(str(Path(__file__).parent.parent))
 from dotenv import load_dotenv
 load_dotenv()
 
+from store.chunking import MarkdownChunker
+from store.index_versions import IndexVerificationError, active_collection, new_version_name, publish_version
+
 print("=" * 60)
 print("🚀 Quick RAG Setup")
 print("=" * 60)
@@ -31,21 +32,19 @@ if not client.is_ready():
 
 print("✅ Connected to Weaviate")
 
-# Delete existing collection
-if client.collections.exists("SupportDocs"):
-    client.collections.delete("SupportDocs")
-    print("🗑️  Deleted existing collection")
-
-# Create collection
-print("\n📝 Creating SupportDocs collection...")
+# Build into a new version; the active one keeps serving until the alias swap
+collection_name = new_version_name()
+print(f"\n📝 Creating {collection_name} collection...")
 client.collections.create(
-    name="SupportDocs",
+    name=collection_name,
     properties=[
         Property(name="content", data_type=DataType.TEXT),
         Property(name="document", data_type=DataType.TEXT),
         Property(name="section", data_type=DataType.TEXT),
+        Property(name="heading_path", data_type=DataType.TEXT),
         Property(name="category", data_type=DataType.TEXT),
         Property(name="chunk_index", data_type=DataType.INT),
+        Property(name="token_count", data_type=DataType.INT),
     ],
     vectorizer_config=Configure.Vectorizer.text2vec_openai(
         model="text-embedding-3-small"
@@ -53,82 +52,18 @@ client.collections.create(
 )
 print("✅ Collection created")
 
-# Initialize text splitter
-text_splitter = RecursiveCharacterTextSplitter(
-    chunk_size=800,
-    chunk_overlap=150,
-    separators=["\n## ", "\n### ", "\n\n", "\n", ". ", " ", ""]
-)
-
 # Process documents
 kb_path = Path(__file__).parent.parent / "knowledge_base"
-md_files = list(kb_path.glob("*.md"))
+md_files = sorted(kb_path.glob("*.md"))
 
 print(f"\n📚 Found {len(md_files)} documents")
 
+chunker = MarkdownChunker()
 all_chunks = []
 
 for md_file in md_files:
     print(f"\n📄 Processing: {md_file.name}")
-
-    with open(md_file, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # Determine category
-    category_map = {
-        "billing": "Billing & Payments",
-        "technical": "Technical Support",
-        "features": "Features & Usage"
-    }
-    category = "General"
-    for key, value in category_map.items():
-        if key in md_file.stem.lower():
-            category = value
-            break
-
-    # Extract sections
-    sections = []
-    current_section = "Introduction"
-    current_content = []
-
-    for line in content.split("\n"):
-        if line.startswith("## "):
-            if current_content:
-                sections.append({
-                    "section": current_section,
-                    "content": "\n".join(current_content).strip()
-                })
-                current_content = []
-            current_section = line.replace("## ", "").strip()
-        else:
-            current_content.append(line)
-
-    if current_content:
-        sections.append({
-            "section": current_section,
-            "content": "\n".join(current_content).strip()
-        })
-
-    # Chunk sections
-    doc_chunks = []
-    for section_data in sections:
-        section_name = section_data["section"]
-        section_content = section_data["content"]
-
-        if not section_content.strip():
-            continue
-
-        chunks = text_splitter.split_text(section_content)
-
-        for idx, chunk in enumerate(chunks):
-            doc_chunks.append({
-                "content": chunk,
-                "document": md_file.name,
-                "section": section_name,
-                "category": category,
-                "chunk_index": idx
-            })
-
+    doc_chunks = list(chunker.chunk_file(md_file))
     all_chunks.extend(doc_chunks)
     print(f"   → Created {len(doc_chunks)} chunks")
 
@@ -136,7 +71,7 @@ print(f"\n📊 Total: {len(all_chunks)} chunks")
 
 # Index chunks
 print("\n💾 Indexing chunks...")
-collection = client.collections.get("SupportDocs")
+collection = client.collections.get(collection_name)
 
 with collection.batch.dynamic() as batch:
     for i, chunk in enumerate(all_chunks):
@@ -146,19 +81,25 @@ with collection.batch.dynamic() as batch:
 
 print(f"✅ Indexed {len(all_chunks)} chunks")
 
-# Verify
-total = collection.aggregate.over_all(total_count=True)
-print(f"✅ Verification: {total.total_count} documents in Weaviate")
-
-# Test retrieval
-print("\n🧪 Testing Retrieval\n")
-
 test_queries = [
     "How do I request a refund?",
     "API authentication error",
     "How to enable dark mode?"
 ]
 
+# Verify counts and smoke queries, then switch SupportDocs to the new version
+try:
+    publish_version(client, collection_name, len(all_chunks), test_queries)
+except IndexVerificationError as e:
+    print(f"❌ {e}")
+    print(f"ℹ️  The active collection is unchanged; {collection_name} was kept for inspection")
+    client.close()
+    sys.exit(1)
+
+# Test retrieval
+print("\n🧪 Testing Retrieval\n")
+collection = active_collection(client)
+
 for query in test_queries:
     print(f"\n🔍 Query: '{query}'")
 
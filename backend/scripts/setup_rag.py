@@ -1,21 +1,21 @@
 """
 State-of-the-Art RAG Setup Script
-- Smart document chunking with overlap
-- Metadata tracking (document, section, page)
+- Token-aware streaming markdown chunking with overlap (store.chunking)
+- Metadata tracking (document, section, heading path)
 - Weaviate v4 with Hybrid Search (Vector + BM25)
-- OpenAI embeddings (text-embedding-3-small)
+- Pluggable embeddings (EMBEDDING_PROVIDER): OpenAI text-embedding-3-small via
+  Weaviate's vectorizer, or the local CPU provider with vectors computed here
+- Blue/green re-indexing: builds a new SupportDocs version, verifies it and
+  switches the alias, so live queries never see a missing collection
+- Refreshes the FAQ intent index (scripts/build_faq_index.py), if there is one
 """
 
 import os
 import sys
 from pathlib import Path
-from typing import List, Dict
 import weaviate
 from weaviate.classes.config import Configure, Property, DataType
 from weaviate.classes.init import Auth
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-import re
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
@@ -23,6 +23,16 @@ sys.path.append(str(Path(__file__).parent.parent))
 from dotenv import load_dotenv
 load_dotenv()
 
+from store.chunking import MarkdownChunker
+from store.embeddings import get_provider, query_vector, vectorized_by_weaviate
+from store.index_versions import (IndexVerificationError, active_collection, new_version_name, publish_version,
+                                  record_embedding)
+
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+
+# Must each return something from a new version before it goes live
+SMOKE_QUERIES = ["How do I request a refund?", "API authentication error 401", "How to enable dark mode?"]
+
 
 class RAGIndexer:
     """State-of-the-art RAG indexer with smart chunking and metadata."""
@@ -32,15 +42,12 @@ class RAGIndexer:
         self.weaviate_key = os.getenv("WEAVIATE_API_KEY")
         self.openai_key = os.getenv("OPENAI_API_KEY")
         self.client = None
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        self.collection_name = None  # Versioned collection being built
+        self.indexed_count = 0
+        self.embedding_provider = get_provider()
 
-        # Smart chunking configuration
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=800,  # Optimal for retrieval
-            chunk_overlap=150,  # Preserve context across chunks
-            length_function=len,
-            separators=["\n## ", "\n### ", "\n\n", "\n", ". ", " ", ""]
-        )
+        # Token-bounded chunks (CHUNK_MAX_TOKENS / CHUNK_OVERLAP_TOKENS)
+        self.chunker = MarkdownChunker()
 
     def connect(self):
         """Connect to Weaviate."""
@@ -80,22 +87,23 @@ class RAGIndexer:
             return False
 
     def create_schema(self):
-        """Create Weaviate schema with Hybrid Search capabilities."""
+        """Create a new versioned collection with Hybrid Search capabilities.
+
+        The active version keeps serving queries until publish() swaps the alias.
+        """
         try:
-            # Delete existing collection if it exists
-            if self.client.collections.exists("SupportDocs"):
-                self.client.collections.delete("SupportDocs")
-                print("🗑️  Deleted existing SupportDocs collection")
+            self.collection_name = new_version_name()
+            embedding = self.embedding_provider.describe()
+            if vectorized_by_weaviate(embedding):
+                vectorizer = Configure.NamedVectors.text2vec_openai(name="default", model=embedding["model"])
+            else:
+                # Vectors are computed by the provider in index_documents()
+                vectorizer = Configure.NamedVectors.none(name="default")
 
             # Create collection with hybrid search (vector + BM25)
-            from weaviate.classes.config import VectorDistances
-
             self.client.collections.create(
-                name="SupportDocs",
-                vectorizer_config=[Configure.NamedVectors.text2vec_openai(
-                    name="default",
-                    model="text-embedding-3-small"
-                )],
+                name=self.collection_name,
+                vectorizer_config=[vectorizer],
                 properties=[
                     Property(
                         name="content",
@@ -117,106 +125,32 @@ class RAGIndexer:
                         data_type=DataType.TEXT,
                         description="Document category (Billing, Technical, Features)"
                     ),
+                    Property(
+                        name="heading_path",
+                        data_type=DataType.TEXT,
+                        description="Section and subsection headings, e.g. 'Refund Policy > Eligibility'"
+                    ),
                     Property(
                         name="chunk_index",
                         data_type=DataType.INT,
                         description="Index of chunk in document"
                     ),
                     Property(
-                        name="total_chunks",
+                        name="token_count",
                         data_type=DataType.INT,
-                        description="Total number of chunks in document"
+                        description="Chunk length in embedding-model tokens"
                     )
                 ]
             )
-            print("✅ Created SupportDocs collection with Hybrid Search")
+            record_embedding(self.client, self.collection_name, embedding)
+            print(f"✅ Created {self.collection_name} collection with Hybrid Search "
+                  f"({embedding['provider']} embeddings, {embedding['model']})")
             return True
 
         except Exception as e:
             print(f"❌ Error creating schema: {e}")
             return False
 
-    def extract_sections(self, content: str, filename: str) -> List[Dict]:
-        """Extract sections from markdown document."""
-        sections = []
-        current_section = "Introduction"
-        current_content = []
-
-        lines = content.split("\n")
-
-        for line in lines:
-            # Check for section headers
-            if line.startswith("## "):
-                # Save previous section
-                if current_content:
-                    sections.append({
-                        "section": current_section,
-                        "content": "\n".join(current_content).strip()
-                    })
-                    current_content = []
-
-                # Start new section
-                current_section = line.replace("## ", "").strip()
-            else:
-                current_content.append(line)
-
-        # Add last section
-        if current_content:
-            sections.append({
-                "section": current_section,
-                "content": "\n".join(current_content).strip()
-            })
-
-        return sections
-
-    def chunk_document(self, filepath: Path) -> List[Dict]:
-        """Chunk document with metadata."""
-        print(f"\n📄 Processing: {filepath.name}")
-
-        # Read document
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Determine category from filename
-        category_map = {
-            "billing": "Billing & Payments",
-            "technical": "Technical Support",
-            "features": "Features & Usage"
-        }
-        category = "General"
-        for key, value in category_map.items():
-            if key in filepath.stem.lower():
-                category = value
-                break
-
-        # Extract sections
-        sections = self.extract_sections(content, filepath.name)
-
-        all_chunks = []
-
-        for section_data in sections:
-            section_name = section_data["section"]
-            section_content = section_data["content"]
-
-            if not section_content.strip():
-                continue
-
-            # Chunk the section
-            chunks = self.text_splitter.split_text(section_content)
-
-            for idx, chunk in enumerate(chunks):
-                all_chunks.append({
-                    "content": chunk,
-                    "document": filepath.name,
-                    "section": section_name,
-                    "category": category,
-                    "chunk_index": idx,
-                    "total_chunks": len(chunks)
-                })
-
-        print(f"   → Created {len(all_chunks)} chunks")
-        return all_chunks
-
     def index_documents(self, knowledge_base_path: str):
         """Index all documents in knowledge base."""
         kb_path = Path(knowledge_base_path)
@@ -234,41 +168,58 @@ class RAGIndexer:
 
         print(f"\n📚 Found {len(md_files)} documents to index")
 
-        # Process all documents
-        all_chunks = []
-        for md_file in md_files:
-            chunks = self.chunk_document(md_file)
-            all_chunks.extend(chunks)
-
-        print(f"\n📊 Total chunks to index: {len(all_chunks)}")
-
-        # Batch insert into Weaviate
+        # Chunks stream straight from the files into the batch
         try:
-            collection = self.client.collections.get("SupportDocs")
-
-            # Insert in batches of 100
-            batch_size = 100
-            for i in range(0, len(all_chunks), batch_size):
-                batch = all_chunks[i:i + batch_size]
-
-                with collection.batch.dynamic() as batch_context:
-                    for chunk in batch:
-                        batch_context.add_object(properties=chunk)
-
-                print(f"   ✓ Indexed {min(i + batch_size, len(all_chunks))}/{len(all_chunks)} chunks")
-
-            print(f"\n✅ Successfully indexed {len(all_chunks)} chunks")
-
-            # Verify
-            total = collection.aggregate.over_all(total_count=True)
-            print(f"✅ Verification: {total.total_count} documents in Weaviate")
-
+            collection = self.client.collections.get(self.collection_name)
+            local = not vectorized_by_weaviate(self.embedding_provider.describe())
+            total = 0
+
+            with collection.batch.dynamic() as batch_context:
+                pending = []
+
+                def flush():
+                    # One embed_documents call per EMBEDDING_BATCH_SIZE chunks
+                    vectors = self.embedding_provider.embed_documents([c["content"] for c in pending])
+                    for chunk, vector in zip(pending, vectors):
+                        batch_context.add_object(properties=chunk, vector={"default": vector.tolist()})
+                    pending.clear()
+
+                for md_file in sorted(md_files):
+                    print(f"\n📄 Processing: {md_file.name}")
+                    count = 0
+                    for chunk in self.chunker.chunk_file(md_file):
+                        if local:
+                            pending.append(chunk)
+                            if len(pending) >= EMBEDDING_BATCH_SIZE:
+                                flush()
+                        else:
+                            batch_context.add_object(properties=chunk)
+                        count += 1
+                    total += count
+                    print(f"   → Indexed {count} chunks")
+                if pending:
+                    flush()
+
+            print(f"\n✅ Successfully indexed {total} chunks")
+            self.indexed_count = total
             return True
 
         except Exception as e:
             print(f"❌ Error indexing documents: {e}")
             return False
 
+    def publish(self):
+        """Verify the new version and make it the active SupportDocs collection."""
+        try:
+            result = publish_version(self.client, self.collection_name, self.indexed_count, SMOKE_QUERIES)
+            if result["previous"]:
+                print(f"ℹ️  Roll back with: python scripts/index_versions.py rollback  (previous: {result['previous']})")
+            return True
+        except IndexVerificationError as e:
+            print(f"❌ {e}")
+            print(f"ℹ️  The active collection is unchanged; {self.collection_name} was kept for inspection")
+            return False
+
     def test_retrieval(self):
         """Test retrieval with sample queries."""
         print("\n🧪 Testing Retrieval\n")
@@ -279,7 +230,7 @@ class RAGIndexer:
             ("How to enable dark mode?", "Features & Usage")
         ]
 
-        collection = self.client.collections.get("SupportDocs")
+        collection = active_collection(self.client)
 
         for query, expected_category in test_queries:
             print(f"\n🔍 Query: '{query}'")
@@ -288,6 +239,7 @@ class RAGIndexer:
             # Hybrid search (vector + keyword)
             response = collection.query.hybrid(
                 query=query,
+                vector=query_vector(self.client, collection, query),
                 limit=3,
                 return_metadata=["score"]
             )
@@ -303,6 +255,8 @@ class RAGIndexer:
             else:
                 print("   ❌ No results found")
 
+        print("\nℹ️  For recall@k / MRR / nDCG with latency, run: python -m evaluation.retrieval_eval --configs near_text,hybrid:0.5")
+
     def close(self):
         """Close Weaviate connection."""
         if self.client:
@@ -338,12 +292,26 @@ def main():
         indexer.close()
         return
 
-    # Step 4: Test retrieval
+    # Step 4: Verify and switch the alias to the new version
+    if not indexer.publish():
+        print("\n❌ Setup failed: New index version did not pass verification")
+        indexer.close()
+        return
+
+    # Step 5: Test retrieval
     indexer.test_retrieval()
 
     # Close connection
     indexer.close()
 
+    # Step 6: Regenerate pre-answered FAQ intents whose source sections changed
+    from store.faq_index import FAQ_INDEX_PATH
+    if os.path.exists(FAQ_INDEX_PATH):
+        import asyncio
+        from scripts.build_faq_index import build_index
+        print("\n🔁 Refreshing FAQ intent index")
+        asyncio.run(build_index(FAQ_INDEX_PATH))
+
     print("\n" + "=" * 60)
     print("✅ RAG Setup Complete!")
     print("=" * 60)
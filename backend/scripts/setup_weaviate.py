@@ -19,6 +19,8 @@ import weaviate
 from weaviate.classes.config import Configure, Property, DataType
 from dotenv import load_dotenv
 
+from store.index_versions import IndexVerificationError, new_version_name, publish_version
+
 load_dotenv()
 
 # Sample support documentation
@@ -91,15 +93,11 @@ def setup_weaviate():
 
         print("Connected successfully!")
 
-        # Check if collection exists and delete it for fresh setup
-        if client.collections.exists("SupportDocs"):
-            print("Deleting existing SupportDocs collection...")
-            client.collections.delete("SupportDocs")
-
-        # Create collection with OpenAI vectorizer
-        print("Creating SupportDocs collection...")
+        # Build a new version; the active SupportDocs collection is left alone until the swap
+        collection_name = new_version_name()
+        print(f"Creating {collection_name} collection...")
         support_docs = client.collections.create(
-            name="SupportDocs",
+            name=collection_name,
             vectorizer_config=Configure.Vectorizer.text2vec_openai(
                 model="text-embedding-3-small"
             ),
@@ -116,9 +114,13 @@ def setup_weaviate():
             for doc in SAMPLE_DOCS:
                 batch.add_object(properties=doc)
 
-        # Verify insertion
-        count = support_docs.aggregate.over_all(total_count=True).total_count
-        print(f"Successfully inserted {count} documents!")
+        # Verify insertion, then point SupportDocs at the new version
+        try:
+            result = publish_version(client, collection_name, len(SAMPLE_DOCS), ["How do I get a refund?"])
+        except IndexVerificationError as e:
+            print(f"ERROR: {e} (SupportDocs was left unchanged)")
+            return False
+        print(f"Successfully inserted {len(SAMPLE_DOCS)} documents into {result['active']}!")
 
         # Test a sample query
         print("\nTesting vector search...")
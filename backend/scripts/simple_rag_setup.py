@@ -9,6 +9,8 @@ sys.path.append(str(Path(__file__).parent.parent))
 from dotenv import load_dotenv
 load_dotenv()
 
+from store.index_versions import IndexVerificationError, new_version_name, publish_version
+
 print("🚀 Simple RAG Setup\n")
 
 # Connect
@@ -20,13 +22,12 @@ client = weaviate.connect_to_local(
 )
 print("✅ Connected\n")
 
-# Create schema
-if client.collections.exists("SupportDocs"):
-    client.collections.delete("SupportDocs")
+# Create schema in a new version; SupportDocs moves to it only after verification
+collection_name = new_version_name()
 
-print("📝 Creating collection...")
+print(f"📝 Creating collection {collection_name}...")
 client.collections.create(
-    name="SupportDocs",
+    name=collection_name,
     properties=[
         Property(name="content", data_type=DataType.TEXT),
         Property(name="document", data_type=DataType.TEXT),
@@ -132,7 +133,7 @@ chunks = [
 
 print(f"💾 Indexing {len(chunks)} chunks...\n")
 
-collection = client.collections.get("SupportDocs")
+collection = client.collections.get(collection_name)
 
 for i, chunk in enumerate(chunks, 1):
     collection.data.insert(chunk)
@@ -140,15 +141,22 @@ for i, chunk in enumerate(chunks, 1):
 
 print(f"\n✅ Indexed {len(chunks)} chunks")
 
-# Test
-print("\n🧪 Testing Retrieval\n")
-
 tests = [
     "How do I request a refund?",
     "API 401 error authentication",
     "enable dark mode"
 ]
 
+try:
+    publish_version(client, collection_name, len(chunks), tests)
+except IndexVerificationError as e:
+    print(f"❌ {e} (SupportDocs was left unchanged)")
+    client.close()
+    sys.exit(1)
+
+# Test
+print("\n🧪 Testing Retrieval\n")
+
 for query in tests:
     print(f"🔍 '{query}'")
     response = collection.query.near_text(query=query, limit=2)
@@ -0,0 +1,87 @@
+"""
+Print the slowest traces from a local trace export.
+
+Usage:
+    python scripts/slowest_traces.py [--path traces.jsonl] [--limit 10] [--span node:retrieve]
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+def load_traces(path: Path) -> List[Dict]:
+    """Read every trace record, skipping malformed lines."""
+    traces = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                traces.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"⚠️  Skipping malformed line {line_no}")
+    return traces
+
+
+def span_duration(trace: Dict, span_name: Optional[str]) -> float:
+    """Duration of the whole trace, or of the named span (summed if repeated)."""
+    if span_name is None:
+        return trace.get("duration_ms") or 0.0
+    return sum(s.get("duration_ms") or 0.0 for s in trace.get("spans", []) if s["name"] == span_name)
+
+
+def print_trace(trace: Dict):
+    print(f"\n🐢 {trace['name']}  {trace['duration_ms']:.1f} ms  trace_id={trace['trace_id']}  status={trace['status']}")
+    if trace.get("attributes"):
+        print(f"   attributes: {json.dumps(trace['attributes'], default=str)}")
+
+    # Print spans as a tree ordered by start time
+    children: Dict[Optional[str], List[Dict]] = {}
+    span_ids = {s["span_id"] for s in trace.get("spans", [])}
+    for s in sorted(trace.get("spans", []), key=lambda s: s["start_time"]):
+        parent = s["parent_id"] if s["parent_id"] in span_ids else None
+        children.setdefault(parent, []).append(s)
+
+    def walk(parent_id: Optional[str], depth: int):
+        for s in children.get(parent_id, []):
+            marker = "❌" if s["status"] == "error" else "•"
+            attrs = f"  {json.dumps(s['attributes'], default=str)}" if s["attributes"] else ""
+            print(f"   {'  ' * depth}{marker} {s['name']:<24} {s['duration_ms']:>9.1f} ms{attrs}")
+            walk(s["span_id"], depth + 1)
+
+    walk(None, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the slowest traces from a JSONL trace export.")
+    parser.add_argument("--path", default=os.getenv("TRACE_EXPORT_PATH", "traces.jsonl"), help="Trace export file")
+    parser.add_argument("--limit", type=int, default=10, help="Number of traces to print")
+    parser.add_argument("--span", default=None, help="Rank by this span's duration (e.g. node:retrieve) instead of the total")
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        print(f"❌ Trace file not found: {path}")
+        sys.exit(1)
+
+    traces = load_traces(path)
+    if args.span:
+        traces = [t for t in traces if any(s["name"] == args.span for s in t.get("spans", []))]
+    if not traces:
+        print("No traces found")
+        return
+
+    traces.sort(key=lambda t: span_duration(t, args.span), reverse=True)
+    ranked_by = args.span or "total duration"
+    print(f"📊 {len(traces)} traces in {path}, slowest {min(args.limit, len(traces))} by {ranked_by}:")
+    for trace in traces[:args.limit]:
+        print_trace(trace)
+
+
+if __name__ == "__main__":
+    main()
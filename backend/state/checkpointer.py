@@ -0,0 +1,236 @@
+"""
+Checkpointers for the support graph.
+
+The graph used to compile with an unbounded MemorySaver shared by every
+request. Checkpoints now live in per-ticket threads and are evicted by size
+and idle TTL:
+
+    CHECKPOINTER=memory   BoundedMemorySaver (default)
+    CHECKPOINTER=sqlite   BoundedSqliteSaver at CHECKPOINT_SQLITE_PATH, survives restarts
+    CHECKPOINTER=none     no checkpointing at all
+
+CHECKPOINT_MAX_THREADS and CHECKPOINT_TTL_SECONDS bound both backends, and
+CHECKPOINT_KEEP_PER_THREAD caps how many checkpoints a thread keeps: every
+write drops the thread's older checkpoints (and their pending writes and
+channel blobs), so re-running a ticket doesn't grow its thread forever.
+latest_checkpoint_bytes() reports the serialized size of the state a run left
+behind (the thread's latest checkpoint), independent of how many runs the
+thread has had.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from langgraph.checkpoint.memory import MemorySaver
+from observability.metrics import counter, gauge, histogram
+
+CHECKPOINT_EVICTIONS = counter("support_checkpoint_evictions_total", "Checkpoint threads evicted.", ["reason"])
+CHECKPOINT_THREADS = gauge("support_checkpoint_threads", "Conversation threads currently held by the checkpointer.")
+CHECKPOINT_BYTES = histogram("support_checkpoint_latest_bytes", "Serialized size of a ticket thread's latest checkpoint after a run.",
+                             buckets=(4096, 16384, 65536, 262144, 1048576, 4194304))
+
+DEFAULT_MAX_THREADS = 1000
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_KEEP_PER_THREAD = 10
+
+
+def _thread_id(config: Any) -> Optional[str]:
+    return (config or {}).get("configurable", {}).get("thread_id")
+
+
+class BoundedMemorySaver(MemorySaver):
+    """MemorySaver that drops least-recently-used threads beyond max_threads or idle past ttl_seconds,
+    and keeps only the latest keep_per_thread checkpoints of each thread (0 keeps all)."""
+
+    def __init__(self, max_threads: int = DEFAULT_MAX_THREADS, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 keep_per_thread: int = DEFAULT_KEEP_PER_THREAD, **kwargs):
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.keep_per_thread = keep_per_thread
+        self._last_used: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _touch(self, thread_id: str):
+        with self._lock:
+            self._last_used[thread_id] = time.monotonic()
+            self._last_used.move_to_end(thread_id)
+
+    def _evict(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._last_used:
+                thread_id, last_used = next(iter(self._last_used.items()))
+                if self.ttl_seconds and now - last_used > self.ttl_seconds:
+                    reason = "ttl"
+                elif len(self._last_used) > self.max_threads:
+                    reason = "size"
+                else:
+                    break
+                self._last_used.pop(thread_id)
+                super().delete_thread(thread_id)
+                CHECKPOINT_EVICTIONS.inc(reason=reason)
+            CHECKPOINT_THREADS.set(len(self._last_used))
+
+    def get_tuple(self, config):
+        thread_id = _thread_id(config)
+        result = super().get_tuple(config)
+        with self._lock:
+            if thread_id in self._last_used:
+                self._touch(thread_id)
+            elif thread_id is not None and not any(self.storage.get(thread_id, {}).values()):
+                # storage is a defaultdict; don't let lookups of unknown threads leave empty entries behind
+                self.storage.pop(thread_id, None)
+        return result
+
+    def _trim(self, thread_id: str, checkpoint_ns: str):
+        """Drop all but the latest keep_per_thread checkpoints of a namespace, with their writes and unused blobs."""
+        with self._lock:
+            checkpoints = self.storage[thread_id][checkpoint_ns]
+            if not self.keep_per_thread or len(checkpoints) <= self.keep_per_thread:
+                return
+            # Checkpoint ids are UUIDv6, so they sort by creation time
+            for checkpoint_id in sorted(checkpoints)[:-self.keep_per_thread]:
+                del checkpoints[checkpoint_id]
+                self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            referenced = {(channel, version)
+                          for saved, _, _ in checkpoints.values()
+                          for channel, version in self.serde.loads_typed(saved)["channel_versions"].items()}
+            for key in [key for key in self.blobs
+                        if key[:2] == (thread_id, checkpoint_ns) and key[2:] not in referenced]:
+                del self.blobs[key]
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        result = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = _thread_id(config)
+        if thread_id is not None:
+            self._trim(thread_id, result["configurable"]["checkpoint_ns"])
+            self._touch(thread_id)
+        self._evict()
+        return result
+
+    def thread_bytes(self, thread_id: str) -> int:
+        """Serialized size of everything stored for a thread (checkpoints, channel blobs, pending writes)."""
+        with self._lock:
+            total = sum(len(checkpoint[1]) + len(metadata[1])
+                        for namespace in self.storage.get(thread_id, {}).values()
+                        for checkpoint, metadata, _ in namespace.values())
+            total += sum(len(blob[1]) for key, blob in self.blobs.items() if key[0] == thread_id)
+            total += sum(len(write[2][1]) for key, writes in self.writes.items() if key[0] == thread_id
+                         for write in writes.values())
+        return total
+
+    async def athread_bytes(self, thread_id: str) -> int:
+        return self.thread_bytes(thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._last_used.pop(thread_id, None)
+            super().delete_thread(thread_id)
+            CHECKPOINT_THREADS.set(len(self._last_used))
+
+
+def _uuid6_timestamp(checkpoint_id: str) -> float:
+    """Unix time encoded in a LangGraph (UUIDv6) checkpoint id."""
+    value = int(checkpoint_id.replace("-", ""), 16)
+    ticks = ((value >> 80) << 12) | ((value >> 64) & 0x0FFF)
+    return (ticks - 0x01B21DD213814000) / 1e7
+
+
+def create_sqlite_saver(path: str, max_threads: int, ttl_seconds: float, keep_per_thread: int = DEFAULT_KEEP_PER_THREAD):
+    """AsyncSqliteSaver that prunes old threads and old checkpoints; requires langgraph-checkpoint-sqlite."""
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    class BoundedSqliteSaver(AsyncSqliteSaver):
+        """Keeps the latest keep_per_thread checkpoints of a thread on every write, and prunes threads
+        beyond max_threads or idle past ttl_seconds every prune_every writes."""
+
+        prune_every = 50
+
+        def __init__(self, conn):
+            super().__init__(conn)
+            self._puts = 0
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            result = await super().aput(config, checkpoint, metadata, new_versions)
+            if keep_per_thread:
+                await self.trim(result["configurable"]["thread_id"], result["configurable"]["checkpoint_ns"])
+            self._puts += 1
+            if self._puts % self.prune_every == 0:
+                await self.prune()
+            return result
+
+        async def trim(self, thread_id: str, checkpoint_ns: str):
+            """Delete all but the latest keep_per_thread checkpoints (and their writes) of a namespace."""
+            latest = ("SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+                      " ORDER BY checkpoint_id DESC LIMIT ?")
+            params = (thread_id, checkpoint_ns, thread_id, checkpoint_ns, keep_per_thread)
+            async with self.lock, self.conn.cursor() as cur:
+                await cur.execute("DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ?"
+                                  f" AND checkpoint_id NOT IN ({latest})", params)
+                await cur.execute("DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+                                  f" AND checkpoint_id NOT IN ({latest})", params)
+                await self.conn.commit()
+
+        async def athread_bytes(self, thread_id: str) -> int:
+            await self.setup()
+            async with self.lock, self.conn.execute(
+                "SELECT (SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints WHERE thread_id = ?)"
+                " + (SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes WHERE thread_id = ?)",
+                (thread_id, thread_id),
+            ) as cursor:
+                (total,) = await cursor.fetchone()
+            return total
+
+        async def prune(self):
+            await self.setup()
+            # Checkpoint ids are UUIDv6, so the greatest id of a thread is its most recent write
+            async with self.lock, self.conn.execute(
+                "SELECT thread_id, MAX(checkpoint_id) AS latest FROM checkpoints GROUP BY thread_id ORDER BY latest DESC"
+            ) as cursor:
+                rows = await cursor.fetchall()
+            CHECKPOINT_THREADS.set(len(rows))
+
+            now = time.time()
+            for position, (thread_id, latest) in enumerate(rows):
+                if position >= max_threads:
+                    reason = "size"
+                elif ttl_seconds and now - _uuid6_timestamp(latest) > ttl_seconds:
+                    reason = "ttl"
+                else:
+                    continue
+                await self.adelete_thread(thread_id)
+                CHECKPOINT_EVICTIONS.inc(reason=reason)
+
+    return BoundedSqliteSaver(aiosqlite.connect(path, check_same_thread=False))
+
+
+async def latest_checkpoint_bytes(checkpointer: Any, thread_id: str) -> Optional[int]:
+    """Serialized size of a thread's latest checkpoint and its metadata (None if there is none); recorded in /metrics."""
+    saved = await checkpointer.aget_tuple({"configurable": {"thread_id": thread_id}})
+    if saved is None:
+        return None
+    size = len(checkpointer.serde.dumps_typed(saved.checkpoint)[1]) + len(checkpointer.serde.dumps_typed(saved.metadata)[1])
+    CHECKPOINT_BYTES.observe(size)
+    return size
+
+
+def create_checkpointer(kind: Optional[str] = None):
+    """Build the checkpointer selected by CHECKPOINTER (returns None for 'none')."""
+    kind = (kind or os.getenv("CHECKPOINTER", "memory")).lower()
+    max_threads = int(os.getenv("CHECKPOINT_MAX_THREADS", str(DEFAULT_MAX_THREADS)))
+    ttl_seconds = float(os.getenv("CHECKPOINT_TTL_SECONDS", str(DEFAULT_TTL_SECONDS)))
+    keep_per_thread = int(os.getenv("CHECKPOINT_KEEP_PER_THREAD", str(DEFAULT_KEEP_PER_THREAD)))
+
+    if kind == "none":
+        return None
+    if kind == "sqlite":
+        path = os.getenv("CHECKPOINT_SQLITE_PATH", "checkpoints.sqlite")
+        return create_sqlite_saver(path, max_threads, ttl_seconds, keep_per_thread)
+    if kind != "memory":
+        print(f"Warning: Unknown CHECKPOINTER '{kind}', using memory")
+    return BoundedMemorySaver(max_threads=max_threads, ttl_seconds=ttl_seconds, keep_per_thread=keep_per_thread)
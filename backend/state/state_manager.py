@@ -1,4 +1,4 @@
-from typing import TypedDict, Annotated, List, Optional
+from typing import TypedDict, Annotated, Dict, List, Optional
 from langchain_core.messages import BaseMessage
 import operator
 
@@ -8,20 +8,32 @@ class TicketState(TypedDict):
     """
     # Input
     ticket_id: str
-    customer_query: str
+    customer_query: str  # Raw ticket text, kept for display
+    prepared_query: Optional[str]  # customer_query without quoted replies, signatures and log noise (agents.preprocessing)
+    preprocessing: Optional[dict]  # Token estimates before/after preprocessing and what was removed
     selected_sources: Optional[List[str]]  # Optional list of document names to filter retrieval
+    retrieval_handle: Optional[str]  # Handle from /api/suggest-sources whose candidates can be reused
+    pipeline_mode: Optional[str]  # 'staged' (classify, retrieve, generate) or 'fused' (retrieve, classify+draft in one call)
 
     # Processing
     category: Optional[str]  # 'Billing', 'Technical', 'Feature', 'Bug'
     sentiment: Optional[str]  # 'Positive', 'Neutral', 'Negative'
     urgency: Optional[str]  # 'Low', 'Medium', 'High', 'Critical'
-    retrieved_context: List[str]  # List of relevant doc strings
-    rag_sources: Optional[List[dict]]  # RAG source metadata
+    context_ids: List[str]  # Chunk ids of the retrieved context; text is in store.chunk_store
+    rag_sources: Optional[List[dict]]  # RAG source metadata (chunk_id, document, section, category, relevance)
+    retrieval_fallback: Optional[str]  # Why mock data was used ('not_connected', 'no_results', 'error'), if it was
+    early_exit: Optional[str]  # Why generation/validation were skipped, if they were
+    faq_match: Optional[dict]  # Pre-answered FAQ intent the draft came from ({'intent', 'score'}), if any
+    defer_validation: Optional[bool]  # Skip the validate node; the API validates in the background instead
+    model_tiers: Optional[Dict[str, str]]  # Model tier ('fast' or 'strong') each agent used
+    model_escalation: Optional[str]  # Why later calls were moved to the strong tier ('low_score', ...)
+    degradation_level: Optional[int]  # Load-degradation level fixed when the request started (observability.degradation)
 
     # Output
     draft_response: Optional[str]
     confidence_score: float
     critique: Optional[str]
+    validation_failed: Optional[bool]  # The validator errored; confidence_score/critique are its fallback, not a verdict
     needs_human_review: bool
 
     # Conversation History (for CopilotKit)
@@ -0,0 +1,178 @@
+"""
+Shared, read-only store of retrieved chunk text.
+
+TicketState used to carry every retrieved chunk twice (the full strings in
+retrieved_context and a preview copy in rag_sources), and every node's
+checkpoint kept its own copy. The retriever now puts compact references in
+the state: context_ids and a chunk_id plus relevance per rag_sources entry.
+The text itself lives here and is resolved only where it is needed: when
+prompts are built (context_text) and when responses are serialized
+(with_previews).
+
+Chunk ids are "<collection>/<uuid>" for vector-store objects. Index versions
+are never modified after they are published, so an id always names the same
+text. Chunks without an object id, such as mock data and old retrieval
+handles, use a content hash, "text/<sha1>". Entries live in the shared
+result cache (namespace "chunks", CHUNK_STORE_TTL_SECONDS). A miss on a
+vector-store id, such as a resumed checkpoint after a restart, is fetched
+back from the collection: all misses of a call in one fetch_objects per
+collection, over a shared client, and off the event loop for context_text
+and awith_previews.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from cache.store import get_cache
+
+CHUNK_STORE_TTL_SECONDS = float(os.getenv("CHUNK_STORE_TTL_SECONDS", "3600"))
+PREVIEW_CHARS = 150
+
+_chunks = get_cache("chunks", ttl=CHUNK_STORE_TTL_SECONDS, required=True)
+_client = None
+_client_lock = threading.Lock()
+
+
+def object_chunk_id(collection: str, object_uuid: Any) -> str:
+    return f"{collection}/{object_uuid}"
+
+
+def text_chunk_id(text: str) -> str:
+    return "text/" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def put(chunk_id: str, text: str) -> str:
+    _chunks.set(chunk_id, text)
+    return chunk_id
+
+
+def put_text(text: str) -> str:
+    """Store text that has no vector-store object behind it; returns its content-hash id."""
+    return put(text_chunk_id(text), text)
+
+
+def _shared_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            from store.weaviate_client import connect_weaviate
+            _client = connect_weaviate(skip_init_checks=True)
+        return _client
+
+
+def _reset_client():
+    """Drop the shared client after a failed fetch so the next miss reconnects."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def _fetch(chunk_ids: List[str]) -> Dict[str, str]:
+    """Texts of vector-store chunks, with one fetch_objects call per collection (blocking)."""
+    by_collection: Dict[str, List[str]] = defaultdict(list)
+    for chunk_id in chunk_ids:
+        collection, _, object_uuid = chunk_id.rpartition("/")
+        if collection and collection != "text":
+            by_collection[collection].append(object_uuid)
+    found: Dict[str, str] = {}
+    if not by_collection:
+        return found
+    from weaviate.classes.query import Filter
+    for collection, uuids in by_collection.items():
+        try:
+            response = _shared_client().collections.get(collection).query.fetch_objects(
+                filters=Filter.by_id().contains_any(uuids), limit=len(uuids))
+        except Exception as e:
+            print(f"Warning: Could not fetch {len(uuids)} chunks from {collection}: {e}")
+            _reset_client()
+            continue
+        for obj in response.objects:
+            found[object_chunk_id(collection, obj.uuid)] = obj.properties.get("content", "")
+    for chunk_id, text in found.items():
+        put(chunk_id, text)
+    return found
+
+
+def _cached(chunk_ids: Iterable[str]) -> Tuple[Dict[str, str], List[str]]:
+    """(texts found in the cache, ids that missed)."""
+    texts, missing = {}, []
+    for chunk_id in chunk_ids:
+        text = _chunks.get(chunk_id)
+        if text is None:
+            missing.append(chunk_id)
+        else:
+            texts[chunk_id] = text
+    return texts, missing
+
+
+def _in_order(chunk_ids: List[str], texts: Dict[str, str]) -> List[str]:
+    resolved = []
+    for chunk_id in chunk_ids:
+        if chunk_id not in texts:
+            print(f"Warning: Chunk {chunk_id} is no longer available")
+            continue
+        resolved.append(texts[chunk_id])
+    return resolved
+
+
+def get(chunk_id: str) -> Optional[str]:
+    text = _chunks.get(chunk_id)
+    if text is None:
+        text = _fetch([chunk_id]).get(chunk_id)
+    return text
+
+
+def resolve(chunk_ids: Iterable[str]) -> List[str]:
+    """Texts for chunk ids, in order; ids that can no longer be resolved are skipped."""
+    chunk_ids = list(chunk_ids)
+    texts, missing = _cached(chunk_ids)
+    if missing:
+        texts.update(_fetch(missing))
+    return _in_order(chunk_ids, texts)
+
+
+async def context_text(state: Dict[str, Any]) -> List[str]:
+    """The retrieved context of a ticket state as prompt-ready strings; misses are fetched off the event loop."""
+    chunk_ids = list(state.get("context_ids") or [])
+    texts, missing = _cached(chunk_ids)
+    if missing:
+        texts.update(await asyncio.to_thread(_fetch, missing))
+    return _in_order(chunk_ids, texts)
+
+
+def _previewed(sources: List[Dict[str, Any]], texts: Dict[str, str]) -> List[Dict[str, Any]]:
+    serialized = []
+    for source in sources:
+        source = dict(source)
+        text = texts.get(source.get("chunk_id"))
+        if text is not None:
+            source["content_preview"] = text[:PREVIEW_CHARS] + "..."
+        serialized.append(source)
+    return serialized
+
+
+def with_previews(sources: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """rag_sources for API responses, with content_preview resolved from the store."""
+    sources = sources or []
+    texts, missing = _cached(source["chunk_id"] for source in sources if source.get("chunk_id"))
+    if missing:
+        texts.update(_fetch(missing))
+    return _previewed(sources, texts)
+
+
+async def awith_previews(sources: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """with_previews() for async callers; misses are fetched off the event loop."""
+    sources = sources or []
+    texts, missing = _cached(source["chunk_id"] for source in sources if source.get("chunk_id"))
+    if missing:
+        texts.update(await asyncio.to_thread(_fetch, missing))
+    return _previewed(sources, texts)
@@ -0,0 +1,333 @@
+"""
+Streaming, token-aware markdown chunker shared by the indexing scripts.
+
+The indexers used to read each file into a list of lines, group it into
+'## ' sections and run RecursiveCharacterTextSplitter on every section,
+with chunk sizes counted in characters. MarkdownChunker does the same job in
+one pass over a file read in blocks and yields chunks as soon as they are full:
+
+- '## ' headings are hard chunk boundaries, '### ' headings extend the
+  heading path ("Refund Policy > Eligibility") reported with each chunk
+- paragraphs are packed into chunks of at most CHUNK_MAX_TOKENS tokens;
+  longer paragraphs are cut into token windows that end on a line break,
+  sentence end or space where possible
+- each chunk after the first in a section starts with the last
+  CHUNK_OVERLAP_TOKENS tokens of the one before it
+- headings and blank lines inside ``` fences are treated as code
+
+Tokens are counted with tiktoken (CHUNK_ENCODING, cl100k_base is what the
+text-embedding-3 models use). Without tiktoken, or when its encoding file
+can't be loaded, a regex word/punctuation tokenizer is used instead; it
+counts somewhat fewer tokens than cl100k for English prose.
+"""
+
+import bisect
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "200"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+CHUNK_ENCODING = os.getenv("CHUNK_ENCODING", "cl100k_base")
+
+CATEGORY_MAP = {
+    "billing": "Billing & Payments",
+    "technical": "Technical Support",
+    "features": "Features & Usage",
+}
+
+_SENTENCE_END_RE = re.compile(r"[.!?]\s")
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+_PARAGRAPH_SEPARATOR = "\n\n"
+_BLANK_LINE_RE = re.compile(r"\n[ \t]*\n")
+_HEADING_RE = re.compile(r"^(#{1,3}) (.*)$", re.MULTILINE)
+READ_BLOCK_CHARS = 1 << 16
+# Paragraphs longer than this many characters per max_tokens are tokenized with offsets straight away
+_LONG_PARAGRAPH_CHARS_PER_TOKEN = 8
+
+
+class RegexTokenizer:
+    """Word/punctuation tokens; the fallback when tiktoken isn't available."""
+
+    name = "regex"
+
+    def count(self, text: str) -> int:
+        return len(_WORD_RE.findall(text))
+
+    def offsets(self, text: str) -> List[int]:
+        """Start offset of every token."""
+        return [m.start() for m in _WORD_RE.finditer(text)]
+
+    def tail(self, text: str, n: int) -> str:
+        """The last n tokens of text (with the whitespace between them)."""
+        # Tokenize a suffix that is likely long enough rather than the whole text
+        window = n * 8
+        while True:
+            suffix = text[-window:]
+            starts = self.offsets(suffix)
+            if len(starts) > n or window >= len(text):
+                return suffix[starts[-n]:] if len(starts) > n else text
+            window *= 2
+
+
+class TiktokenTokenizer:
+    """Token counts as the embedding model sees them."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self.name = encoding.name
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def offsets(self, text: str) -> List[int]:
+        return self.encoding.decode_with_offsets(self.encoding.encode_ordinary(text))[1]
+
+    def tail(self, text: str, n: int) -> str:
+        ids = self.encoding.encode_ordinary(text)
+        return self.encoding.decode(ids[-n:]) if len(ids) > n else text
+
+
+_tokenizers: Dict[str, Any] = {}
+
+
+def get_tokenizer(encoding: str = CHUNK_ENCODING):
+    """tiktoken's encoding if it can be loaded, otherwise RegexTokenizer (cached per encoding)."""
+    if encoding not in _tokenizers:
+        try:
+            import tiktoken
+            _tokenizers[encoding] = TiktokenTokenizer(tiktoken.get_encoding(encoding))
+        except Exception as e:
+            print(f"Warning: tiktoken encoding '{encoding}' unavailable ({type(e).__name__}), counting regex tokens instead")
+            _tokenizers[encoding] = RegexTokenizer()
+    return _tokenizers[encoding]
+
+
+def category_for(path: Path) -> str:
+    """Knowledge-base category from the file name."""
+    return next((value for key, value in CATEGORY_MAP.items() if key in path.stem.lower()), "General")
+
+
+class MarkdownChunker:
+    """Single-pass markdown chunker producing token-bounded chunks with token overlap."""
+
+    def __init__(self, max_tokens: int = CHUNK_MAX_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+                 tokenizer=None):
+        if not 0 <= overlap_tokens < max_tokens // 2:
+            raise ValueError("overlap_tokens must be below half of max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.tokenizer = tokenizer or get_tokenizer()
+        self._separator_tokens = self.tokenizer.count(_PARAGRAPH_SEPARATOR)
+        self._piece_tokens = max_tokens - overlap_tokens - self._separator_tokens
+
+    def chunk_file(self, path: Path, **metadata) -> Iterator[Dict[str, Any]]:
+        """Stream a markdown file's chunks; category defaults to the one implied by its name."""
+        path = Path(path)
+        metadata.setdefault("category", category_for(path))
+        with open(path, "r", encoding="utf-8") as f:
+            yield from self.chunk_stream(iter(lambda: f.read(READ_BLOCK_CHARS), ""), document=path.name, **metadata)
+
+    def chunk_text(self, text: str, document: str, **metadata) -> Iterator[Dict[str, Any]]:
+        return self.chunk_stream([text], document, **metadata)
+
+    def chunk_stream(self, fragments: Iterable[str], document: str, **metadata) -> Iterator[Dict[str, Any]]:
+        """Yield chunk dicts (content, document, section, heading_path, chunk_index, token_count, **metadata).
+
+        fragments is any split of the text: lines (with their newlines) or blocks
+        read from a file. Complete blank-line separated blocks are chunked as soon
+        as they arrive, so memory stays bounded by the largest paragraph.
+        """
+        builder = _ChunkBuilder(self, document, metadata)
+        pending: List[str] = []
+        for fragment in fragments:
+            pending.append(fragment)
+            if fragment.strip() and fragment.count("\n") <= 1:
+                # An ordinary line; wait for a blank line before splitting
+                continue
+            blocks = _BLANK_LINE_RE.split("".join(pending))
+            pending = [blocks.pop()]
+            for block in blocks:
+                yield from builder.block(block)
+        yield from builder.block("".join(pending))
+        yield from builder.finish()
+
+    def _fit(self, text: str) -> Iterator[Tuple[str, int]]:
+        """Split text into pieces that fit a chunk, preferring natural boundaries.
+
+        Paragraphs up to max_tokens stay whole. Longer ones are tokenized once and
+        cut into windows that leave room for the overlap carried over from the
+        previous chunk, each ending at the window's last line break, sentence end
+        or space (in that order of preference) when one falls in its second half.
+        """
+        if len(text) < self.max_tokens * _LONG_PARAGRAPH_CHARS_PER_TOKEN:
+            count = self.tokenizer.count(text)
+            if count <= self.max_tokens:
+                yield text, count
+                return
+        # Probably oversized: the token offsets give both the count and the cut points
+        starts = self.tokenizer.offsets(text)
+        if len(starts) <= self.max_tokens:
+            yield text, len(starts)
+            return
+        i, n = 0, len(starts)
+        while n - i > self._piece_tokens:
+            lo, hi = starts[i], starts[i + self._piece_tokens]
+            cut = _natural_cut(text, lo, hi)
+            j = bisect.bisect_left(starts, cut, i + 1, i + self._piece_tokens) if cut else i + self._piece_tokens
+            yield text[lo:starts[j]].strip(), j - i
+            i = j
+        yield text[starts[i]:].strip(), n - i
+
+    def _overlap(self, pieces: List[Tuple[str, int]]) -> Optional[Tuple[str, int]]:
+        """The last overlap_tokens tokens of the chunk just emitted."""
+        if not self.overlap_tokens:
+            return None
+        tail, tail_tokens = [], 0
+        for text, count in reversed(pieces):
+            tail.insert(0, text)
+            tail_tokens += count
+            if tail_tokens >= self.overlap_tokens:
+                break
+        text = self.tokenizer.tail(_PARAGRAPH_SEPARATOR.join(tail), self.overlap_tokens).strip()
+        return (text, self.tokenizer.count(text)) if text else None
+
+
+def _natural_cut(text: str, lo: int, hi: int) -> Optional[int]:
+    """Offset just after the last line break, sentence end or space in text[lo:hi], if past its middle."""
+    middle = lo + (hi - lo) // 2
+    cut = text.rfind("\n", middle, hi)
+    if cut < 0:
+        ends = [m.end() for m in _SENTENCE_END_RE.finditer(text, middle, hi)]
+        cut = ends[-1] - 1 if ends else text.rfind(" ", middle, hi)
+    return cut + 1 if cut >= 0 else None
+
+
+class _ChunkBuilder:
+    """Per-document state of MarkdownChunker.chunk_stream."""
+
+    def __init__(self, chunker: MarkdownChunker, document: str, metadata: Dict[str, Any]):
+        self.chunker = chunker
+        self.document = document
+        self.metadata = metadata
+        self.section: str = "Introduction"
+        self.subsection: Optional[str] = None
+        self.heading_path = self.section
+        self.pieces: List[Tuple[str, int]] = []  # (text, tokens) packed into the chunk being built
+        self.tokens = 0
+        self.index = 0
+        self.in_fence = False
+        self.paragraph: List[str] = []  # lines of a paragraph that spans blocks (code with blank lines)
+
+    def block(self, block: str) -> Iterator[Dict[str, Any]]:
+        """Chunk one blank-line separated block."""
+        if not self.in_fence and "```" not in block:
+            if not block.startswith("#") and "\n#" not in block:
+                # Plain prose, the common case: a single paragraph
+                text = block.strip()
+                if text:
+                    yield from self._add(text)
+                return
+            # Headings without code: split on the heading lines instead of walking every line
+            parts = _HEADING_RE.split(block)
+            self._text(parts[0])
+            for i in range(1, len(parts), 3):
+                yield from self._heading(len(parts[i]), parts[i + 1].strip())
+                self._text(parts[i + 2])
+            yield from self._end_paragraph()
+            return
+        for line in block.split("\n"):
+            yield from self._line(line)
+        if self.in_fence:
+            # The blank line that ended this block belongs to the code
+            self.paragraph.append("")
+        else:
+            yield from self._end_paragraph()
+
+    def finish(self) -> Iterator[Dict[str, Any]]:
+        yield from self._end_paragraph()
+        if self.pieces:
+            yield self._emit()
+
+    def _text(self, text: str):
+        """Lines between headings (no code fences, no blank lines)."""
+        text = text.strip("\n")
+        if text:
+            self.paragraph.append(text)
+
+    def _heading(self, level: int, title: str) -> Iterator[Dict[str, Any]]:
+        if level == 1:
+            # The document title; the file name already identifies the document
+            return
+        yield from self._end_paragraph()
+        if level == 2:
+            if self.pieces:
+                yield self._emit()
+            self.pieces, self.tokens = [], 0
+            self.section, self.subsection = title, None
+        else:
+            # '### ' lines stay in the content, at the start of their paragraph
+            self.subsection = title
+            self.paragraph.append(f"### {title}")
+
+    def _line(self, line: str) -> Iterator[Dict[str, Any]]:
+        if line.lstrip().startswith("```"):
+            self.in_fence = not self.in_fence
+        elif self.in_fence:
+            pass
+        elif line.startswith(("# ", "## ", "### ")):
+            level = line.index(" ")
+            yield from self._heading(level, line[level + 1:].strip())
+            return
+        elif not line.strip():
+            yield from self._end_paragraph()
+            return
+        self.paragraph.append(line)
+
+    def _end_paragraph(self) -> Iterator[Dict[str, Any]]:
+        text = "\n".join(self.paragraph).strip()
+        self.paragraph.clear()
+        if text:
+            yield from self._add(text)
+
+    def _add(self, text: str) -> Iterator[Dict[str, Any]]:
+        chunker = self.chunker
+        for piece, count in chunker._fit(text):
+            extra = count + (chunker._separator_tokens if self.pieces else 0)
+            if self.pieces and self.tokens + extra > chunker.max_tokens:
+                yield self._emit()
+                overlap = chunker._overlap(self.pieces)
+                if overlap and overlap[1] + chunker._separator_tokens + count <= chunker.max_tokens:
+                    self.pieces, self.tokens = [overlap], overlap[1]
+                else:
+                    self.pieces, self.tokens = [], 0
+                extra = count + (chunker._separator_tokens if self.pieces else 0)
+                self.heading_path = self._current_path()
+            elif not self.pieces:
+                self.heading_path = self._current_path()
+            self.pieces.append((piece, count))
+            self.tokens += extra
+
+    def _current_path(self) -> str:
+        return f"{self.section} > {self.subsection}" if self.subsection else self.section
+
+    def _emit(self) -> Dict[str, Any]:
+        chunk = {
+            "content": _PARAGRAPH_SEPARATOR.join(text for text, _ in self.pieces),
+            "document": self.document,
+            "section": self.section,
+            "heading_path": self.heading_path,
+            "chunk_index": self.index,
+            "token_count": self.tokens,
+            **self.metadata,
+        }
+        self.index += 1
+        return chunk
+
+
+def chunk_directory(path: Path, chunker: Optional[MarkdownChunker] = None) -> Iterator[Dict[str, Any]]:
+    """Lazily chunk every markdown file in a directory, in name order."""
+    chunker = chunker or MarkdownChunker()
+    for md_file in sorted(Path(path).glob("*.md")):
+        yield from chunker.chunk_file(md_file)
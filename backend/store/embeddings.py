@@ -0,0 +1,165 @@
+"""
+Embedding providers for indexing and query embedding.
+
+    openai   OpenAIEmbeddings (text-embedding-3-small by default); network call per batch
+    local    HashingEmbeddingProvider: hashed word and character n-grams, vectorized
+             with NumPy on the CPU; no model download, no network, deterministic
+
+EMBEDDING_PROVIDER selects the provider new indexes are built with. Every
+version built by the indexers records its provider, model and dimensions
+(store.index_versions.record_embedding). OpenAI versions are vectorized by
+Weaviate's text2vec-openai module and queried with near_text, as are older
+versions without a record. Versions built by any other provider carry their
+own vectors; queries against them are embedded here with the same provider
+and sent as near_vector. semantic_search picks the right one.
+"""
+
+import math
+import os
+import re
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai").lower()
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+LOCAL_EMBEDDING_DIMENSIONS = int(os.getenv("LOCAL_EMBEDDING_DIMENSIONS", "1024"))
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("a an the and or of to in on for is are was were be been it its i my me we our you your "
+                       "this that these those with at by from as do does did how what when where why can could "
+                       "please hi hello thanks thank".split())
+
+
+class EmbeddingProvider:
+    """Embeds batches of documents and single queries into float32 vectors."""
+
+    name = "base"
+    model = ""
+    dimensions: Optional[int] = None
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed_documents([text])[0]
+
+    def describe(self) -> Dict[str, Any]:
+        return {"provider": self.name, "model": self.model, "dimensions": self.dimensions}
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    name = "openai"
+
+    def __init__(self, model: str = OPENAI_EMBEDDING_MODEL, dimensions: Optional[int] = None):
+        from langchain_openai import OpenAIEmbeddings
+        self.model = model
+        self.dimensions = dimensions
+        self._client = OpenAIEmbeddings(model=model)
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.asarray(self._client.embed_documents(list(texts)), dtype=np.float32)
+        self.dimensions = vectors.shape[1] if len(vectors) else self.dimensions
+        return vectors
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return np.asarray(self._client.embed_query(text), dtype=np.float32)
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """Feature-hashed bag of words, word pairs and character n-grams.
+
+    Each feature is hashed (crc32) to a signed bucket; counts are
+    log-scaled and the vector L2-normalised, so dot products are cosines.
+    A whole batch is accumulated with one np.bincount.
+    """
+
+    name = "local"
+    model = "hashed-ngrams-v1"
+
+    def __init__(self, dimensions: int = LOCAL_EMBEDDING_DIMENSIONS, char_ngrams: Sequence[int] = (3, 4, 5)):
+        self.dimensions = dimensions
+        self.char_ngrams = tuple(char_ngrams)
+
+    def _features(self, text: str) -> Dict[str, float]:
+        words = [w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS]
+        features: Dict[str, float] = {}
+        for word in words:
+            features[word] = features.get(word, 0.0) + 1.0
+            padded = f"<{word}>"
+            # Character n-grams match inflections and typos ("refunds", "refnd") at a lower weight
+            for n in self.char_ngrams:
+                for i in range(len(padded) - n + 1):
+                    gram = "#" + padded[i:i + n]
+                    features[gram] = features.get(gram, 0.0) + 0.25
+        for first, second in zip(words, words[1:]):
+            pair = f"{first} {second}"
+            features[pair] = features.get(pair, 0.0) + 1.0
+        return features
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        rows, buckets, weights = [], [], []
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                buckets.append(h % self.dimensions)
+                weights.append((1.0 + math.log(count)) if count >= 1 else count)
+                if h & 0x80000000:
+                    weights[-1] = -weights[-1]
+        flat = np.asarray(rows, dtype=np.int64) * self.dimensions + np.asarray(buckets, dtype=np.int64)
+        vectors = np.bincount(flat, weights=np.asarray(weights, dtype=np.float64),
+                              minlength=len(texts) * self.dimensions).reshape(len(texts), self.dimensions)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
+
+
+_providers: Dict[tuple, EmbeddingProvider] = {}
+_lock = threading.Lock()
+
+
+def get_provider(name: Optional[str] = None, model: Optional[str] = None,
+                 dimensions: Optional[int] = None) -> EmbeddingProvider:
+    """Shared provider instance (EMBEDDING_PROVIDER by default)."""
+    name = (name or EMBEDDING_PROVIDER).lower()
+    key = (name, model, dimensions)
+    with _lock:
+        if key not in _providers:
+            if name == "local":
+                if model not in (None, HashingEmbeddingProvider.model):
+                    raise ValueError(f"Unknown local embedding model '{model}'")
+                _providers[key] = HashingEmbeddingProvider(dimensions or LOCAL_EMBEDDING_DIMENSIONS)
+            elif name == "openai":
+                _providers[key] = OpenAIEmbeddingProvider(model or OPENAI_EMBEDDING_MODEL, dimensions)
+            else:
+                raise ValueError(f"Unknown EMBEDDING_PROVIDER '{name}' (expected 'openai' or 'local')")
+        return _providers[key]
+
+
+def provider_for(embedding: Dict[str, Any]) -> EmbeddingProvider:
+    """The provider that built an index, from its recorded {provider, model, dimensions}."""
+    return get_provider(embedding["provider"], embedding.get("model"), embedding.get("dimensions"))
+
+
+def vectorized_by_weaviate(embedding: Optional[Dict[str, Any]]) -> bool:
+    return embedding is None or embedding["provider"] == "openai"
+
+
+def query_vector(client: Any, collection: Any, query: str) -> Optional[List[float]]:
+    """The query embedded for the collection's provider; None if Weaviate embeds queries itself."""
+    from store.index_versions import read_embedding
+    embedding = read_embedding(client, collection.name)
+    if vectorized_by_weaviate(embedding):
+        return None
+    return provider_for(embedding).embed_query(query).tolist()
+
+
+def semantic_search(client: Any, collection: Any, query: str, **params):
+    """near_vector with the index's own provider, or near_text for indexes Weaviate vectorized."""
+    vector = query_vector(client, collection, query)
+    if vector is None:
+        return collection.query.near_text(query=query, **params)
+    return collection.query.near_vector(near_vector=vector, **params)
@@ -0,0 +1,172 @@
+"""
+Pre-answered FAQ intents served without any LLM call.
+
+scripts/build_faq_index.py mines frequent intents offline and stores them in
+a JSON intent index at FAQ_INDEX_PATH. An intent is a knowledge-base section
+that logged tickets keep asking about. For each one the script pre-generates
+and validates a draft with ResponseGenerator and QualityValidator. At
+request time the graph's match_faq node scores the query against each
+intent's example questions with a TF-IDF cosine over words and word pairs.
+A match at or above FAQ_MATCH_THRESHOLD returns the stored draft and
+sources directly.
+
+Every intent records a hash of the knowledge-base sections its answer was
+grounded in. Intents whose sections changed since the build are never
+served. Rerunning the build script regenerates only those intents.
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from observability.metrics import counter, gauge
+from store import chunk_store
+from store.chunking import MarkdownChunker, chunk_directory
+from store.memory import tokenize
+
+FAQ_ENABLED = os.getenv("FAQ_ENABLED", "true").lower() in ("1", "true", "yes")
+FAQ_INDEX_PATH = os.getenv("FAQ_INDEX_PATH", "faq_index.json")
+FAQ_MATCH_THRESHOLD = float(os.getenv("FAQ_MATCH_THRESHOLD", "0.8"))
+FAQ_RELOAD_SECONDS = float(os.getenv("FAQ_RELOAD_SECONDS", "30"))
+KNOWLEDGE_BASE_PATH = Path(os.getenv("KNOWLEDGE_BASE_PATH", str(Path(__file__).parent.parent / "knowledge_base")))
+INDEX_VERSION = 1
+
+FAQ_LOOKUPS = counter("support_faq_lookups_total", "FAQ fast-path lookups by outcome.", ["outcome"])
+FAQ_INTENTS = gauge("support_faq_intents", "Pre-answered FAQ intents by state.", ["state"])
+
+
+def section_key(document: str, section: str) -> str:
+    return f"{document}#{section}"
+
+
+def section_hashes(path: Path = KNOWLEDGE_BASE_PATH) -> Dict[str, str]:
+    """Content hash of every '## ' section in the knowledge base, keyed by section_key()."""
+    digests: Dict[str, Any] = defaultdict(hashlib.sha1)
+    for chunk in chunk_directory(path, MarkdownChunker()):
+        digests[section_key(chunk["document"], chunk["section"])].update(chunk["content"].encode("utf-8"))
+    return {key: digest.hexdigest() for key, digest in digests.items()}
+
+
+def _features(text: str) -> Counter:
+    tokens = tokenize(text)
+    return Counter(tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])])
+
+
+class FAQIndex:
+    """Intent entries plus a TF-IDF model over their example questions."""
+
+    def __init__(self, intents: List[Dict[str, Any]], current_hashes: Optional[Dict[str, str]] = None):
+        # Without the knowledge base on disk there is nothing to compare against; trust the build
+        self.stale = [i for i in intents if current_hashes is not None and
+                      any(current_hashes.get(key) != digest for key, digest in i["sources"].items())]
+        stale_ids = {i["id"] for i in self.stale}
+        self.intents = [i for i in intents if i["id"] not in stale_ids]
+        FAQ_INTENTS.set(len(self.intents), state="live")
+        FAQ_INTENTS.set(len(self.stale), state="stale")
+
+        examples = [(intent, _features(text)) for intent in self.intents for text in intent["examples"]]
+        document_frequency = Counter(term for _, features in examples for term in features)
+        self._max_idf = math.log(len(examples) + 1) + 1
+        self.idf = {term: math.log((len(examples) + 1) / (count + 1)) + 1 for term, count in document_frequency.items()}
+        self._examples = []
+        for intent, features in examples:
+            weights = self._weights(features)
+            self._examples.append((intent, weights, math.sqrt(sum(w * w for w in weights.values()))))
+
+    def _weights(self, features: Counter) -> Dict[str, float]:
+        return {term: count * self.idf.get(term, self._max_idf) for term, count in features.items()}
+
+    def match(self, query: str) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Best intent for the query and its cosine score (None if the index is empty)."""
+        weights = self._weights(_features(query))
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        best, best_score = None, 0.0
+        if not norm:
+            return None, 0.0
+        for intent, example, example_norm in self._examples:
+            if not example_norm:
+                continue
+            score = sum(w * example.get(term, 0.0) for term, w in weights.items()) / (norm * example_norm)
+            if score > best_score:
+                best, best_score = intent, score
+        return best, best_score
+
+
+def load_index(path: str = FAQ_INDEX_PATH, kb_path: Path = KNOWLEDGE_BASE_PATH) -> FAQIndex:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != INDEX_VERSION:
+        raise ValueError(f"Unsupported FAQ index version {data.get('version')}")
+    index = FAQIndex(data["intents"], section_hashes(kb_path) if kb_path.exists() else None)
+    if index.stale:
+        print(f"⚠️  {len(index.stale)} FAQ intents are stale (knowledge base changed); "
+              f"rerun scripts/build_faq_index.py to regenerate them")
+    return index
+
+
+def save_index(path: str, intents: List[Dict[str, Any]], hashes: Dict[str, str]):
+    data = {"version": INDEX_VERSION, "created_at": time.time(), "sections": hashes, "intents": intents}
+    partial = f"{path}.partial"
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, ensure_ascii=False)
+    os.replace(partial, path)
+
+
+_index: Optional[FAQIndex] = None
+_index_stamp: Optional[Tuple[float, ...]] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _stamp() -> Optional[Tuple[float, ...]]:
+    """Modification times of the index file and the knowledge base, or None without an index."""
+    if not os.path.exists(FAQ_INDEX_PATH):
+        return None
+    kb_files = sorted(KNOWLEDGE_BASE_PATH.glob("*.md")) if KNOWLEDGE_BASE_PATH.exists() else []
+    return (os.path.getmtime(FAQ_INDEX_PATH), *(p.stat().st_mtime for p in kb_files))
+
+
+def get_index() -> Optional[FAQIndex]:
+    """The current index, reloaded (at most every FAQ_RELOAD_SECONDS) when it or the knowledge base changes."""
+    global _index, _index_stamp, _checked_at
+    if not FAQ_ENABLED:
+        return None
+    now = time.monotonic()
+    if now - _checked_at < FAQ_RELOAD_SECONDS:
+        return _index
+    with _lock:
+        if now - _checked_at < FAQ_RELOAD_SECONDS:
+            return _index
+        stamp = _stamp()
+        if stamp != _index_stamp:
+            try:
+                _index = load_index() if stamp is not None else None
+            except Exception as e:
+                print(f"Warning: Could not load FAQ index {FAQ_INDEX_PATH}: {e}")
+                _index = None
+            _index_stamp = stamp
+        _checked_at = now
+    return _index
+
+
+def lookup(query: str) -> Tuple[Optional[Dict[str, Any]], float]:
+    """The intent to answer the query from, if it matches at FAQ_MATCH_THRESHOLD or better."""
+    index = get_index()
+    if index is None or not index.intents:
+        return None, 0.0
+    intent, score = index.match(query)
+    if intent is None or score < FAQ_MATCH_THRESHOLD:
+        FAQ_LOOKUPS.inc(outcome="miss")
+        return None, score
+    FAQ_LOOKUPS.inc(outcome="hit")
+    # Chunk text ships with the index. Put it back on every hit, so the sources resolve even after
+    # the chunk cache expired them or the index version they came from was pruned
+    for chunk_id, text in intent.get("chunks", {}).items():
+        chunk_store.put(chunk_id, text)
+    return intent, score
@@ -0,0 +1,246 @@
+"""
+Blue/green versions of the SupportDocs collection.
+
+Re-indexing used to delete SupportDocs and rebuild it in place, so queries
+that arrived meanwhile hit a missing or half-filled collection and fell back
+to mock data. Now every build goes into a new versioned collection
+(SupportDocs_v20250101120000123456_3f9a), is verified (object count plus smoke
+queries), and only then becomes active by rewriting a single pointer object:
+
+    IndexAliases      one object per alias: {alias, target, previous, updated_at}
+    IndexEmbeddings   one object per version: {collection, provider, model, dimensions}
+                      (see store.embeddings; absent for Weaviate-vectorized versions)
+
+Readers resolve the alias through resolve_collection(), which caches the
+pointer for INDEX_ALIAS_TTL_SECONDS, so running API workers follow a swap
+without a restart. The previous version is kept for instant rollback and
+older ones are pruned down to INDEX_KEEP_VERSIONS. Until the first swap, the
+alias resolves to the plain SupportDocs collection, so existing deployments
+keep working unchanged.
+
+Weaviate 1.32+ has native collection aliases; the pointer object does the
+same job on the 1.27 server this project runs.
+"""
+
+import os
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from observability.metrics import counter
+from store.weaviate_client import COLLECTION_NAME
+
+POINTER_COLLECTION = "IndexAliases"
+EMBEDDING_COLLECTION = "IndexEmbeddings"
+INDEX_ALIAS_TTL_SECONDS = float(os.getenv("INDEX_ALIAS_TTL_SECONDS", "10"))
+INDEX_KEEP_VERSIONS = int(os.getenv("INDEX_KEEP_VERSIONS", "2"))
+
+INDEX_SWAPS = counter("support_index_swaps_total", "Active collection changes by kind.", ["kind"])
+
+_resolved: Dict[str, Tuple[str, float]] = {}
+_embeddings: Dict[str, Tuple[Optional[Dict[str, Any]], float]] = {}
+
+
+class IndexVerificationError(Exception):
+    """Raised when a freshly built version fails its checks and is not activated."""
+
+
+def _pointer_uuid(alias: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"index-alias/{alias}"))
+
+
+def version_prefix(alias: str = COLLECTION_NAME) -> str:
+    return f"{alias}_v"
+
+
+def new_version_name(alias: str = COLLECTION_NAME) -> str:
+    """Name for a new shadow collection, ordered by build time.
+
+    Microseconds plus a random suffix keep two builds started in the same
+    second from writing into the same collection.
+    """
+    now = time.time()
+    stamp = time.strftime('%Y%m%d%H%M%S', time.gmtime(now))
+    return f"{version_prefix(alias)}{stamp}{int(now % 1 * 1_000_000):06d}_{uuid.uuid4().hex[:4]}"
+
+
+def read_pointer(client: Any, alias: str = COLLECTION_NAME) -> Optional[Dict[str, Any]]:
+    """The alias's pointer ({target, previous, updated_at}), or None before the first swap."""
+    if not client.collections.exists(POINTER_COLLECTION):
+        return None
+    obj = client.collections.get(POINTER_COLLECTION).query.fetch_object_by_id(_pointer_uuid(alias))
+    return dict(obj.properties) if obj is not None else None
+
+
+def resolve_collection(client: Any, alias: str = COLLECTION_NAME) -> str:
+    """Name of the collection the alias currently points at (cached briefly)."""
+    cached = _resolved.get(alias)
+    now = time.monotonic()
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    try:
+        pointer = read_pointer(client, alias)
+        target = pointer["target"] if pointer else alias
+    except Exception as e:
+        # Keep serving from the last known version rather than failing queries
+        print(f"Warning: Could not resolve index alias '{alias}': {e}")
+        target = cached[0] if cached else alias
+    _resolved[alias] = (target, now + INDEX_ALIAS_TTL_SECONDS)
+    return target
+
+
+def active_collection(client: Any, alias: str = COLLECTION_NAME):
+    """The collection object queries should use."""
+    return client.collections.get(resolve_collection(client, alias))
+
+
+def list_versions(client: Any, alias: str = COLLECTION_NAME) -> List[str]:
+    """Versioned collections for the alias, oldest first."""
+    prefix = version_prefix(alias)
+    return sorted(name for name in client.collections.list_all(simple=True) if name.startswith(prefix))
+
+
+def verify_version(client: Any, name: str, expected_count: Optional[int] = None,
+                   smoke_queries: Iterable[str] = ()) -> Dict[str, Any]:
+    """Check a built collection before it goes live; raises IndexVerificationError."""
+    if not client.collections.exists(name):
+        raise IndexVerificationError(f"Collection {name} does not exist")
+    collection = client.collections.get(name)
+    count = collection.aggregate.over_all(total_count=True).total_count
+    if not count or (expected_count is not None and count != expected_count):
+        raise IndexVerificationError(f"{name} holds {count} objects, expected {expected_count or 'at least 1'}")
+    from store.embeddings import semantic_search
+    for query in smoke_queries:
+        if not semantic_search(client, collection, query, limit=1).objects:
+            raise IndexVerificationError(f"Smoke query '{query}' returned nothing from {name}")
+    return {"collection": name, "count": count}
+
+
+def _metadata_uuid(kind: str, name: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{kind}/{name}"))
+
+
+def record_embedding(client: Any, name: str, embedding: Dict[str, Any]):
+    """Record which embedding provider/model/dimensions built a version."""
+    if not client.collections.exists(EMBEDDING_COLLECTION):
+        from weaviate.classes.config import Configure, DataType, Property
+        client.collections.create(
+            name=EMBEDDING_COLLECTION,
+            vectorizer_config=Configure.Vectorizer.none(),
+            properties=[
+                Property(name="collection", data_type=DataType.TEXT),
+                Property(name="provider", data_type=DataType.TEXT),
+                Property(name="model", data_type=DataType.TEXT),
+                Property(name="dimensions", data_type=DataType.INT),
+            ],
+        )
+    records = client.collections.get(EMBEDDING_COLLECTION)
+    properties = {"collection": name, "provider": embedding["provider"], "model": embedding.get("model") or "",
+                  "dimensions": int(embedding.get("dimensions") or 0)}
+    object_id = _metadata_uuid("index-embedding", name)
+    if records.query.fetch_object_by_id(object_id) is None:
+        records.data.insert(properties=properties, uuid=object_id)
+    else:
+        records.data.replace(uuid=object_id, properties=properties)
+    _embeddings.pop(name, None)
+
+
+def read_embedding(client: Any, name: str) -> Optional[Dict[str, Any]]:
+    """The recorded embedding of a version, or None if Weaviate's vectorizer built it (cached)."""
+    cached = _embeddings.get(name)
+    now = time.monotonic()
+    if cached is not None and cached[1] > now:
+        return cached[0]
+    embedding = None
+    try:
+        if client.collections.exists(EMBEDDING_COLLECTION):
+            obj = client.collections.get(EMBEDDING_COLLECTION).query.fetch_object_by_id(
+                _metadata_uuid("index-embedding", name))
+            embedding = dict(obj.properties) if obj is not None else None
+    except Exception as e:
+        print(f"Warning: Could not read the embedding record of {name}: {e}")
+        return cached[0] if cached else None
+    # Versions never change provider once recorded; an absent record is rechecked like the alias
+    _embeddings[name] = (embedding, now + (float("inf") if embedding else INDEX_ALIAS_TTL_SECONDS))
+    return embedding
+
+
+def _write_pointer(client: Any, alias: str, target: str, previous: Optional[str]):
+    if not client.collections.exists(POINTER_COLLECTION):
+        from weaviate.classes.config import Configure, DataType, Property
+        client.collections.create(
+            name=POINTER_COLLECTION,
+            vectorizer_config=Configure.Vectorizer.none(),
+            properties=[
+                Property(name="alias", data_type=DataType.TEXT),
+                Property(name="target", data_type=DataType.TEXT),
+                Property(name="previous", data_type=DataType.TEXT),
+                Property(name="updated_at", data_type=DataType.NUMBER),
+            ],
+        )
+    pointers = client.collections.get(POINTER_COLLECTION)
+    properties = {"alias": alias, "target": target, "previous": previous or "", "updated_at": time.time()}
+    object_id = _pointer_uuid(alias)
+    # A single-object write is the atomic switch readers observe
+    if pointers.query.fetch_object_by_id(object_id) is None:
+        pointers.data.insert(properties=properties, uuid=object_id)
+    else:
+        pointers.data.replace(uuid=object_id, properties=properties)
+    _resolved.pop(alias, None)
+
+
+def activate(client: Any, name: str, alias: str = COLLECTION_NAME, kind: str = "activate") -> Dict[str, Any]:
+    """Point the alias at an existing collection, remembering the current one for rollback."""
+    if not client.collections.exists(name):
+        raise IndexVerificationError(f"Collection {name} does not exist")
+    pointer = read_pointer(client, alias)
+    current = pointer["target"] if pointer else (alias if client.collections.exists(alias) else None)
+    if current == name:
+        return {"alias": alias, "active": name, "previous": pointer["previous"] if pointer else None}
+    _write_pointer(client, alias, name, current)
+    INDEX_SWAPS.inc(kind=kind)
+    print(f"🔀 {alias} now points at {name} (previous: {current or 'none'})")
+    return {"alias": alias, "active": name, "previous": current}
+
+
+def publish_version(client: Any, name: str, expected_count: Optional[int] = None,
+                    smoke_queries: Iterable[str] = (), alias: str = COLLECTION_NAME) -> Dict[str, Any]:
+    """Verify a freshly built version, switch the alias to it and prune old versions."""
+    checks = verify_version(client, name, expected_count, smoke_queries)
+    print(f"✅ Verified {name}: {checks['count']} objects")
+    result = activate(client, name, alias, kind="publish")
+    result["pruned"] = prune_versions(client, alias)
+    return result
+
+
+def rollback(client: Any, alias: str = COLLECTION_NAME) -> Dict[str, Any]:
+    """Switch the alias back to the version that was active before the last swap."""
+    pointer = read_pointer(client, alias)
+    if not pointer or not pointer.get("previous"):
+        raise IndexVerificationError(f"No previous version recorded for {alias}")
+    return activate(client, pointer["previous"], alias, kind="rollback")
+
+
+def prune_versions(client: Any, alias: str = COLLECTION_NAME, keep: int = INDEX_KEEP_VERSIONS) -> List[str]:
+    """Delete the oldest versions beyond `keep`; the active and previous ones always stay."""
+    pointer = read_pointer(client, alias) or {}
+    protected = {pointer.get("target"), pointer.get("previous")}
+    versions = list_versions(client, alias)
+    removable = [name for name in versions[:max(0, len(versions) - keep)] if name not in protected]
+    for name in removable:
+        client.collections.delete(name)
+        if client.collections.exists(EMBEDDING_COLLECTION):
+            client.collections.get(EMBEDDING_COLLECTION).data.delete_by_id(_metadata_uuid("index-embedding", name))
+        print(f"🗑️  Pruned old index version {name}")
+    return removable
+
+
+def describe(client: Any, alias: str = COLLECTION_NAME) -> Dict[str, Any]:
+    pointer = read_pointer(client, alias) or {}
+    return {
+        "alias": alias,
+        "active": pointer.get("target") or alias,
+        "previous": pointer.get("previous") or None,
+        "updated_at": pointer.get("updated_at"),
+        "versions": list_versions(client, alias),
+    }
@@ -0,0 +1,109 @@
+"""
+In-process BM25 index over a collection's chunks, for as-you-type lookups.
+
+The index is built once per collection version from collection.iterator()
+and answers without any network or embedding call. The last query word may
+still be half-typed, so it is expanded to every indexed term it prefixes
+(via a sorted vocabulary and bisect), weighted down slightly.
+
+Scoring walks only the postings of the query terms, so a lookup stays in
+the sub-millisecond range for a knowledge base of a few thousand chunks.
+"""
+
+import bisect
+import math
+import threading
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+from store.memory import MemoryObject, tokenize
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_WEIGHT = 0.7      # A completed prefix counts a bit less than the word as typed
+MAX_PREFIX_EXPANSIONS = 20
+
+
+class LexicalIndex:
+    """BM25 over content, section and heading path, with prefix matching of the last word."""
+
+    def __init__(self, name: str, objects: List[Tuple[str, Dict[str, Any]]]):
+        self.name = name
+        self.objects = objects
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        lengths = []
+        for row, (_, properties) in enumerate(objects):
+            text = " ".join(str(properties.get(field) or "") for field in ("section", "heading_path", "content"))
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                self.postings[term].append((row, count))
+        self.lengths = lengths
+        self.average_length = (sum(lengths) / len(lengths)) if lengths else 1.0
+        self.vocabulary = sorted(self.postings)
+        n = len(objects)
+        self.idf = {term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for term, p in self.postings.items()}
+
+    @classmethod
+    def from_collection(cls, collection: Any) -> "LexicalIndex":
+        objects = [(str(obj.uuid), dict(obj.properties)) for obj in collection.iterator()]
+        return cls(collection.name, objects)
+
+    def _expand(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        terms = []
+        for term in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query: str, limit: int = 5, partial_last: bool = True) -> List[MemoryObject]:
+        """Top chunks by BM25; with partial_last, the final word also matches as a prefix."""
+        words = tokenize(query)
+        weights: Dict[str, float] = Counter(words)
+        if partial_last and words and words[-1] not in self.postings:
+            del weights[words[-1]]
+            for term in self._expand(words[-1]):
+                weights[term] = max(weights.get(term, 0.0), PREFIX_WEIGHT)
+
+        scores: Dict[int, float] = defaultdict(float)
+        for term, weight in weights.items():
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for row, count in self.postings[term]:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[row] / self.average_length)
+                scores[row] += weight * idf * count * (BM25_K1 + 1) / (count + norm)
+
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        best = top[0][1] if top else 1.0
+        results = []
+        for row, score in top:
+            object_id, properties = self.objects[row]
+            obj = MemoryObject(properties, object_id)
+            # BM25 is unbounded; relative to the best hit it reads like the vector path's certainty
+            obj.metadata = SimpleNamespace(distance=None, certainty=None, score=round(score / best, 6))
+            results.append(obj)
+        return results
+
+
+_indexes: Dict[str, LexicalIndex] = {}
+_lock = threading.Lock()
+
+
+def get_index(collection: Any) -> LexicalIndex:
+    """Shared index for a collection version; built on first use (blocking)."""
+    index = _indexes.get(collection.name)
+    if index is not None:
+        return index
+    with _lock:
+        index = _indexes.get(collection.name)
+        if index is None:
+            index = LexicalIndex.from_collection(collection)
+            # Only the active version is ever searched; drop the ones a re-index swapped out
+            _indexes.clear()
+            _indexes[collection.name] = index
+            print(f"🔤 Built lexical index for {collection.name} ({len(index.objects)} chunks)")
+    return index
@@ -0,0 +1,217 @@
+"""
+In-memory stand-in for the subset of the Weaviate v4 client used by this app.
+
+Supports collections.get/exists/create/delete/list_all,
+query.near_text/hybrid/near_vector/fetch_objects/fetch_object_by_id with property
+filters, data.insert/replace, batch.dynamic/fixed_size, iterator and
+aggregate.over_all. near_text is scored with a bag-of-words cosine
+similarity, so results are deterministic and need no embedding calls.
+"""
+
+import math
+import re
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class MemoryObject:
+    """Mimics weaviate's returned Object (uuid, properties, metadata, vector)."""
+
+    def __init__(self, properties: Dict[str, Any], object_uuid: Optional[str] = None, vector: Any = None):
+        self.uuid = object_uuid or str(uuid.uuid4())
+        self.properties = properties
+        self.vector = vector
+        self.metadata = SimpleNamespace(distance=None, certainty=None, score=None)
+
+
+def _matches(filters: Any, properties: Dict[str, Any], object_uuid: Optional[str] = None) -> bool:
+    """Evaluate weaviate Filter objects (equal / any_of / all_of, Filter.by_id) against an object."""
+    if filters is None:
+        return True
+    operator = getattr(getattr(filters, "operator", None), "value", None)
+    if hasattr(filters, "filters"):
+        results = [_matches(f, properties, object_uuid) for f in filters.filters]
+        return all(results) if type(filters).__name__ == "_FilterAnd" else any(results)
+    value = str(object_uuid) if filters.target == "_id" else properties.get(filters.target)
+    if operator == "Equal":
+        return value == filters.value
+    if operator == "NotEqual":
+        return value != filters.value
+    if operator == "ContainsAny":
+        return value in filters.value
+    raise NotImplementedError(f"Filter operator {operator} is not supported in memory")
+
+
+class _Query:
+    def __init__(self, collection: "InMemoryCollection"):
+        self._collection = collection
+
+    def _scored(self, query: str, limit: int, filters: Any) -> List[MemoryObject]:
+        query_counts = Counter(tokenize(query))
+        query_norm = math.sqrt(sum(v * v for v in query_counts.values())) or 1.0
+        scored = []
+        for obj, counts, norm in self._collection._index:
+            if not _matches(filters, obj.properties, obj.uuid):
+                continue
+            dot = sum(query_counts[t] * counts.get(t, 0) for t in query_counts)
+            similarity = dot / (query_norm * norm) if norm else 0.0
+            scored.append((similarity, obj))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+
+        results = []
+        for similarity, obj in scored[:limit]:
+            hit = MemoryObject(obj.properties, obj.uuid, obj.vector)
+            hit.metadata = SimpleNamespace(
+                distance=round(1.0 - similarity, 6),
+                certainty=round((1.0 + similarity) / 2, 6),
+                score=round(similarity, 6),
+            )
+            results.append(hit)
+        return results
+
+    def near_text(self, query: str, limit: int = 10, filters: Any = None, **kwargs):
+        return SimpleNamespace(objects=self._scored(query, limit, filters))
+
+    def hybrid(self, query: str, limit: int = 10, filters: Any = None, **kwargs):
+        return SimpleNamespace(objects=self._scored(query, limit, filters))
+
+    def near_vector(self, near_vector: List[float], limit: int = 10, filters: Any = None, **kwargs):
+        """Cosine similarity against the stored vectors (objects added without one are skipped)."""
+        query_norm = math.sqrt(sum(v * v for v in near_vector)) or 1.0
+        scored = []
+        for obj in self._collection.objects:
+            vector = next(iter(obj.vector.values()), None) if isinstance(obj.vector, dict) else obj.vector
+            if vector is None or not _matches(filters, obj.properties, obj.uuid):
+                continue
+            norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+            similarity = sum(a * b for a, b in zip(near_vector, vector)) / (query_norm * norm)
+            scored.append((similarity, obj))
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        return SimpleNamespace(objects=[MemoryObject(obj.properties, obj.uuid, obj.vector) for _, obj in scored[:limit]])
+
+    def fetch_objects(self, limit: int = 100, filters: Any = None, **kwargs):
+        objects = [obj for obj in self._collection.objects if _matches(filters, obj.properties, obj.uuid)]
+        return SimpleNamespace(objects=objects[:limit])
+
+    def fetch_object_by_id(self, uuid: str, **kwargs) -> Optional[MemoryObject]:
+        return next((obj for obj in self._collection.objects if obj.uuid == str(uuid)), None)
+
+
+class _Data:
+    def __init__(self, collection: "InMemoryCollection"):
+        self._collection = collection
+
+    def insert(self, properties: Dict[str, Any], uuid: Optional[str] = None, vector: Any = None, **kwargs) -> str:
+        if uuid is not None and self._collection.query.fetch_object_by_id(uuid) is not None:
+            raise ValueError(f"Object {uuid} already exists")
+        return self._collection.add_object(properties, uuid, vector)
+
+    def replace(self, uuid: str, properties: Dict[str, Any], vector: Any = None, **kwargs):
+        self._collection.remove_object(str(uuid))
+        self._collection.add_object(properties, str(uuid), vector)
+
+    def delete_by_id(self, uuid: str, **kwargs) -> bool:
+        found = self._collection.query.fetch_object_by_id(uuid) is not None
+        self._collection.remove_object(str(uuid))
+        return found
+
+
+class _Batch:
+    def __init__(self, collection: "InMemoryCollection"):
+        self._collection = collection
+
+    @contextmanager
+    def dynamic(self):
+        yield self
+
+    @contextmanager
+    def fixed_size(self, batch_size: int = 100, **kwargs):
+        yield self
+
+    def add_object(self, properties: Dict[str, Any], uuid: Optional[str] = None, vector: Any = None, **kwargs) -> str:
+        return self._collection.add_object(properties, uuid, vector)
+
+
+class _Aggregate:
+    def __init__(self, collection: "InMemoryCollection"):
+        self._collection = collection
+
+    def over_all(self, total_count: bool = True, **kwargs):
+        return SimpleNamespace(total_count=len(self._collection.objects))
+
+
+class InMemoryCollection:
+    """A list of objects with a pre-tokenized lexical index."""
+
+    def __init__(self, name: str, objects: Optional[List[Dict[str, Any]]] = None):
+        self.name = name
+        self.objects: List[MemoryObject] = []
+        self._index: List[Any] = []
+        self.query = _Query(self)
+        self.aggregate = _Aggregate(self)
+        self.data = _Data(self)
+        self.batch = _Batch(self)
+        for properties in objects or []:
+            self.add_object(properties)
+
+    def add_object(self, properties: Dict[str, Any], object_uuid: Optional[str] = None, vector: Any = None) -> str:
+        obj = MemoryObject(dict(properties), object_uuid, vector)
+        counts = Counter(tokenize(properties.get("content", "")))
+        norm = math.sqrt(sum(v * v for v in counts.values()))
+        self.objects.append(obj)
+        self._index.append((obj, counts, norm))
+        return obj.uuid
+
+    def iterator(self, include_vector: bool = False, **kwargs):
+        for obj in list(self.objects):
+            yield MemoryObject(obj.properties, obj.uuid, obj.vector if include_vector else None)
+
+    def remove_object(self, object_uuid: str):
+        self.objects = [obj for obj in self.objects if obj.uuid != object_uuid]
+        self._index = [entry for entry in self._index if entry[0].uuid != object_uuid]
+
+
+class _Collections:
+    def __init__(self, client: "InMemoryClient"):
+        self._client = client
+
+    def get(self, name: str) -> InMemoryCollection:
+        if name not in self._client.store:
+            self._client.store[name] = InMemoryCollection(name)
+        return self._client.store[name]
+
+    def exists(self, name: str) -> bool:
+        return name in self._client.store
+
+    def delete(self, name: str):
+        self._client.store.pop(name, None)
+
+    def create(self, name: str, **kwargs) -> InMemoryCollection:
+        self._client.store[name] = InMemoryCollection(name)
+        return self._client.store[name]
+
+    def list_all(self, simple: bool = True) -> Dict[str, InMemoryCollection]:
+        return dict(self._client.store)
+
+
+class InMemoryClient:
+    """Drop-in replacement for a connected weaviate client; close() is a no-op."""
+
+    def __init__(self, store: Optional[Dict[str, InMemoryCollection]] = None):
+        self.store = store if store is not None else {}
+        self.collections = _Collections(self)
+
+    def is_ready(self) -> bool:
+        return True
+
+    def close(self):
+        pass
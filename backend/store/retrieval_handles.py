@@ -0,0 +1,35 @@
+"""
+Short-lived handles to retrieval results.
+
+/api/suggest-sources stores the candidates it found under a handle; a
+follow-up /api/copilot request for the same query can pass the handle so the
+retriever reuses those candidates instead of embedding and searching again.
+Handles live in a bounded TTL cache (RETRIEVAL_HANDLE_TTL_SECONDS) shared by
+all workers when CACHE_BACKEND=sqlite; an expired handle simply means a
+fresh search.
+"""
+
+import os
+import uuid
+from typing import Dict, List, Optional
+
+from cache.store import get_cache
+
+RETRIEVAL_HANDLE_TTL_SECONDS = float(os.getenv("RETRIEVAL_HANDLE_TTL_SECONDS", "300"))
+
+_handles = get_cache("retrieval_handles", ttl=RETRIEVAL_HANDLE_TTL_SECONDS, required=True)
+
+
+def save_candidates(query: str, candidates: List[Dict]) -> str:
+    """Store retrieval candidates (chunk_id, document, section, category, relevance) and return a handle."""
+    handle = uuid.uuid4().hex
+    _handles.set(handle, {"query": query, "candidates": candidates})
+    return handle
+
+
+def load_candidates(handle: str, query: str) -> Optional[List[Dict]]:
+    """Candidates stored under handle, or None if it expired or belongs to a different query."""
+    entry = _handles.get(handle)
+    if entry is None or entry["query"].strip() != query.strip():
+        return None
+    return entry["candidates"]
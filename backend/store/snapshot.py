@@ -0,0 +1,394 @@
+"""
+Portable snapshots of the SupportDocs collection.
+
+Bringing up a new environment used to mean rerunning a setup script, which
+re-embeds the whole knowledge base through OpenAI. A snapshot holds
+everything needed to serve without that: each chunk's properties, its
+vector, and the embedding provider/model/dimensions the vectors came from.
+
+File layout (little-endian):
+
+    8 bytes   magic b"SDOCSNAP"
+    8 bytes   header length (uint64)
+    header    UTF-8 JSON: format version, collection, embedding provider,
+              model and dimensions, count, vector_offset, vectors_sha256 and
+              "objects": [{"uuid", "properties"}] in row order
+    padding   zeros up to vector_offset (a multiple of 64)
+    vectors   count x dimensions float32, one contiguous row-major array
+
+A snapshot can be bulk-inserted into Weaviate with its vectors
+(import_snapshot, which goes through the blue/green alias), or served
+directly by SnapshotClient, which memory-maps the vector block and answers
+the retriever's queries with NumPy (VECTOR_BACKEND=snapshot).
+"""
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from store.embeddings import provider_for, vectorized_by_weaviate
+from store.index_versions import activate, new_version_name, read_embedding, record_embedding, verify_version
+from store.memory import MemoryObject, _matches
+from store.weaviate_client import COLLECTION_NAME
+
+MAGIC = b"SDOCSNAP"
+FORMAT_VERSION = 1
+VECTOR_ALIGNMENT = 64
+DTYPE = "<f4"
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"  # What the setup scripts index with
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "snapshots/support_docs.snap")
+
+
+class SnapshotError(Exception):
+    """Raised for unreadable, corrupt or incompatible snapshot files."""
+
+
+def write_snapshot(path: str, objects: Iterable[Tuple[str, Dict[str, Any], Any]], model: str,
+                   collection: str = COLLECTION_NAME, provider: str = "openai") -> Dict[str, Any]:
+    """Write (uuid, properties, vector) triples to a snapshot file; returns its header.
+
+    Vectors are streamed to a temporary file as they arrive, and the snapshot
+    replaces `path` atomically once complete.
+    """
+    records: List[Dict[str, Any]] = []
+    dimensions: Optional[int] = None
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    with tempfile.TemporaryFile(dir=directory) as vectors:
+        for object_id, properties, vector in objects:
+            row = np.asarray(vector, dtype=DTYPE)
+            if dimensions is None:
+                dimensions = row.shape[0]
+            if row.shape != (dimensions,):
+                raise SnapshotError(f"Object {object_id} has a {row.shape} vector, expected ({dimensions},)")
+            data = row.tobytes()
+            vectors.write(data)
+            digest.update(data)
+            records.append({"uuid": str(object_id), "properties": properties})
+
+        header = {
+            "format_version": FORMAT_VERSION,
+            "collection": collection,
+            "created_at": time.time(),
+            "embedding": {"provider": provider, "model": model, "dimensions": dimensions or 0},
+            "count": len(records),
+            "dtype": DTYPE,
+            "vectors_sha256": digest.hexdigest(),
+            "objects": records,
+        }
+        # vector_offset depends on the header's own length, so settle it in two passes
+        header["vector_offset"] = 0
+        encoded = json.dumps(header, default=str).encode("utf-8")
+        offset = _align(len(MAGIC) + 8 + len(encoded) + 32)
+        header["vector_offset"] = offset
+        encoded = json.dumps(header, default=str).encode("utf-8")
+        if len(MAGIC) + 8 + len(encoded) > offset:
+            raise SnapshotError("Header grew past the reserved vector offset")
+
+        partial = f"{path}.partial"
+        with open(partial, "wb") as out:
+            out.write(MAGIC)
+            out.write(struct.pack("<Q", len(encoded)))
+            out.write(encoded)
+            out.write(b"\0" * (offset - out.tell()))
+            vectors.seek(0)
+            while True:
+                block = vectors.read(1 << 20)
+                if not block:
+                    break
+                out.write(block)
+        os.replace(partial, path)
+    return header
+
+
+def _align(size: int) -> int:
+    return (size + VECTOR_ALIGNMENT - 1) // VECTOR_ALIGNMENT * VECTOR_ALIGNMENT
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise SnapshotError(f"{path} is not a snapshot file")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length).decode("utf-8"))
+    if header.get("format_version") != FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot format version {header.get('format_version')}")
+    return header
+
+
+def open_vectors(path: str, header: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """Memory-map the snapshot's vector block as a read-only (count, dimensions) array."""
+    header = header or read_header(path)
+    count, dimensions = header["count"], header["embedding"]["dimensions"]
+    if not count:
+        return np.zeros((0, dimensions), dtype=DTYPE)
+    expected = header["vector_offset"] + count * dimensions * 4
+    if os.path.getsize(path) < expected:
+        raise SnapshotError(f"{path} is truncated ({os.path.getsize(path)} of {expected} bytes)")
+    return np.memmap(path, dtype=DTYPE, mode="r", offset=header["vector_offset"], shape=(count, dimensions))
+
+
+def verify_checksum(path: str, header: Optional[Dict[str, Any]] = None) -> bool:
+    header = header or read_header(path)
+    digest = hashlib.sha256(open_vectors(path, header).tobytes()).hexdigest()
+    return digest == header["vectors_sha256"]
+
+
+def _object_vector(obj: Any, vector_name: Optional[str]) -> Any:
+    vector = obj.vector
+    if isinstance(vector, dict):
+        if not vector:
+            return None
+        return vector.get(vector_name) if vector_name else next(iter(vector.values()))
+    return vector
+
+
+def collection_model(collection: Any) -> Optional[str]:
+    """Best-effort embedding model name from a Weaviate collection's vectorizer config."""
+    try:
+        config = collection.config.get()
+        vectorizers = [named.vectorizer for named in (config.vector_config or {}).values()]
+        if config.vectorizer_config is not None:
+            vectorizers.append(config.vectorizer_config)
+        for vectorizer in vectorizers:
+            model = getattr(vectorizer, "model", None) or {}
+            if isinstance(model, dict) and model.get("model"):
+                return model["model"]
+    except Exception:
+        pass
+    return None
+
+
+def export_collection(client: Any, name: str, path: str, model: Optional[str] = None,
+                      vector_name: Optional[str] = None) -> Dict[str, Any]:
+    """Dump a collection, with its stored vectors, to a snapshot file."""
+    collection = client.collections.get(name)
+    embedding = read_embedding(client, name) or {"provider": "openai"}
+    model = model or embedding.get("model") or collection_model(collection) or DEFAULT_EMBEDDING_MODEL
+
+    def objects():
+        for obj in collection.iterator(include_vector=True):
+            vector = _object_vector(obj, vector_name)
+            if vector is None:
+                raise SnapshotError(f"Object {obj.uuid} in {name} has no stored vector")
+            yield obj.uuid, dict(obj.properties), vector
+
+    return write_snapshot(path, objects(), model, collection=name, provider=embedding["provider"])
+
+
+def _embedding(header: Dict[str, Any]) -> Dict[str, Any]:
+    # Snapshots written before providers were recorded all came from OpenAI
+    return {"provider": "openai", **header["embedding"]}
+
+
+def _property_type(value: Any):
+    from weaviate.classes.config import DataType
+    if isinstance(value, bool):
+        return DataType.BOOL
+    if isinstance(value, int):
+        return DataType.INT
+    if isinstance(value, float):
+        return DataType.NUMBER
+    return DataType.TEXT
+
+
+def import_snapshot(client: Any, path: str, alias: str = COLLECTION_NAME, make_active: bool = True,
+                    batch_size: int = 500) -> Dict[str, Any]:
+    """Bulk-insert a snapshot into a new versioned collection, verify it and (optionally) activate it.
+
+    OpenAI snapshots keep Weaviate's vectorizer for the snapshot's model so
+    near_text queries still work; other providers' collections get no
+    vectorizer and are queried by vector (store.embeddings). Documents are
+    inserted with their vectors either way, so nothing is re-embedded.
+    """
+    header = read_header(path)
+    if not verify_checksum(path, header):
+        raise SnapshotError(f"{path} failed its vector checksum")
+    vectors = open_vectors(path, header)
+    records = header["objects"]
+    name = new_version_name(alias)
+
+    from weaviate.classes.config import Configure, Property
+    embedding = _embedding(header)
+    sample = records[0]["properties"] if records else {}
+    if vectorized_by_weaviate(embedding):
+        vectorizer = Configure.NamedVectors.text2vec_openai(name="default", model=embedding["model"])
+    else:
+        vectorizer = Configure.NamedVectors.none(name="default")
+    client.collections.create(
+        name=name,
+        vectorizer_config=[vectorizer],
+        properties=[Property(name=key, data_type=_property_type(value)) for key, value in sample.items()],
+    )
+    record_embedding(client, name, embedding)
+    collection = client.collections.get(name)
+    with collection.batch.fixed_size(batch_size=batch_size) as batch:
+        for row, record in enumerate(records):
+            batch.add_object(properties=record["properties"], uuid=record["uuid"],
+                             vector={"default": vectors[row].tolist()})
+    failed = getattr(collection.batch, "failed_objects", None) or []
+    if failed:
+        raise SnapshotError(f"{len(failed)} objects failed to import into {name}")
+
+    checks = verify_version(client, name, expected_count=len(records))
+    if records:
+        # A self-lookup by vector checks the vectors landed without any embedding call
+        hits = collection.query.near_vector(near_vector=vectors[0].tolist(), limit=1).objects
+        if not hits or str(hits[0].uuid) != records[0]["uuid"]:
+            raise SnapshotError(f"Vector self-check failed for {name}")
+    result = {"collection": name, "count": checks["count"], "provider": embedding["provider"],
+              "model": embedding["model"]}
+    if make_active:
+        result.update(activate(client, name, alias, kind="snapshot_import"))
+    return result
+
+
+class _SnapshotQuery:
+    def __init__(self, collection: "SnapshotCollection"):
+        self._collection = collection
+
+    def near_vector(self, near_vector: Any, limit: int = 10, filters: Any = None, **kwargs):
+        return self._collection.search(np.asarray(near_vector, dtype=DTYPE), limit, filters)
+
+    def near_text(self, query: str, limit: int = 10, filters: Any = None, **kwargs):
+        return self.near_vector(self._collection.embed_query(query), limit, filters)
+
+    # Snapshots have no keyword index; hybrid queries are answered by the vector search alone
+    hybrid = near_text
+
+    def fetch_objects(self, limit: int = 100, filters: Any = None, **kwargs):
+        objects = []
+        for row, record in enumerate(self._collection.records):
+            if _matches(filters, record["properties"], record["uuid"]):
+                objects.append(self._collection.object_at(row))
+                if len(objects) >= limit:
+                    break
+        return SimpleNamespace(objects=objects)
+
+    def fetch_object_by_id(self, uuid: Any, **kwargs) -> Optional[MemoryObject]:
+        row = self._collection.row_of(str(uuid))
+        return self._collection.object_at(row) if row is not None else None
+
+
+class _SnapshotAggregate:
+    def __init__(self, collection: "SnapshotCollection"):
+        self._collection = collection
+
+    def over_all(self, total_count: bool = True, **kwargs):
+        return SimpleNamespace(total_count=len(self._collection.records))
+
+
+class SnapshotCollection:
+    """Read-only collection served from a memory-mapped snapshot."""
+
+    def __init__(self, path: str, embed_query: Optional[Callable[[str], List[float]]] = None):
+        self.path = path
+        self.header = read_header(path)
+        self.name = self.header["collection"]
+        self.records = self.header["objects"]
+        self.vectors = open_vectors(path, self.header)
+        # Row norms are computed once; the rows themselves stay paged in from the file
+        self.norms = np.linalg.norm(self.vectors, axis=1) if len(self.records) else np.zeros(0, dtype=DTYPE)
+        self.norms[self.norms == 0] = 1.0
+        self._embed_query = embed_query
+        self._rows: Optional[Dict[str, int]] = None
+        self.query = _SnapshotQuery(self)
+        self.aggregate = _SnapshotAggregate(self)
+
+    def embed_query(self, text: str) -> List[float]:
+        if self._embed_query is None:
+            # Queries still need embedding with the snapshot's provider; documents never do
+            self._embed_query = provider_for(_embedding(self.header)).embed_query
+        return self._embed_query(text)
+
+    def iterator(self, include_vector: bool = False, **kwargs):
+        for row in range(len(self.records)):
+            obj = self.object_at(row)
+            if include_vector:
+                obj.vector = {"default": self.vectors[row].tolist()}
+            yield obj
+
+    def row_of(self, object_uuid: str) -> Optional[int]:
+        if self._rows is None:
+            self._rows = {record["uuid"]: row for row, record in enumerate(self.records)}
+        return self._rows.get(object_uuid)
+
+    def object_at(self, row: int, similarity: Optional[float] = None) -> MemoryObject:
+        record = self.records[row]
+        obj = MemoryObject(record["properties"], record["uuid"])
+        if similarity is not None:
+            obj.metadata = SimpleNamespace(
+                distance=round(1.0 - similarity, 6),
+                certainty=round((1.0 + similarity) / 2, 6),
+                score=round(similarity, 6),
+            )
+        return obj
+
+    def search(self, vector: np.ndarray, limit: int, filters: Any = None):
+        if not len(self.records):
+            return SimpleNamespace(objects=[])
+        if vector.shape != (self.vectors.shape[1],):
+            raise SnapshotError(f"Query vector has {vector.shape[0]} dimensions, snapshot has {self.vectors.shape[1]}")
+        similarities = (self.vectors @ vector) / (self.norms * (np.linalg.norm(vector) or 1.0))
+        if filters is not None:
+            mask = np.array([_matches(filters, record["properties"], record["uuid"]) for record in self.records])
+            similarities = np.where(mask, similarities, -np.inf)
+        limit = min(limit, len(self.records))
+        top = np.argpartition(-similarities, limit - 1)[:limit]
+        top = top[np.argsort(-similarities[top])]
+        return SimpleNamespace(objects=[self.object_at(int(row), float(similarities[row]))
+                                        for row in top if np.isfinite(similarities[row])])
+
+
+class _SnapshotCollections:
+    def __init__(self, client: "SnapshotClient"):
+        self._client = client
+
+    def _names(self) -> List[str]:
+        return [COLLECTION_NAME, self._client.collection.name]
+
+    def get(self, name: str) -> SnapshotCollection:
+        if name not in self._names():
+            raise SnapshotError(f"Snapshot backend only serves {self._client.collection.name}")
+        return self._client.collection
+
+    def exists(self, name: str) -> bool:
+        return name in self._names()
+
+    def list_all(self, simple: bool = True) -> Dict[str, SnapshotCollection]:
+        return {self._client.collection.name: self._client.collection}
+
+
+class SnapshotClient:
+    """Read-only stand-in for the Weaviate client, backed by one snapshot file."""
+
+    def __init__(self, path: str = SNAPSHOT_PATH, embed_query: Optional[Callable[[str], List[float]]] = None):
+        self.collection = SnapshotCollection(path, embed_query)
+        self.collections = _SnapshotCollections(self)
+
+    def is_ready(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+_open_clients: Dict[Tuple[str, float], SnapshotClient] = {}
+
+
+def open_snapshot_client(path: str = SNAPSHOT_PATH) -> SnapshotClient:
+    """Shared SnapshotClient per file; a rewritten snapshot (new mtime) is reopened."""
+    key = (os.path.abspath(path), os.path.getmtime(path))
+    if key not in _open_clients:
+        _open_clients.clear()
+        _open_clients[key] = SnapshotClient(path)
+    return _open_clients[key]
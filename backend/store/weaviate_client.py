@@ -0,0 +1,68 @@
+"""
+Shared Weaviate connection helper.
+
+Every component that talks to the vector store goes through connect_weaviate()
+so the connection settings live in one place and the client can be swapped
+for an in-memory stand-in (see store.memory) in benchmarks and offline runs.
+With VECTOR_BACKEND=snapshot it serves a memory-mapped snapshot file
+(SNAPSHOT_PATH, see store.snapshot) instead of connecting to Weaviate.
+"""
+
+import os
+from typing import Any, Callable, Optional
+
+COLLECTION_NAME = "SupportDocs"
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "weaviate")
+
+_client_factory: Optional[Callable[[], Any]] = None
+
+
+def set_client_factory(factory: Optional[Callable[[], Any]]):
+    """Override how clients are created (pass None to restore the real Weaviate client)."""
+    global _client_factory
+    _client_factory = factory
+
+
+def connect_weaviate(skip_init_checks: bool = False):
+    """Open a client using WEAVIATE_URL / WEAVIATE_API_KEY / OPENAI_API_KEY."""
+    if _client_factory is not None:
+        return _client_factory()
+
+    if VECTOR_BACKEND == "snapshot":
+        from store.snapshot import SNAPSHOT_PATH, open_snapshot_client
+        return open_snapshot_client(SNAPSHOT_PATH)
+
+    # Imported lazily: the weaviate client is slow to import and not every process needs it
+    import weaviate
+    from weaviate.classes.init import Auth
+
+    weaviate_url = os.getenv("WEAVIATE_URL", "http://localhost:8080")
+    weaviate_key = os.getenv("WEAVIATE_API_KEY")
+    openai_key = os.getenv("OPENAI_API_KEY")
+    headers = {"X-OpenAI-Api-Key": openai_key} if openai_key else {}
+
+    # Parse URL for host and port
+    url_parts = weaviate_url.replace("http://", "").replace("https://", "")
+    if ":" in url_parts:
+        host, port_str = url_parts.split(":")
+        port = int(port_str)
+    else:
+        host = url_parts
+        port = 8080
+
+    # For local Docker deployment
+    if "localhost" in weaviate_url or "127.0.0.1" in weaviate_url:
+        return weaviate.connect_to_local(
+            host=host,
+            port=port,
+            headers=headers,
+            skip_init_checks=skip_init_checks
+        )
+
+    # For Weaviate Cloud
+    return weaviate.connect_to_weaviate_cloud(
+        cluster_url=weaviate_url,
+        auth_credentials=Auth.api_key(weaviate_key) if weaviate_key else None,
+        headers=headers,
+        skip_init_checks=skip_init_checks
+    )
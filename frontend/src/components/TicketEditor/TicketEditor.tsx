@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useRef, useState } from 'react';
 import { useCopilotReadable } from "@copilotkit/react-core";
 import {
     Send,
@@ -96,6 +96,10 @@ export function TicketEditor() {
     const [sendingTickets, setSendingTickets] = useState<Set<string>>(new Set());
     const [showSourceSelector, setShowSourceSelector] = useState<Set<string>>(new Set());
     const [suggestedSources, setSuggestedSources] = useState<Map<string, RAGSource[]>>(new Map());
+    // Short-lived server handles to the suggest-sources search, reused by the next draft request
+    const retrievalHandles = useRef<Map<string, string>>(new Map());
+    // In-flight as-you-type suggestion request per ticket; a new keystroke aborts the previous one
+    const suggestControllers = useRef<Map<string, AbortController>>(new Map());
     const [isDetailCollapsed, setIsDetailCollapsed] = useState(false);
 
     const selectedTicket = tickets.find(t => t.id === selectedTicketId) || null;
@@ -128,6 +132,9 @@ export function TicketEditor() {
 
             const data = await response.json();
             const sources = data.suggested_sources || [];
+            if (data.retrieval_handle) {
+                retrievalHandles.current.set(ticketId, data.retrieval_handle);
+            }
 
             setSuggestedSources(prev => {
                 const next = new Map(prev);
@@ -139,6 +146,41 @@ export function TicketEditor() {
         }
     };
 
+    // Refresh suggested sources while the agent edits a draft. The server answers from its
+    // prefix cache or a lexical index and cancels superseded requests of the same session.
+    const suggestAsYouType = async (ticketId: string, text: string) => {
+        suggestControllers.current.get(ticketId)?.abort();
+        if (!text.trim()) return;
+        const controller = new AbortController();
+        suggestControllers.current.set(ticketId, controller);
+
+        try {
+            const response = await fetch('/api/suggest-sources', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    model: 'gpt-4',
+                    messages: [{ role: 'user', content: text }],
+                    session_id: ticketId
+                }),
+                signal: controller.signal
+            });
+
+            const data = await response.json();
+            if (data.superseded) return;
+
+            setSuggestedSources(prev => {
+                const next = new Map(prev);
+                next.set(ticketId, data.suggested_sources || []);
+                return next;
+            });
+        } catch (error) {
+            if ((error as Error).name !== 'AbortError') {
+                console.error('Error fetching suggested sources:', error);
+            }
+        }
+    };
+
     // Toggle expand/collapse for a ticket
     const toggleExpand = (ticketId: string, e: React.MouseEvent) => {
         e.stopPropagation();
@@ -180,7 +222,8 @@ export function TicketEditor() {
             const requestBody: any = {
                 model: 'gpt-4',
                 messages: [{ role: 'user', content: ticket.query }],
-                stream: false
+                stream: false,
+                ticket_id: ticketId
             };
 
             // Add selected sources if provided
@@ -188,6 +231,18 @@ export function TicketEditor() {
                 requestBody.selected_sources = selectedSources;
             }
 
+            // Redrafting an existing draft resumes the ticket's thread: the server reruns only
+            // generation (or retrieval onwards, if the sources changed) instead of the whole pipeline
+            if (ticket.draft) {
+                requestBody.action = 'regenerate';
+            }
+
+            // Reuse the suggest-sources search; the server falls back to a fresh one if the handle expired
+            const retrievalHandle = retrievalHandles.current.get(ticketId);
+            if (retrievalHandle) {
+                requestBody.retrieval_handle = retrievalHandle;
+            }
+
             const response = await fetch('/api/copilot', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
@@ -670,7 +725,10 @@ export function TicketEditor() {
                                     <textarea
                                         className="flex-1 w-full p-4 rounded-lg bg-zinc-900/50 border border-zinc-800 text-zinc-200 text-sm leading-relaxed resize-none focus:outline-none focus:border-zinc-700 focus:ring-1 focus:ring-zinc-700 placeholder-zinc-600"
                                         value={editDraft}
-                                        onChange={(e) => setEditDraft(e.target.value)}
+                                        onChange={(e) => {
+                                            setEditDraft(e.target.value);
+                                            suggestAsYouType(ticket.id, e.target.value);
+                                        }}
                                     />
 
                                     <div className="mt-4 flex justify-end gap-3">